@@ -0,0 +1,186 @@
+# mahakim_analytics.py
+# Bulk post-processing of the result store with vectorised pandas: composite "n/code/year" numbers split
+# into typed columns, Arabic text variants normalised for grouping, per station/year/type aggregates and
+# gap reports over the queried number sequences (stretches without hits, numbers never finished)
+import os
+import sys
+import time
+import sqlite3
+import pandas as pd
+import mahakim_queue
+import mahakim_refresh
+
+COMPOSITE = r"^\s*([0-9]+)\s*/\s*([0-9]+)\s*/\s*([0-9]{4})\s*$"
+TEXT_FIELDS = ["action", "type", "subject"]
+# Orthographic variants that the site's free text mixes; all are folded before grouping.
+ARABIC_FOLDS = [
+    ("[\u064b-\u0652\u0670]", ""),   # harakat and dagger alef
+    ("\u0640", ""),                    # tatweel
+    ("[إأآٱ]", "ا"),
+    ("ى", "ي"),
+    ("ی", "ي"),
+    ("ک", "ك"),
+    ("ة", "ه"),
+    ("[\u200c-\u200f\u202a-\u202e]", ""),   # joiners and direction marks
+    (r"\s+", " "),
+]
+ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+SHEETS = ("by_type", "by_subject", "by_action", "hit_gaps", "open_ranges")
+
+def load_rows(store_path):
+    # One bulk read; text columns stay strings until they are typed below.
+    conn = sqlite3.connect(store_path)
+    try:
+        return pd.read_sql_query(
+            "SELECT target, case_number, file_number, action, type, subject, more_info, queried_numero, queried_annee, first_seen, last_seen FROM results", conn)
+    finally:
+        conn.close()
+
+def fold_text(series):
+    s = series.fillna("").str.translate(ARABIC_DIGITS)
+    for pattern, replacement in ARABIC_FOLDS:
+        s = s.str.replace(pattern, replacement, regex=True)
+    return s.str.strip()
+
+def per_value(series, fn):
+    # Free-text columns repeat a few hundred spellings over the whole table: fn runs once per distinct value.
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return pd.Categorical(fn(pd.Series(uniques, dtype="str")).to_numpy()[codes])
+
+def normalize_text(series):
+    return per_value(series, fold_text)
+
+def station_of(labels):
+    # Station is the last level of a campaign label ("court > ... > station / year"); stores written before single-station rows got the same label carry only the station.
+    return labels.fillna("").str.split(" / ").str[0].str.split(" > ").str[-1]
+
+def split_composite(df, field):
+    parts = df[field].str.extract(COMPOSITE)
+    # Eastern Arabic digits are rare; only the values that did not match are translated and tried again.
+    retry = parts[0].isna() & df[field].notna()
+    if retry.any():
+        parts.loc[retry] = df.loc[retry, field].str.translate(ARABIC_DIGITS).str.extract(COMPOSITE).to_numpy()
+    # The pattern only lets ASCII digits through, so the groups cast directly.
+    df[f"{field}_seq"] = parts[0].astype("Int64")
+    df[f"{field}_code"] = parts[1]
+    df[f"{field}_year"] = parts[2].astype("Int64")
+
+def normalize(df):
+    df = df.copy()
+    split_composite(df, "case_number")
+    split_composite(df, "file_number")
+    df["queried_numero"] = pd.to_numeric(df["queried_numero"], errors="coerce").astype("Int64")
+    df["queried_annee"] = pd.to_numeric(df["queried_annee"], errors="coerce").astype("Int64")
+    for field in TEXT_FIELDS:
+        df[f"{field}_norm"] = normalize_text(df[field])
+    df["station"] = per_value(df["target"], station_of)
+    settled = "|".join(fold_text(pd.Series(mahakim_refresh.SETTLED_ACTIONS, dtype="str")))
+    df["pending"] = ~df["action_norm"].astype("str").str.contains(settled, regex=True)
+    df["first_seen"] = pd.to_datetime(df["first_seen"], unit="s")
+    df["last_seen"] = pd.to_datetime(df["last_seen"], unit="s")
+    return df
+
+def aggregate(df, field):
+    keys = ["station", "queried_annee", f"{field}_norm"]
+    out = df.groupby(keys, observed=True, dropna=False).agg(
+        rows=("case_number", "size"),
+        cases=("case_number", "nunique"),
+        numbers=("queried_numero", "nunique"),
+        pending=("pending", "sum"),
+        first_seen=("first_seen", "min"),
+        last_seen=("last_seen", "max"),
+    ).reset_index()
+    out["pending_share"] = (out["pending"] / out["rows"]).round(3)
+    return out.sort_values(["station", "queried_annee", "rows"], ascending=[True, True, False], ignore_index=True)
+
+def runs(frame, keys, number):
+    # Consecutive numbers form one run: a new run starts wherever the step from the previous number is not 1.
+    frame = frame.sort_values(keys + [number])
+    step = frame.groupby(keys, observed=True)[number].diff()
+    frame = frame.assign(run=(step != 1).cumsum())
+    out = frame.groupby(keys + ["run"], observed=True)[number].agg(first="min", last="max", length="size").reset_index()
+    return out.drop(columns="run")
+
+def hit_gaps(df, min_length=1):
+    # Stretches between two numbers that returned rows; long ones are candidates for dead ranges or missed hits.
+    hits = df.dropna(subset=["queried_numero"]).drop_duplicates(["station", "queried_annee", "queried_numero"])
+    hits = hits.sort_values(["station", "queried_annee", "queried_numero"])
+    prev = hits.groupby(["station", "queried_annee"], observed=True)["queried_numero"].shift()
+    gaps = hits.assign(first=prev + 1, last=hits["queried_numero"] - 1)
+    gaps = gaps[gaps["last"] >= gaps["first"]]
+    gaps = gaps.assign(length=gaps["last"] - gaps["first"] + 1)[["station", "queried_annee", "first", "last", "length"]]
+    return gaps[gaps["length"] >= min_length].sort_values("length", ascending=False, ignore_index=True)
+
+def open_ranges(queue_path):
+    # Numbers the queue has not finished (pending, leased or failed), as ranges per station/year and state.
+    conn = mahakim_queue.open_queue(queue_path)
+    try:
+        work = pd.read_sql_query(
+            "SELECT station, year, number, state FROM work WHERE state NOT IN ('no_results', 'has_data')", conn,
+            dtype={"year": "str"})
+    finally:
+        conn.close()
+    if work.empty:
+        return pd.DataFrame(columns=["station", "year", "state", "first", "last", "length"])
+    return runs(work, ["station", "year", "state"], "number").sort_values(["station", "year", "first"], ignore_index=True)
+
+def analyze(store_path, queue_path=None, min_gap=1):
+    started = time.time()
+    df = normalize(load_rows(store_path))
+    normalized = time.time() - started
+    report = {
+        "rows": df,
+        "by_type": aggregate(df, "type"),
+        "by_subject": aggregate(df, "subject"),
+        "by_action": aggregate(df, "action"),
+        "hit_gaps": hit_gaps(df, min_gap),
+        "open_ranges": open_ranges(queue_path) if queue_path and os.path.exists(queue_path) else None,
+    }
+    report["timing"] = {"normalize": normalized, "total": time.time() - started}
+    return report
+
+def save_report(report, out):
+    # An .xlsx gets one sheet per table; anything else is a directory of CSV files that also holds the
+    # normalised rows (openpyxl needs minutes for a few hundred thousand rows, CSV a second).
+    tables = {name: report[name] for name in SHEETS if report.get(name) is not None}
+    if out.endswith(".xlsx"):
+        with pd.ExcelWriter(out, engine="openpyxl") as writer:
+            for name, table in tables.items():
+                table.to_excel(writer, sheet_name=name, index=False)
+    else:
+        os.makedirs(out, exist_ok=True)
+        tables["rows"] = report["rows"]
+        for name, table in tables.items():
+            table.to_csv(os.path.join(out, f"{name}.csv"), index=False, encoding="utf-8-sig")
+    print(f"📊 Analytics written to {out}")
+
+def print_report(report, top=5):
+    df = report["rows"]
+    timing = report["timing"]
+    unparsed = int(df["case_number_seq"].isna().sum())
+    print("\n=== Analytics ===")
+    print(f"🧮 {len(df)} rows normalised in {timing['normalize']:.2f}s, report built in {timing['total']:.2f}s "
+          f"({unparsed} case numbers not in n/code/year form)")
+    for field in TEXT_FIELDS:
+        raw, folded = df[field].nunique(), df[f"{field}_norm"].nunique()
+        print(f"🔤 {field}: {raw} spellings → {folded} values after normalisation")
+    for (station, year), group in report["by_type"].groupby(["station", "queried_annee"], observed=True):
+        print(f"📍 {station} / {year}: " + ", ".join(f"{t} {n}" for t, n in zip(group["type_norm"].head(top), group["rows"].head(top))))
+    gaps = report["hit_gaps"].head(top)
+    if len(gaps):
+        print("🕳️  Longest stretches without hits: " + ", ".join(
+            f"{s} / {y} {a}-{b} ({n})" for s, y, a, b, n in gaps[["station", "queried_annee", "first", "last", "length"]].itertuples(index=False)))
+    ranges = report.get("open_ranges")
+    if ranges is not None and len(ranges):
+        print(f"📋 {int(ranges['length'].sum())} numbers still open in {len(ranges)} ranges: " + ", ".join(
+            f"{s} / {y} {state} {a}-{b}" for s, y, state, a, b in ranges[["station", "year", "state", "first", "last"]].head(top).itertuples(index=False)))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python mahakim_analytics.py <results.sqlite> [out.xlsx | out directory] [queue.sqlite] [min gap]")
+        sys.exit(1)
+    args = sys.argv[1:]
+    report = analyze(args[0], args[2] if len(args) > 2 else None, int(args[3]) if len(args) > 3 else 1)
+    print_report(report)
+    if len(args) > 1 and args[1] != "-":
+        save_report(report, args[1])
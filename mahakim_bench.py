@@ -0,0 +1,111 @@
+# mahakim_bench.py
+# End-to-end benchmark: runs a scraper script's run_scraper against the offline fixture site
+# and reports cases/sec, p50/p95 per stage, memory per concurrent query and whether every fixture hit was found
+import os
+import sys
+import json
+import time
+import tempfile
+import mahakim_extract
+import mahakim_fixture
+import mahakim_metrics
+import mahakim_memory
+import mahakim_waits
+import mahakim_writer
+
+def found_numbers(output_xlsx):
+    found = set()
+    for path in mahakim_writer.list_shards(mahakim_writer.shard_dir(output_xlsx)):
+        for record in mahakim_writer.read_shard(path):
+            if str(record[6]).isdigit():
+                found.add(int(record[6]))
+    return found
+
+def run_bench(script_path, count=100, latency=0.3, error_rate=0.0, density=0.3, output=None, engine="selenium", concurrency=1):
+    server = mahakim_fixture.serve_fixture(0, latency, error_rate, density, background=True)
+    workdir = tempfile.mkdtemp(prefix="mahakim-bench-")
+    script = mahakim_extract.load_script(script_path)
+    # Stage timings come from this process, so they cover the single-browser sweep and the playwright
+    # contexts; with selenium workers only the memory and throughput figures are complete.
+    overrides = {
+        "TARGET_URL": f"http://127.0.0.1:{server.server_port}/#/suivi/rapport-police-judiciaire",
+        "START_NUM": 1,
+        "END_NUM": count,
+        "OUTPUT_XLSX": os.path.join(workdir, "results.xlsx"),
+        "PROGRESS_FILE": os.path.join(workdir, "progress.txt"),
+        "QUEUE_DB": os.path.join(workdir, "queue.sqlite"),
+        "STORE_DB": os.path.join(workdir, "results.sqlite"),
+        "DETAILS_DB": os.path.join(workdir, "details.sqlite"),
+        "CATALOGUE_FILE": os.path.join(workdir, "catalogue.json"),
+        "DRIVER_CACHE": os.path.join(workdir, "chromedriver.json"),
+        "HEADLESS": True,
+        "WORKERS": concurrency if engine == "selenium" else 1,
+        "CONTEXTS": concurrency,
+        "ENGINE": engine,
+        "CAMPAIGN_FILE": "",
+        "RETRY_FAILED": False,
+        "METRICS_LOG": os.path.join(workdir, "metrics.jsonl"),
+    }
+    script.configure(**overrides)
+    mahakim_metrics.reset()
+    mahakim_waits.STEP_WAITS.clear()
+    started = time.time()
+    try:
+        script.run_scraper()
+    finally:
+        server.shutdown()
+        server.server_close()
+    elapsed = time.time() - started
+    expected = {n for n in range(1, count + 1) if mahakim_fixture.case_rows(script.STATION, script.YEAR, n, density)}
+    found = found_numbers(script.OUTPUT_XLSX)
+    stages = mahakim_metrics.summarize()
+    startup = stages.get("startup", {}).get("total", 0.0)
+    report = {
+        "script": os.path.basename(script_path),
+        "engine": engine,
+        "concurrency": concurrency,
+        "count": count,
+        "latency": latency,
+        "error_rate": error_rate,
+        "density": density,
+        "elapsed": elapsed,
+        "cases_per_sec": count / elapsed if elapsed else 0.0,
+        "sweep_cases_per_sec": count / (elapsed - startup) if elapsed > startup else 0.0,
+        "fixture_queries": server.handler.queries,
+        "expected_hits": len(expected),
+        "found_hits": len(found & expected),
+        "missed": sorted(expected - found),
+        "unexpected": sorted(found - expected),
+        "stages": stages,
+        "memory": mahakim_memory.summary(),
+    }
+    print_report(report)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+    return report
+
+def print_report(report):
+    print("\n=== Benchmark ===")
+    print(f"📊 {report['script']} ({report['engine']} x{report['concurrency']}): {report['count']} numbers in {report['elapsed']:.1f}s, {report['cases_per_sec']:.2f} cases/sec "
+          f"({report['sweep_cases_per_sec']:.2f} excluding browser startup), {report['fixture_queries']} searches sent")
+    print(f"🎯 Hits found {report['found_hits']}/{report['expected_hits']}, missed {report['missed'][:20]}, unexpected {report['unexpected'][:20]}")
+    for stage, s in report["stages"].items():
+        print(f"⏱️  {stage}: {s['count']} samples, p50 {s['p50'] * 1000:.0f} ms, p95 {s['p95'] * 1000:.0f} ms")
+    mahakim_memory.print_memory(report["memory"])
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print('Usage: python mahakim_bench.py "Mahakim Beta.py" [count] [latency] [error rate] [hit density] [report.json] [selenium|playwright] [concurrency]')
+        sys.exit(1)
+    args = sys.argv[2:]
+    report = run_bench(sys.argv[1],
+                       int(args[0]) if len(args) > 0 else 100,
+                       float(args[1]) if len(args) > 1 else 0.3,
+                       float(args[2]) if len(args) > 2 else 0.0,
+                       float(args[3]) if len(args) > 3 else 0.3,
+                       args[4] if len(args) > 4 and args[4] != "-" else None,
+                       args[5] if len(args) > 5 else "selenium",
+                       int(args[6]) if len(args) > 6 else 1)
+    # A missed hit fails the run, so CI catches correctness regressions alongside speed.
+    sys.exit(1 if report["missed"] else 0)
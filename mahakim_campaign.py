@@ -0,0 +1,184 @@
+# mahakim_campaign.py
+# Multi-target campaigns: many (appeal court, first-instance court, police unit, station, year, range)
+# targets in one browser session, only re-selecting the dropdowns that differ between targets
+import json
+import time
+import mahakim_config
+import mahakim_catalogue
+import mahakim_queue
+import mahakim_discovery
+import mahakim_metrics
+import mahakim_snapshot
+
+LEVELS = mahakim_catalogue.LEVELS
+
+def defaults():
+    # Read when a campaign is loaded, so profile and --year/--station overrides reach targets that leave them out.
+    c = mahakim_config
+    return {
+        "appeal_court": c.APPEAL_COURT,
+        "first_instance_court": c.FIRST_INSTANCE_COURT,
+        "police_unit": c.UNIT_CHOICES[0],
+        "station": c.STATION,
+        "year": c.YEAR,
+        "start": c.START_NUM,
+        "end": c.END_NUM,
+    }
+
+def configured_target(catalogue):
+    # The single-station settings as a catalogue target. At each level the first configured choice the
+    # catalogue offers wins, else the first option when the profile allows it; an unmatched level keeps
+    # the first wanted text, so validate_targets reports it with suggestions.
+    c = mahakim_config
+    wanted = [[c.APPEAL_COURT], [c.FIRST_INSTANCE_COURT], c.UNIT_CHOICES, [c.STATION] + [s for s in c.STATION_CHOICES if s != c.STATION]]
+    fallback = [False, False, c.FIRST_OPTION_FALLBACK, c.FIRST_OPTION_FALLBACK]
+    target = {"year": c.YEAR, "start": c.START_NUM, "end": c.END_NUM}
+    node = catalogue["tree"]
+    for depth, level in enumerate(LEVELS):
+        options = node["options"] if node else []
+        position = next((p for p in (mahakim_catalogue.match_option(options, choice) for choice in wanted[depth]) if p is not None), None)
+        if position is None and fallback[depth]:
+            position = next((p for p, text in enumerate(options) if text), None)
+        target[level] = options[position] if position is not None else wanted[depth][0]
+        node = node.get("children", {}).get(target[level]) if node and position is not None else None
+    return target
+
+def store_form(catalogue=None):
+    # Single-station rows are stored under the same "court > ... > station / year" key as campaign rows.
+    # A cached catalogue of any age is enough to name the form; without one the configured texts are used.
+    catalogue = catalogue or mahakim_catalogue.load_catalogue(mahakim_config.CATALOGUE_FILE, 0)
+    return form_key(configured_target(catalogue) if catalogue else defaults())
+
+def load_campaign(path):
+    # Either a plain list of targets or {"defaults": {...}, "targets": [...]}.
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    base = defaults()
+    if isinstance(data, dict):
+        base.update(data.get("defaults", {}))
+        data = data.get("targets", [])
+    targets = []
+    seen = set()
+    for item in data:
+        target = dict(base)
+        target.update(item)
+        target["year"] = str(target["year"])
+        target["start"] = int(target["start"])
+        target["end"] = int(target["end"])
+        # The work queue is keyed by (station, year), so two targets sharing both would share progress.
+        if (target["station"], target["year"]) in seen:
+            raise ValueError(f"Duplicate campaign target {target['station']} / {target['year']}")
+        seen.add((target["station"], target["year"]))
+        targets.append(target)
+    return targets
+
+def target_key(target):
+    return tuple(target[level] for level in LEVELS) + (target["year"],)
+
+def target_label(target):
+    return " > ".join(target[level] for level in LEVELS) + f" / {target['year']}"
+
+def order_targets(targets):
+    # Sorting by the dropdown chain keeps targets that share courts/units next to each other,
+    # so consecutive targets differ in as few dropdowns as possible.
+    return sorted(targets, key=target_key)
+
+def first_change(previous, target):
+    if previous is None:
+        return 0
+    for i, level in enumerate(LEVELS):
+        if previous[level] != target[level]:
+            return i
+    return len(LEVELS)
+
+def form_key(target):
+    # The year is typed with each search, so one form snapshot serves every year of a station.
+    return " > ".join(target[level] for level in LEVELS)
+
+def apply_target(driver, url, previous, target, catalogue=None, snapshot_file="", snapshot_ttl=mahakim_snapshot.TTL_SECONDS):
+    # A fresh page first tries the saved snapshot of this form; with a catalogue every option is
+    # clicked at its known position, without one it is found by text.
+    if previous is None and snapshot_file:
+        replayed = mahakim_snapshot.warm_start(driver, snapshot_file, form_key(target), url, snapshot_ttl)
+        if replayed is not None:
+            return replayed
+    if catalogue:
+        picks = mahakim_catalogue.resolve_target(catalogue, target)
+    else:
+        picks = [(target[level], None) for level in LEVELS]
+    start = first_change(previous, target)
+    if previous is None:
+        mahakim_catalogue.open_form(driver, url)
+    for index in range(start, len(LEVELS)):
+        mahakim_catalogue.select_level(driver, index, *picks[index])
+        if index == 0:
+            mahakim_catalogue.ensure_checkbox(driver)
+    if snapshot_file:
+        mahakim_snapshot.save(driver, snapshot_file, form_key(target), url)
+    return len(LEVELS) - start
+
+def print_campaign_summary(stats):
+    print("\n=== Campaign summary ===")
+    for label, s in stats.items():
+        rate = s["queried"] / s["elapsed"] if s["elapsed"] > 0 else 0.0
+        error = f" ❌ {s['error']}" if s["error"] else ""
+        print(f"🎯 {label}: {s['queried']} numbers, {s['hits']} hits, {s['rows']} rows, {s['no_results']} empty, {s['failed']} failed, {s['skipped']} skipped, "
+              f"{s['changed']} dropdowns changed in {s['setup']:.1f}s, {rate:.2f} cases/sec{error}")
+
+def run_campaign(session, url, targets, query, conn, writer, retry_failed=False, discover=False, stop_after=0, lease_seconds=mahakim_queue.LEASE_SECONDS, catalogue=None,
+                 snapshot_file="", snapshot_ttl=mahakim_snapshot.TTL_SECONDS, worker="main"):
+    stats = {}
+    previous = None
+    targets = order_targets(targets)
+    # Seeding every target up front gives the progress readout the whole campaign to count down.
+    for target in targets:
+        mahakim_queue.seed(conn, target["station"], target["year"], target["start"], target["end"])
+        mahakim_queue.unskip(conn, target["station"], target["year"])
+        mahakim_metrics.expect(mahakim_queue.outstanding(conn, target["station"], target["year"]))
+    for target in targets:
+        label = target_label(target)
+        station, year = target["station"], target["year"]
+        s = stats[label] = {"queried": 0, "hits": 0, "rows": 0, "no_results": 0, "failed": 0, "skipped": 0, "changed": 0, "setup": 0.0, "elapsed": 0.0, "error": ""}
+        print(f"\n🎯 Target {label} ({target['start']}..{target['end']})")
+        mahakim_queue.recover(conn, station, year, worker)
+        if retry_failed:
+            mahakim_queue.requeue_failed(conn, station, year)
+        numbers = mahakim_queue.lease(conn, station, year, worker, None, retry_failed, lease_seconds)
+        if not numbers:
+            print("   nothing left to do")
+            continue
+        started = time.time()
+        try:
+            s["changed"] = apply_target(session.driver, url, previous, target, catalogue, snapshot_file, snapshot_ttl)
+            previous = target
+            session.retarget(lambda driver, target=target: apply_target(driver, url, None, target, catalogue, snapshot_file, snapshot_ttl))
+        except Exception as e:
+            s["error"] = str(e)
+            print(f"❌ Could not select target: {e}")
+            mahakim_queue.recover(conn, station, year, worker)
+            previous = None
+            continue
+        s["setup"] = time.time() - started
+        def target_query(n):
+            status, rows = query(n, target)
+            for row in rows:
+                row["target"] = label
+            return status, rows
+        def on_result(n, status, rows):
+            s["queried"] += 1
+            if rows:
+                s["hits"] += 1
+                s["rows"] += len(rows)
+            if status == "no_results":
+                s["no_results"] += 1
+            elif status != "has_data":
+                s["failed"] += 1
+            writer.write(rows)
+            writer.checkpoint(station, year, n, status, rows)
+        def on_skip(skipped):
+            mahakim_queue.skip(conn, station, year, skipped)
+            s["skipped"] += len(skipped)
+        mahakim_discovery.run_sweep(target_query, numbers, on_result, discover, stop_after, on_skip)
+        s["elapsed"] = time.time() - started - s["setup"]
+    print_campaign_summary(stats)
+    return stats
@@ -0,0 +1,137 @@
+# mahakim_capture.py
+# Hybrid detection: the real browser submits the form, but the answer is read from the search XHR itself
+# (DevTools network events from the performance log + Network.getResponseBody), decoded like the HTTP
+# engine does, instead of waiting for the table to render and parsing it; None means fall back to the DOM
+import os
+import json
+import time
+import base64
+from urllib.parse import urlparse, parse_qs
+import mahakim_config
+import mahakim_lean
+import mahakim_metrics
+
+CAPTURE_URL = os.environ.get("MAHAKIM_CAPTURE_URL", "")
+POLL_SECONDS = 0.05
+# After this many searches in a row without a matching request, a session stops waiting for one.
+MAX_MISSES = 3
+# A paged backend announces more records than it sent; those results still need the paginator.
+TOTAL_KEYS = ("total", "totalRecords", "totalElements", "totalCount", "recordsTotal", "count")
+TEMPLATE = {}
+
+def enable(driver):
+    # Network events already reach the performance log (enable_traffic_log); this only starts keeping them.
+    driver.execute_cdp_cmd("Network.enable", {})
+    mahakim_lean.log_state(driver).update(capture=True, misses=0)
+
+def active(driver):
+    return mahakim_lean.log_state(driver)["capture"]
+
+def take_events(driver):
+    state = mahakim_lean.read_log(driver)
+    events, state["events"] = state["events"], []
+    return events
+
+def arm(driver):
+    # Called right before the search is submitted, so only the requests it triggers are looked at.
+    take_events(driver)
+
+def flatten(value):
+    if isinstance(value, dict):
+        for v in value.values():
+            yield from flatten(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from flatten(v)
+    elif value is not None:
+        yield str(value).strip()
+
+def request_values(request):
+    # Every value the search can carry numero/annee in: query string, JSON body or form body.
+    values = set()
+    for items in parse_qs(urlparse(request.get("url", "")).query).values():
+        values.update(items)
+    body = request.get("postData")
+    if body:
+        try:
+            values.update(flatten(json.loads(body)))
+        except ValueError:
+            for items in parse_qs(body).values():
+                values.update(items)
+    return values
+
+def is_search(params, case_number, year, url_filter):
+    if params.get("type") not in ("XHR", "Fetch"):
+        return False
+    request = params.get("request", {})
+    if url_filter and url_filter not in request.get("url", ""):
+        return False
+    values = request_values(request)
+    return str(case_number) in values and str(year) in values
+
+def response_fields():
+    # rows_path/fields from the HTTP engine's recorded template, when one exists, map the payload exactly.
+    if "fields" not in TEMPLATE:
+        TEMPLATE["fields"] = {}
+        if os.path.exists(mahakim_config.API_TEMPLATE):
+            with open(mahakim_config.API_TEMPLATE, "r", encoding="utf-8") as f:
+                recorded = json.load(f)
+            TEMPLATE.update(fields=recorded.get("fields") or {}, rows_path=recorded.get("rows_path"))
+    return TEMPLATE
+
+def declared_total(payload):
+    if isinstance(payload, dict):
+        for key in TOTAL_KEYS:
+            if isinstance(payload.get(key), int):
+                return payload[key]
+    return None
+
+def capture_results(driver, case_number, year, timeout=10, url_filter=CAPTURE_URL):
+    started = time.time()
+    request_id = None
+    status_code = None
+    finished = False
+    while not finished and time.time() - started < timeout:
+        for message in take_events(driver):
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.requestWillBeSent" and request_id is None:
+                if is_search(params, case_number, year, url_filter):
+                    request_id = params["requestId"]
+            elif request_id is not None and params.get("requestId") == request_id:
+                if method == "Network.responseReceived":
+                    status_code = params.get("response", {}).get("status")
+                elif method == "Network.loadingFinished":
+                    finished = True
+                elif method == "Network.loadingFailed":
+                    return None
+        if not finished:
+            time.sleep(POLL_SECONDS)
+    mahakim_metrics.record("capture", time.time() - started, matched=request_id is not None, finished=finished)
+    state = mahakim_lean.log_state(driver)
+    state["misses"] = 0 if request_id is not None else state.get("misses", 0) + 1
+    if state["misses"] >= MAX_MISSES:
+        state.update(capture=False, events=[])
+        print(f"⚠️  No search response matched in {MAX_MISSES} searches, this session parses the page instead (set MAHAKIM_CAPTURE_URL?)")
+    if not finished or (status_code or 0) >= 400:
+        return None
+    try:
+        body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        text = base64.b64decode(body["body"]).decode("utf-8") if body.get("base64Encoded") else body["body"]
+        payload = json.loads(text)
+    except Exception as e:
+        print(f"  ⚠️  Captured response for {case_number} unreadable: {e}")
+        return None
+    # The HTTP engine's parser is loaded here, not at import, so scraping without capture never needs aiohttp.
+    import mahakim_http
+    with mahakim_metrics.timed("parse"):
+        template = response_fields()
+        records = mahakim_http.find_records(payload, template.get("rows_path"))
+        total = declared_total(payload)
+        if total is not None and total > len(records):
+            return None
+        rows = mahakim_http.parse_response(payload, case_number, year, template)
+        # Records that map to no case row mean the payload shape was not understood, not that nothing was found.
+        if records and not rows:
+            return None
+    return ("has_data" if rows else "no_results"), rows
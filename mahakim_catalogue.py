@@ -0,0 +1,192 @@
+# mahakim_catalogue.py
+# On-disk catalogue of the appeal court > first-instance court > police unit > station tree,
+# crawled once and reused until it expires, so targets are validated and selected without DOM scans
+import os
+import sys
+import json
+import time
+import difflib
+from selenium.webdriver.common.by import By
+import mahakim_waits
+
+LEVELS = ["appeal_court", "first_instance_court", "police_unit", "station"]
+TTL_SECONDS = 7 * 24 * 3600
+
+READ_OPTIONS_JS = """
+var items = document.querySelectorAll('.p-dropdown-panel li.p-dropdown-item');
+var texts = [];
+for (var i = 0; i < items.length; i++) texts.push((items[i].innerText || '').trim());
+return texts;
+"""
+
+PICK_OPTION_JS = """
+var want = arguments[0], index = arguments[1];
+var items = document.querySelectorAll('.p-dropdown-panel li.p-dropdown-item');
+var pick = null;
+if (index !== null && items[index] && (items[index].innerText || '').trim() === want) pick = items[index];
+var texts = [];
+for (var i = 0; i < items.length; i++) texts.push((items[i].innerText || '').trim());
+var stale = index !== null && !pick;
+if (!pick) for (var i = 0; i < items.length; i++) if (texts[i] === want) { pick = items[i]; break; }
+if (!pick) for (var i = 0; i < items.length; i++) if (texts[i] && texts[i].indexOf(want) !== -1) { pick = items[i]; break; }
+if (!pick) return {ok: false, stale: stale, options: texts};
+pick.click();
+return {ok: true, stale: stale, text: (pick.innerText || '').trim()};
+"""
+
+def dropdown(driver, index):
+    dropdowns = driver.find_elements(By.CSS_SELECTOR, "div.p-dropdown")
+    return dropdowns[index] if index < len(dropdowns) else None
+
+def read_options(driver, index):
+    # All option texts come back from one script call instead of one .text round trip per element.
+    box = dropdown(driver, index)
+    if box is None:
+        return []
+    driver.execute_script("arguments[0].click();", box)
+    mahakim_waits.wait_for(driver, f"{LEVELS[index]} open", mahakim_waits.PANEL_OPEN, 15)
+    texts = driver.execute_script(READ_OPTIONS_JS) or []
+    driver.execute_script("arguments[0].click();", box)
+    mahakim_waits.wait_for(driver, f"{LEVELS[index]} close", mahakim_waits.PANEL_CLOSED, 15)
+    return texts
+
+def select_level(driver, index, text, option_index=None):
+    box = dropdown(driver, index)
+    if box is None:
+        raise ValueError(f"Dropdown {index + 1} ({LEVELS[index]}) is not on the page")
+    driver.execute_script("arguments[0].click();", box)
+    mahakim_waits.wait_for(driver, f"{LEVELS[index]} open", mahakim_waits.PANEL_OPEN, 15)
+    result = driver.execute_script(PICK_OPTION_JS, text, option_index) or {}
+    if result.get("stale"):
+        print(f"⚠️ Catalogue position of '{text}' is out of date, fell back to a text search")
+    if not result.get("ok"):
+        driver.execute_script("arguments[0].click();", box)
+        raise ValueError(f"Option '{text}' not found for {LEVELS[index]}. Available: {[t for t in result.get('options', []) if t]}")
+    mahakim_waits.wait_for(driver, f"{LEVELS[index]} select", mahakim_waits.PANEL_CLOSED, 15)
+    print(f"✓ {LEVELS[index]}: {result.get('text')}")
+
+def ensure_checkbox(driver):
+    if not driver.execute_script(f"return {mahakim_waits.CHECKBOX_CHECKED};"):
+        box = driver.find_element(By.CSS_SELECTOR, "div.p-checkbox-box")
+        driver.execute_script("arguments[0].click();", box)
+        mahakim_waits.wait_for(driver, "checkbox", mahakim_waits.CHECKBOX_CHECKED, 10)
+
+def open_form(driver, url):
+    driver.get(url)
+    mahakim_waits.install_probe(driver)
+    mahakim_waits.wait_for(driver, "page load", mahakim_waits.PAGE_READY, 20)
+
+def crawl_level(driver, index):
+    # A node keeps the options in page order, so a cached position can be clicked directly.
+    options = read_options(driver, index)
+    node = {"options": options}
+    if index == len(LEVELS) - 1:
+        return node
+    node["children"] = {}
+    for position, text in enumerate(options):
+        if not text:
+            continue
+        select_level(driver, index, text, position)
+        if index == 0:
+            ensure_checkbox(driver)
+        node["children"][text] = crawl_level(driver, index + 1)
+    return node
+
+def crawl(driver, url):
+    started = time.time()
+    open_form(driver, url)
+    tree = crawl_level(driver, 0)
+    catalogue = {"crawled_at": time.time(), "url": url, "tree": tree}
+    print(f"🗂️ Crawled {count_stations(catalogue)} stations in {time.time() - started:.1f}s")
+    return catalogue
+
+def save_catalogue(catalogue, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(catalogue, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+def load_catalogue(path, ttl=TTL_SECONDS):
+    # A missing, unreadable or expired cache all mean the same thing: crawl again.
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            catalogue = json.load(f)
+    except ValueError:
+        return None
+    age = time.time() - catalogue.get("crawled_at", 0)
+    if ttl and age > ttl:
+        print(f"🗂️ Catalogue {path} is {age / 86400:.1f} days old, refreshing")
+        return None
+    return catalogue
+
+def get_catalogue(driver, url, path, ttl=TTL_SECONDS, refresh=False):
+    catalogue = None if refresh else load_catalogue(path, ttl)
+    if catalogue is None:
+        catalogue = crawl(driver, url)
+        save_catalogue(catalogue, path)
+    return catalogue
+
+def count_stations(catalogue):
+    def count(node, depth):
+        if depth == len(LEVELS) - 1:
+            return len([t for t in node["options"] if t])
+        return sum(count(child, depth + 1) for child in node.get("children", {}).values())
+    return count(catalogue["tree"], 0)
+
+def match_option(options, want):
+    # Same rule as the in-page picker: an exact text first, then the first option containing it.
+    for position, text in enumerate(options):
+        if text == want:
+            return position
+    for position, text in enumerate(options):
+        if text and want in text:
+            return position
+    return None
+
+def resolve_target(catalogue, target):
+    picks = []
+    node = catalogue["tree"]
+    for depth, level in enumerate(LEVELS):
+        position = match_option(node["options"], target[level])
+        if position is None:
+            path = " > ".join(text for text, _ in picks) or "the form"
+            close = difflib.get_close_matches(target[level], [t for t in node["options"] if t], n=3, cutoff=0.5)
+            raise ValueError(f"Unknown {level} '{target[level]}' under {path}" + (f", did you mean {close}?" if close else ""))
+        text = node["options"][position]
+        picks.append((text, position))
+        if depth < len(LEVELS) - 1:
+            node = node["children"][text]
+    return picks
+
+def validate_targets(catalogue, targets):
+    errors = []
+    for target in targets:
+        try:
+            resolve_target(catalogue, target)
+        except ValueError as e:
+            errors.append(str(e))
+    if errors:
+        raise ValueError("Targets not in the catalogue:\n" + "\n".join(errors))
+    print(f"🗂️ {len(targets)} targets checked against the catalogue")
+
+def print_catalogue(catalogue):
+    print(f"🗂️ Crawled {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(catalogue['crawled_at']))} from {catalogue['url']}")
+    def show(node, depth):
+        for text in node["options"]:
+            if text:
+                print("   " * depth + text)
+                if "children" in node:
+                    show(node["children"][text], depth + 1)
+    show(catalogue["tree"], 0)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python mahakim_catalogue.py <catalogue.json>")
+        sys.exit(1)
+    catalogue = load_catalogue(sys.argv[1], ttl=0)
+    if catalogue is None:
+        print(f"No catalogue at {sys.argv[1]}")
+        sys.exit(1)
+    print_catalogue(catalogue)
@@ -0,0 +1,203 @@
+# mahakim_cli.py
+# One entry point: scrape, status, find, export, enrich and bench. Each subcommand imports what it
+# needs when it runs, so status/find/export never load selenium, pandas or openpyxl (XLSX export aside)
+import os
+import sys
+import json
+import time
+import argparse
+import mahakim_config
+
+# (flag, setting, type, help); store_true flags use None as the type.
+SCRAPE_OPTIONS = [
+    ("--start", "START_NUM", int, "first case number"),
+    ("--end", "END_NUM", int, "last case number"),
+    ("--year", "YEAR", str, "case year"),
+    ("--station", "STATION", str, "police station to select"),
+    ("--workers", "WORKERS", int, "parallel browser workers"),
+    ("--engine", "ENGINE", str, "selenium, playwright or http"),
+    ("--contexts", "CONTEXTS", int, "concurrent browser contexts for the playwright engine"),
+    ("--api-template", "API_TEMPLATE", str, "recorded search request for the http engine"),
+    ("--http-concurrency", "HTTP_CONCURRENCY", int, "requests in flight for the http engine"),
+    ("--http-timeout", "HTTP_TIMEOUT", float, "seconds before an http request is given up"),
+    ("--http-retries", "HTTP_RETRIES", int, "attempts per number for the http engine"),
+    ("--http-min-delay", "HTTP_MIN_DELAY", float, "shortest pause between requests of one http slot"),
+    ("--http-max-delay", "HTTP_MAX_DELAY", float, "longest pause between requests of one http slot"),
+    ("--detection", "DETECTION", mahakim_config.DETECTIONS, "in-page script, per-element DOM reads or the captured search response"),
+    ("--throttle", "THROTTLE", str, "aimd or fixed"),
+    ("--campaign", "CAMPAIGN_FILE", str, "campaign file with several targets"),
+    ("--output", "OUTPUT_XLSX", str, "final results file"),
+    ("--format", "OUTPUT_FORMAT", str, "shard format: csv, jsonl or parquet"),
+    ("--queue", "QUEUE_DB", str, "work queue database"),
+    ("--store", "STORE_DB", str, "result store database"),
+    ("--enrich", "ENRICH_WORKERS", int, "detail sessions running alongside the sweep"),
+    ("--refresh-budget", "REFRESH_BUDGET", int, "numbers revisited by --refresh"),
+    ("--metrics-port", "METRICS_PORT", int, "serve live metrics on this port"),
+    ("--headless", "HEADLESS", None, "run Chrome without a window"),
+    ("--lean", "LEAN", None, "block images, fonts and media"),
+    ("--retry-failed", "RETRY_FAILED", None, "requeue numbers that failed before"),
+    ("--discover-end", "DISCOVER_END", None, "find the last used number instead of END_NUM"),
+    ("--refresh", "REFRESH", None, "revisit finished numbers and report changes"),
+    ("--warm-start", "WARM_START", None, "restore a saved session snapshot instead of replaying the form setup"),
+]
+
+def scrape_overrides(args):
+    return {setting: getattr(args, setting) for _, setting, _, _ in SCRAPE_OPTIONS if getattr(args, setting) is not None}
+
+def cmd_scrape(args):
+    import mahakim_scraper
+    mahakim_scraper.configure(args.profile, **scrape_overrides(args))
+    mahakim_scraper.run_scraper()
+
+def cmd_status(args):
+    import mahakim_queue
+    import mahakim_refresh
+    if not os.path.exists(args.queue):
+        print(f"No queue at {args.queue}")
+    else:
+        conn = mahakim_queue.open_queue(args.queue)
+        mahakim_refresh.install(conn)
+        mahakim_queue.print_status(conn)
+        mahakim_refresh.print_changes(conn, time.time() - args.hours * 3600)
+        conn.close()
+    if os.path.exists(args.store):
+        import mahakim_store
+        conn = mahakim_store.open_store(args.store)
+        mahakim_store.print_stats(conn)
+        conn.close()
+
+def cmd_find(args):
+    import mahakim_store
+    conn = mahakim_store.open_store(args.store)
+    for record in mahakim_store.find(conn, args.filters):
+        print(json.dumps(dict(zip(mahakim_store.FIELDS, record)), ensure_ascii=False))
+
+def cmd_export(args):
+    import mahakim_store
+    conn = mahakim_store.open_store(args.store)
+    if args.ingest:
+        import mahakim_campaign
+        mahakim_store.ingest(conn, args.ingest, mahakim_campaign.store_form())
+    mahakim_store.export(conn, args.out, args.filters)
+
+def cmd_analyze(args):
+    import mahakim_analytics
+    report = mahakim_analytics.analyze(args.store, args.queue, args.min_gap)
+    mahakim_analytics.print_report(report)
+    if args.out:
+        mahakim_analytics.save_report(report, args.out)
+
+def cmd_enrich(args):
+    import mahakim_scraper
+    import mahakim_enrich
+    mahakim_scraper.configure(args.profile)
+    mahakim_enrich.run_afterwards(mahakim_scraper, args.sessions, args.retry_failed)
+
+def cmd_coordinator(args):
+    import mahakim_coordinator
+    import mahakim_campaign
+    if args.campaign:
+        targets = mahakim_campaign.order_targets(mahakim_campaign.load_campaign(args.campaign))
+    else:
+        c = mahakim_config
+        targets = [{"station": c.STATION, "year": c.YEAR, "start": c.START_NUM, "end": c.END_NUM, "form": mahakim_campaign.store_form()}]
+    coordinator = mahakim_coordinator.Coordinator(args.queue, args.store, targets, bool(args.campaign), args.range, args.lease_seconds, args.retry_failed)
+    mahakim_coordinator.serve_coordinator(coordinator, args.port)
+
+def cmd_node(args):
+    import mahakim_scraper
+    overrides = {"WORKERS": args.workers} if args.workers else {}
+    if args.name:
+        overrides["NODE_NAME"] = args.name
+    mahakim_scraper.configure(args.profile, HEADLESS=True if args.headless else mahakim_config.HEADLESS, **overrides)
+    mahakim_scraper.run_node(args.url)
+
+def cmd_bench(args):
+    import mahakim_bench
+    report = mahakim_bench.run_bench(args.profile, args.count, args.latency, args.error_rate, args.density, args.report, args.engine, args.concurrency)
+    # A missed hit fails the run, so CI catches correctness regressions alongside speed.
+    return 1 if report["missed"] else 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mahakim", description="Mahakim.ma police report scraper")
+    commands = parser.add_subparsers(dest="command", required=True)
+    profiles = sorted(mahakim_config.PROFILES)
+
+    scrape = commands.add_parser("scrape", help="run the scraper")
+    scrape.add_argument("--profile", choices=profiles, default=mahakim_config.PROFILE)
+    for flag, setting, kind, text in SCRAPE_OPTIONS:
+        if kind is None:
+            scrape.add_argument(flag, dest=setting, action="store_const", const=True, help=text)
+        elif isinstance(kind, tuple):
+            scrape.add_argument(flag, dest=setting, choices=kind, help=text)
+        else:
+            scrape.add_argument(flag, dest=setting, type=kind, help=text)
+    scrape.set_defaults(run=cmd_scrape)
+
+    status = commands.add_parser("status", help="queue progress, recent changes and store totals")
+    status.add_argument("--queue", default=mahakim_config.QUEUE_DB)
+    status.add_argument("--store", default=mahakim_config.STORE_DB)
+    status.add_argument("--hours", type=float, default=24, help="report changes from this far back")
+    status.set_defaults(run=cmd_status)
+
+    find = commands.add_parser("find", help="print stored rows as JSON lines")
+    find.add_argument("filters", nargs="*", help="field=value, field~text or limit=N")
+    find.add_argument("--store", default=mahakim_config.STORE_DB)
+    find.set_defaults(run=cmd_find)
+
+    export = commands.add_parser("export", help="write stored rows to .xlsx, .csv or .jsonl")
+    export.add_argument("out")
+    export.add_argument("filters", nargs="*", help="field=value, field~text or limit=N")
+    export.add_argument("--store", default=mahakim_config.STORE_DB)
+    export.add_argument("--ingest", metavar="RESULTS_XLSX", help="ingest this run's shards first")
+    export.set_defaults(run=cmd_export)
+
+    analyze = commands.add_parser("analyze", help="normalise stored rows and report aggregates and number gaps")
+    analyze.add_argument("out", nargs="?", help=".xlsx for the report tables, or a directory for CSVs plus normalised rows")
+    analyze.add_argument("--store", default=mahakim_config.STORE_DB)
+    analyze.add_argument("--queue", default=mahakim_config.QUEUE_DB, help="report unfinished number ranges from this queue")
+    analyze.add_argument("--min-gap", type=int, default=1, help="shortest stretch without hits to report")
+    analyze.set_defaults(run=cmd_analyze)
+
+    enrich = commands.add_parser("enrich", help="fetch detail views for rows already scraped")
+    enrich.add_argument("sessions", nargs="?", type=int)
+    enrich.add_argument("--profile", choices=profiles, default=mahakim_config.PROFILE)
+    enrich.add_argument("--retry-failed", action="store_true")
+    enrich.set_defaults(run=cmd_enrich)
+
+    coordinator = commands.add_parser("coordinator", help="hand out leases to scraper nodes and collect their results")
+    coordinator.add_argument("--port", type=int, default=8770)
+    coordinator.add_argument("--campaign", default=mahakim_config.CAMPAIGN_FILE, help="lease campaign targets instead of the configured station")
+    coordinator.add_argument("--queue", default=mahakim_config.QUEUE_DB)
+    coordinator.add_argument("--store", default=mahakim_config.STORE_DB, help="central result store")
+    coordinator.add_argument("--range", type=int, default=25, help="numbers per lease")
+    coordinator.add_argument("--lease-seconds", type=float, default=90)
+    coordinator.add_argument("--retry-failed", action="store_true")
+    coordinator.set_defaults(run=cmd_coordinator)
+
+    node = commands.add_parser("node", help="scrape leases from a coordinator")
+    node.add_argument("url", help="coordinator address, e.g. http://10.0.0.5:8770")
+    node.add_argument("--profile", choices=profiles, default=mahakim_config.PROFILE)
+    node.add_argument("--workers", type=int, help="browsers on this node")
+    node.add_argument("--name", help="node name (default: host name)")
+    node.add_argument("--headless", action="store_true")
+    node.set_defaults(run=cmd_node)
+
+    bench = commands.add_parser("bench", help="benchmark against the offline fixture site")
+    bench.add_argument("--profile", choices=profiles, default=mahakim_config.PROFILE)
+    bench.add_argument("--count", type=int, default=100)
+    bench.add_argument("--latency", type=float, default=0.3)
+    bench.add_argument("--error-rate", type=float, default=0.0)
+    bench.add_argument("--density", type=float, default=0.3)
+    bench.add_argument("--report", help="write the JSON report here")
+    bench.add_argument("--engine", choices=["selenium", "playwright"], default="selenium")
+    bench.add_argument("--concurrency", type=int, default=1, help="browser workers (selenium) or contexts (playwright)")
+    bench.set_defaults(run=cmd_bench)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
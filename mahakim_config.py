@@ -0,0 +1,104 @@
+# mahakim_config.py
+# Every scraper setting in one place (environment overrides included) and the Alfa/Beta
+# profiles; only the standard library is imported, so status/export never load selenium or pandas
+import os
+import socket
+
+TARGET_URL = os.environ.get("MAHAKIM_URL", "https://www.mahakim.ma/#/suivi/rapport-police-judiciaire")
+START_NUM = 1
+END_NUM = 3000
+YEAR = "2025"
+OUTPUT_XLSX = "C:/Users/AlienM/Downloads/results.xlsx"
+OUTPUT_FORMAT = "csv"
+FLUSH_ROWS = 50
+FLUSH_SECONDS = 30
+PROGRESS_FILE = "C:/Users/AlienM/Downloads/progress.txt"
+QUEUE_DB = "C:/Users/AlienM/Downloads/queue.sqlite"
+APPEAL_COURT = "محكمة الاستئناف بمراكش"
+FIRST_INSTANCE_COURT = "المحكمة الابتدائية بمراكش"
+STATION = "قائد مركز الدرك الملكي بايت اورير"
+RETRY_FAILED = os.environ.get("MAHAKIM_RETRY_FAILED", "0") == "1"
+LEASE_BATCH = 10
+MAIN_LEASE_SECONDS = 24 * 3600
+HEADLESS = False
+MIN_DELAY = 0.8
+MAX_DELAY = 2.2
+RETRIES = 3
+WORKERS = int(os.environ.get("MAHAKIM_WORKERS", "1"))
+ENGINE = os.environ.get("MAHAKIM_ENGINE", "selenium")
+CONTEXTS = int(os.environ.get("MAHAKIM_CONTEXTS", "8"))
+API_TEMPLATE = os.environ.get("MAHAKIM_API_TEMPLATE", "api_request.json")
+HTTP_CONCURRENCY = int(os.environ.get("MAHAKIM_HTTP_CONCURRENCY", "8"))
+HTTP_TIMEOUT = 20
+HTTP_RETRIES = 3
+# AIMD needs a floor above zero: its fastest rate is 1 / HTTP_MIN_DELAY per request slot.
+HTTP_MIN_DELAY = 0.05
+HTTP_MAX_DELAY = 0.2
+DETECTION = os.environ.get("MAHAKIM_DETECTION", "js")
+DETECTIONS = ("js", "dom", "network")
+THROTTLE = os.environ.get("MAHAKIM_THROTTLE", "aimd")
+DISCOVER_END = os.environ.get("MAHAKIM_DISCOVER_END", "0") == "1"
+STOP_AFTER_EMPTY = int(os.environ.get("MAHAKIM_STOP_AFTER_EMPTY", "0"))
+CAMPAIGN_FILE = os.environ.get("MAHAKIM_CAMPAIGN", "")
+CATALOGUE_FILE = "C:/Users/AlienM/Downloads/catalogue.json"
+CATALOGUE_TTL = 7 * 24 * 3600
+CATALOGUE_REFRESH = os.environ.get("MAHAKIM_CATALOGUE_REFRESH", "0") == "1"
+WARM_START = os.environ.get("MAHAKIM_WARM_START", "0") == "1"
+SNAPSHOT_FILE = "C:/Users/AlienM/Downloads/snapshots.json"
+SNAPSHOT_TTL = 12 * 3600
+RECYCLE_AFTER = int(os.environ.get("MAHAKIM_RECYCLE_AFTER", "500"))
+METRICS_LOG = "C:/Users/AlienM/Downloads/metrics.jsonl"
+METRICS_PORT = int(os.environ.get("MAHAKIM_METRICS_PORT", "0"))
+LEAN = os.environ.get("MAHAKIM_LEAN", "0") == "1"
+LEAN_BLOCK_CSS = os.environ.get("MAHAKIM_LEAN_BLOCK_CSS", "0") == "1"
+DRIVER_CACHE = "C:/Users/AlienM/Downloads/chromedriver.json"
+DETAILS_DB = "C:/Users/AlienM/Downloads/details.sqlite"
+ENRICH_WORKERS = int(os.environ.get("MAHAKIM_ENRICH_WORKERS", "0"))
+STORE_DB = "C:/Users/AlienM/Downloads/results.sqlite"
+REFRESH = os.environ.get("MAHAKIM_REFRESH", "0") == "1"
+REFRESH_BUDGET = int(os.environ.get("MAHAKIM_REFRESH_BUDGET", "300"))
+NODE_NAME = os.environ.get("MAHAKIM_NODE", socket.gethostname())
+
+# What used to differ between the two scripts. Alfa is quiet, retries the page load, walks a list
+# of preferred police units and reloads the form after a failed attempt; Beta narrates every step
+# into the console and progress.txt and falls back to the first unit/station offered.
+PROFILES = {
+    "alfa": {
+        "VERBOSE": False,
+        "STEP_LOG": False,
+        "SETUP_RETRIES": 3,
+        "UNIT_CHOICES": ["الدرك الملكي", "الشرطة القضائية", "الامن الوطني"],
+        "STATION_CHOICES": ["قائد مركز الدرك الملكي بايت اورير", "مركز الدرك الملكي بايت اورير"],
+        "FIRST_OPTION_FALLBACK": False,
+        "LOADING_SLEEP": 3,
+        "RELOAD_ON_ERROR": True,
+    },
+    "beta": {
+        "VERBOSE": True,
+        "STEP_LOG": True,
+        "SETUP_RETRIES": 1,
+        "UNIT_CHOICES": ["الدرك الملكي"],
+        "STATION_CHOICES": ["قائد مركز الدرك الملكي بايت اورير"],
+        "FIRST_OPTION_FALLBACK": True,
+        "LOADING_SLEEP": 2,
+        "RELOAD_ON_ERROR": False,
+    },
+}
+PROFILE = os.environ.get("MAHAKIM_PROFILE", "beta")
+globals().update(PROFILES[PROFILE])
+
+def settings():
+    return {name: value for name, value in globals().items() if name.isupper()}
+
+def configure(profile=None, **overrides):
+    # A profile sets its options first, so explicit overrides always win.
+    if profile:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile '{profile}', expected one of {sorted(PROFILES)}")
+        globals()["PROFILE"] = profile
+        globals().update(PROFILES[profile])
+    for name, value in overrides.items():
+        if name not in globals() or not name.isupper():
+            raise ValueError(f"Unknown setting {name}")
+        globals()[name] = value
+    return settings()
@@ -0,0 +1,423 @@
+# mahakim_coordinator.py
+# Multi-node coordination: an HTTP service that hands out number ranges of every station or campaign
+# target as heartbeat-renewed leases, reassigns expired ones and streams results into one central store;
+# the node client the scraper workers run; and a local crash simulation that checks nothing is lost
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+import urllib.request
+import multiprocessing as mp
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import psutil
+import mahakim_queue
+import mahakim_store
+import mahakim_writer
+import mahakim_fixture
+
+PORT = 8770
+RANGE_SIZE = 25
+LEASE_SECONDS = 90
+HEARTBEAT_EVERY = 20
+CALL_RETRIES = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    id INTEGER PRIMARY KEY,
+    node TEXT NOT NULL,
+    station TEXT NOT NULL,
+    year TEXT NOT NULL,
+    first INTEGER NOT NULL,
+    last INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    granted_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    closed_at REAL,
+    outcome TEXT
+);
+CREATE INDEX IF NOT EXISTS leases_open ON leases (closed_at, expires_at);
+CREATE TABLE IF NOT EXISTS deliveries (
+    station TEXT NOT NULL,
+    year TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    node TEXT NOT NULL,
+    lease INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    delivered_at REAL NOT NULL,
+    PRIMARY KEY (station, year, number)
+) WITHOUT ROWID;
+"""
+
+def token(node, lease_id):
+    # The work queue's leased_by holds node and lease together, so a node that took a second lease
+    # cannot commit numbers of its first, expired one.
+    return f"{node}#{lease_id}"
+
+class Coordinator:
+    def __init__(self, queue_path, store_path, targets, campaign=False, range_size=RANGE_SIZE, lease_seconds=LEASE_SECONDS, retry_failed=False):
+        # One lock serialises every request, so a fence check and the commit behind it cannot interleave.
+        self.conn = mahakim_queue.open_queue(queue_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.store = mahakim_store.open_store(store_path, check_same_thread=False)
+        self.targets = targets
+        # Rows of single-station targets carry no label; the target's "form" completes it as in the local store.
+        self.forms = {(t["station"], t["year"]): t.get("form", "") for t in targets}
+        self.campaign = campaign
+        self.range_size = range_size
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        self.stats = {"leases": 0, "expired": 0, "released": 0, "accepted": 0, "rejected": 0, "rows": 0}
+        self.next_id = (self.conn.execute("SELECT MAX(id) FROM leases").fetchone()[0] or 0) + 1
+        for target in targets:
+            added = mahakim_queue.seed(self.conn, target["station"], target["year"], target["start"], target["end"])
+            mahakim_queue.unskip(self.conn, target["station"], target["year"])
+            requeued = mahakim_queue.requeue_failed(self.conn, target["station"], target["year"]) if retry_failed else 0
+            print(f"📋 {target['station']} / {target['year']}: {added} numbers added, {requeued} failed numbers requeued, "
+                  f"{mahakim_queue.outstanding(self.conn, target['station'], target['year'])} outstanding")
+
+    def expire(self, now):
+        for lease_id, node, station, year in self.conn.execute(
+                "SELECT id, node, station, year FROM leases WHERE closed_at IS NULL AND expires_at < ?", (now,)).fetchall():
+            left = self.conn.execute(
+                "SELECT COUNT(*) FROM work WHERE station = ? AND year = ? AND state = 'in_progress' AND leased_by = ?",
+                (station, year, token(node, lease_id))).fetchone()[0]
+            self.conn.execute("UPDATE leases SET closed_at = ?, outcome = 'expired' WHERE id = ?", (now, lease_id))
+            self.stats["expired"] += 1
+            print(f"♻️  Lease #{lease_id} of {node} expired, {left} numbers go back to the pool")
+
+    def close_if_done(self, node, lease_id, station, year, outcome="done"):
+        left = self.conn.execute(
+            "SELECT COUNT(*) FROM work WHERE station = ? AND year = ? AND state = 'in_progress' AND leased_by = ?",
+            (station, year, token(node, lease_id))).fetchone()[0]
+        if not left:
+            self.conn.execute("UPDATE leases SET closed_at = ?, outcome = ? WHERE id = ? AND closed_at IS NULL", (time.time(), outcome, lease_id))
+
+    def lease(self, node):
+        with self.lock:
+            now = time.time()
+            self.expire(now)
+            for target in self.targets:
+                station, year = target["station"], target["year"]
+                lease_id = self.next_id
+                # Expired leases are picked up here too: the queue hands out stale in_progress numbers with the pending ones.
+                numbers = mahakim_queue.lease(self.conn, station, year, token(node, lease_id), self.range_size, False, self.lease_seconds)
+                if not numbers:
+                    continue
+                self.next_id += 1
+                self.conn.execute(
+                    "INSERT INTO leases (id, node, station, year, first, last, count, granted_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (lease_id, node, station, year, min(numbers), max(numbers), len(numbers), now, now + self.lease_seconds))
+                self.stats["leases"] += 1
+                return {"lease": lease_id, "station": station, "year": year, "numbers": numbers, "lease_seconds": self.lease_seconds,
+                        "target": target if self.campaign else None}
+            # Nothing free right now; numbers still out on leases may come back if their node dies.
+            expires = self.conn.execute("SELECT MIN(expires_at) FROM leases WHERE closed_at IS NULL").fetchone()[0]
+            if expires is None:
+                return {"numbers": [], "done": True}
+            return {"numbers": [], "wait": min(HEARTBEAT_EVERY, max(0.5, expires - now + 0.1))}
+
+    def heartbeat(self, node, lease_id):
+        with self.lock:
+            now = time.time()
+            row = self.conn.execute("SELECT station, year, expires_at, closed_at FROM leases WHERE id = ? AND node = ?", (lease_id, node)).fetchone()
+            if row is None or row[3] is not None or row[2] < now:
+                self.expire(now)
+                return {"ok": False}
+            station, year = row[0], row[1]
+            def renew():
+                held = self.conn.execute(
+                    "UPDATE work SET lease_until = ? WHERE station = ? AND year = ? AND state = 'in_progress' AND leased_by = ?",
+                    (now + self.lease_seconds, station, year, token(node, lease_id))).rowcount
+                self.conn.execute("UPDATE leases SET expires_at = ? WHERE id = ?", (now + self.lease_seconds, lease_id))
+                return held
+            return {"ok": True, "held": mahakim_queue.transaction(self.conn, renew), "expires_at": now + self.lease_seconds}
+
+    def commit(self, node, lease_id, station, year, number, status, rows):
+        with self.lock:
+            worker = token(node, lease_id)
+            if not mahakim_queue.holds(self.conn, station, year, number, worker):
+                self.stats["rejected"] += 1
+                print(f"🚫 {node}: result for {number}/{year} rejected, lease #{lease_id} is no longer held")
+                return {"accepted": False}
+            now = time.time()
+            if status in mahakim_queue.DONE_STATES and rows:
+                # The store is keyed per row, so a result replayed after a coordinator crash is absorbed, not duplicated.
+                items = [mahakim_store.to_item(mahakim_writer.to_record(row), self.forms.get((station, year), ""), now) for row in rows]
+                mahakim_queue.transaction(self.store, lambda: self.store.executemany(mahakim_store.UPSERT, items))
+                self.stats["rows"] += len(items)
+            def save():
+                state = mahakim_queue.commit_leased(self.conn, station, year, number, status, len(rows), worker)
+                if state in mahakim_queue.DONE_STATES:
+                    self.conn.execute(
+                        "INSERT INTO deliveries (station, year, number, node, lease, status, rows, delivered_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (station, year, number, node, lease_id, state, len(rows), now))
+                return state
+            state = mahakim_queue.transaction(self.conn, save)
+            self.stats["accepted"] += 1
+            self.close_if_done(node, lease_id, station, year)
+            return {"accepted": True, "state": state}
+
+    def release(self, node, lease_id):
+        # A node giving up early (lost form, shutdown) hands its unfinished numbers back at once instead of waiting for expiry.
+        with self.lock:
+            row = self.conn.execute("SELECT station, year FROM leases WHERE id = ? AND node = ? AND closed_at IS NULL", (lease_id, node)).fetchone()
+            if row is None:
+                return {"released": 0}
+            released = self.conn.execute(
+                "UPDATE work SET state = 'pending', leased_by = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE station = ? AND year = ? AND state = 'in_progress' AND leased_by = ?",
+                (time.time(), row[0], row[1], token(node, lease_id))).rowcount
+            self.close_if_done(node, lease_id, row[0], row[1], "released")
+            self.stats["released"] += 1
+            return {"released": released}
+
+    def status(self):
+        with self.lock:
+            targets = {}
+            for station, year, state, count, _, _ in mahakim_queue.counts(self.conn):
+                targets.setdefault(f"{station} / {year}", {})[state] = count
+            open_leases = self.conn.execute("SELECT node, COUNT(*) FROM leases WHERE closed_at IS NULL GROUP BY node").fetchall()
+            outstanding = sum(mahakim_queue.outstanding(self.conn, t["station"], t["year"]) for t in self.targets)
+            return {"targets": targets, "open_leases": dict(open_leases), "outstanding": outstanding, "stats": dict(self.stats),
+                    "store_rows": mahakim_store.count(self.store)}
+
+class CoordinatorHandler(BaseHTTPRequestHandler):
+    coordinator = None
+
+    def send_json(self, payload, status=200):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/status":
+            self.send_json(self.coordinator.status())
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0) or 0)) or b"{}")
+        except ValueError:
+            # A node killed mid-request leaves a truncated body behind.
+            self.send_json({"error": "bad request"}, 400)
+            return
+        c = self.coordinator
+        if self.path == "/lease":
+            self.send_json(c.lease(body["node"]))
+        elif self.path == "/heartbeat":
+            self.send_json(c.heartbeat(body["node"], body["lease"]))
+        elif self.path == "/commit":
+            self.send_json(c.commit(body["node"], body["lease"], body["station"], body["year"], int(body["number"]), body["status"], body.get("rows") or []))
+        elif self.path == "/release":
+            self.send_json(c.release(body["node"], body["lease"]))
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_coordinator(coordinator, port=PORT, host="0.0.0.0", background=False):
+    handler = type("Coordinator", (CoordinatorHandler,), {"coordinator": coordinator})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"🛰️  Coordinator on http://{host}:{server.server_port} ({len(coordinator.targets)} targets, "
+          f"ranges of {coordinator.range_size}, {coordinator.lease_seconds:g}s leases)")
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        print(json.dumps(coordinator.status(), ensure_ascii=False, indent=1))
+
+def call(url, path, payload, timeout=30):
+    for attempt in range(1, CALL_RETRIES + 1):
+        try:
+            request = urllib.request.Request(url.rstrip("/") + path, data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                                             headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(request, timeout=timeout) as resp:
+                return json.loads(resp.read().decode("utf-8"))
+        except OSError as e:
+            if attempt == CALL_RETRIES:
+                raise
+            print(f"⚠️  Coordinator {path} attempt {attempt}: {e}")
+            time.sleep(attempt)
+
+def run_node(url, node, query, on_target=None, heartbeat_every=HEARTBEAT_EVERY):
+    # query(n, lease) -> (status, rows); on_target(lease) prepares the form before a lease's numbers are queried.
+    delivered = 0
+    while True:
+        lease = call(url, "/lease", {"node": node})
+        if not lease["numbers"]:
+            if lease.get("done"):
+                break
+            time.sleep(lease["wait"])
+            continue
+        lease_id = lease["lease"]
+        stop, lost = threading.Event(), threading.Event()
+        def beat():
+            while not stop.wait(min(heartbeat_every, lease["lease_seconds"] / 3)):
+                try:
+                    if not call(url, "/heartbeat", {"node": node, "lease": lease_id}, heartbeat_every).get("ok"):
+                        lost.set()
+                        return
+                except OSError as e:
+                    print(f"⚠️  {node}: heartbeat failed: {e}")
+        heart = threading.Thread(target=beat, daemon=True)
+        heart.start()
+        finished = False
+        try:
+            if on_target:
+                on_target(lease)
+            for n in lease["numbers"]:
+                if lost.is_set():
+                    break
+                status, rows = query(n, lease)
+                reply = call(url, "/commit", {"node": node, "lease": lease_id, "station": lease["station"], "year": lease["year"],
+                                              "number": n, "status": status, "rows": rows})
+                if not reply.get("accepted"):
+                    lost.set()
+                    break
+                delivered += 1
+            finished = not lost.is_set()
+        except Exception as e:
+            print(f"❌ {node}: lease #{lease_id} abandoned: {e}")
+        finally:
+            stop.set()
+            heart.join()
+            if lost.is_set():
+                print(f"♻️  {node}: lease #{lease_id} was lost, its numbers belong to another node now")
+            elif not finished:
+                call(url, "/release", {"node": node, "lease": lease_id})
+    print(f"🏁 {node}: {delivered} results delivered")
+    return delivered
+
+def simulated_node(url, node, density, heartbeat_every):
+    # Stands in for a browser: answers come from the fixture's deterministic cases after a short delay.
+    def query(n, lease):
+        time.sleep(random.uniform(0.005, 0.03))
+        rows = mahakim_fixture.case_rows(lease["station"], lease["year"], n, density)
+        for row in rows:
+            row.update(queried_numero=n, queried_annee=lease["year"])
+        return ("has_data" if rows else "no_results"), rows
+    run_node(url, node, query, heartbeat_every=heartbeat_every)
+
+def simulate(nodes=4, numbers=400, crash_rate=0.08, stall_rate=0.05, density=0.3, lease_seconds=1.5):
+    # Nodes are killed outright (lease left to expire) or suspended past their lease and resumed
+    # (a zombie that comes back with stale results); every second each node risks one of the two.
+    workdir = tempfile.mkdtemp(prefix="mahakim-coord-")
+    station, year = "SIM", "2025"
+    coordinator = Coordinator(os.path.join(workdir, "queue.sqlite"), os.path.join(workdir, "results.sqlite"),
+                              [{"station": station, "year": year, "start": 1, "end": numbers, "form": station}], range_size=10, lease_seconds=lease_seconds)
+    server = serve_coordinator(coordinator, 0, "127.0.0.1", background=True)
+    url = f"http://127.0.0.1:{server.server_port}"
+    ctx = mp.get_context("spawn")
+    procs, stalled = {}, {}
+    events = {"killed": 0, "stalled": 0}
+    started = time.time()
+    spawned = 0
+    try:
+        while True:
+            done = coordinator.status()["outstanding"] == 0
+            for name, p in list(procs.items()):
+                if not p.is_alive() and name not in stalled:
+                    del procs[name]
+            while not done and len(procs) < nodes:
+                spawned += 1
+                name = f"node-{spawned}"
+                procs[name] = ctx.Process(target=simulated_node, args=(url, name, density, lease_seconds / 4), daemon=True)
+                procs[name].start()
+            if done and not procs:
+                break
+            for name, resume_at in list(stalled.items()):
+                if time.time() >= resume_at:
+                    psutil.Process(procs[name].pid).resume()
+                    del stalled[name]
+            for name, p in list(procs.items()):
+                if done or name in stalled or not p.is_alive():
+                    continue
+                roll = random.random()
+                if roll < crash_rate * 0.25:
+                    p.kill()
+                    events["killed"] += 1
+                elif roll < (crash_rate + stall_rate) * 0.25:
+                    psutil.Process(p.pid).suspend()
+                    stalled[name] = time.time() + lease_seconds * 2.5
+                    events["stalled"] += 1
+            time.sleep(0.25)
+    finally:
+        for name in stalled:
+            psutil.Process(procs[name].pid).resume()
+        for p in procs.values():
+            p.join(timeout=5)
+            if p.is_alive():
+                p.kill()
+        server.shutdown()
+        server.server_close()
+    return check_simulation(coordinator, station, year, numbers, density, events, spawned, time.time() - started)
+
+def check_simulation(coordinator, station, year, numbers, density, events, spawned, elapsed):
+    conn, store = coordinator.conn, coordinator.store
+    states = dict(conn.execute("SELECT state, COUNT(*) FROM work WHERE station = ? AND year = ? GROUP BY state", (station, year)).fetchall())
+    delivered = conn.execute("SELECT COUNT(*), COUNT(DISTINCT number) FROM deliveries WHERE station = ? AND year = ?", (station, year)).fetchone()
+    expected_rows = [(row["case_number"], row["file_number"]) for n in range(1, numbers + 1) for row in mahakim_fixture.case_rows(station, year, n, density)]
+    expected = set(expected_rows)
+    stored = set(store.execute("SELECT case_number, file_number FROM results WHERE target = ?", (f"{station} / {year}",)).fetchall())
+    writes = store.execute("SELECT COALESCE(SUM(seen_count), 0) FROM results").fetchone()[0]
+    lost = numbers - sum(states.get(s, 0) for s in mahakim_queue.DONE_STATES)
+    report = {
+        "numbers": numbers,
+        "nodes_started": spawned,
+        "killed": events["killed"],
+        "stalled": events["stalled"],
+        "elapsed": round(elapsed, 1),
+        "states": states,
+        "lost": lost,
+        "delivered": delivered[0],
+        "delivered_twice": delivered[0] - delivered[1],
+        "accepted": coordinator.stats["accepted"],
+        "rejected_stale": coordinator.stats["rejected"],
+        "expired_leases": coordinator.stats["expired"],
+        "rows_expected": len(expected),
+        "rows_stored": len(stored),
+        "rows_missing": len(expected - stored),
+        # A case can list the same row twice, so writes are compared with every row the fixture returns.
+        "rows_written_twice": writes - len(expected_rows),
+    }
+    report["ok"] = (lost == 0 and delivered[0] == numbers and report["delivered_twice"] == 0 and report["accepted"] == numbers
+                    and stored == expected and report["rows_written_twice"] == 0)
+    print("\n=== Coordinator simulation ===")
+    print(f"🧪 {numbers} numbers, {spawned} node processes, {events['killed']} killed, {events['stalled']} stalled past their lease, {elapsed:.1f}s")
+    print(f"♻️  {report['expired_leases']} leases expired and were reassigned, {report['rejected_stale']} stale results rejected")
+    print(f"📦 {report['delivered']} numbers delivered ({report['delivered_twice']} twice, {lost} lost), "
+          f"{report['rows_stored']}/{report['rows_expected']} rows in the store ({report['rows_written_twice']} written twice)")
+    print("✅ No number lost or scraped twice" if report["ok"] else "❌ Simulation found lost or duplicated work")
+    return report
+
+USAGE = """Usage: python mahakim_coordinator.py <command> ...
+  status <url>                                    print a running coordinator's state
+  simulate [nodes] [numbers] [crash rate] [stall rate]   local crash test, exit code 1 on lost/duplicated work
+Serving and joining go through mahakim_cli.py coordinator / node."""
+
+if __name__ == "__main__":
+    args = sys.argv[2:]
+    if len(sys.argv) > 2 and sys.argv[1] == "status":
+        with urllib.request.urlopen(args[0].rstrip("/") + "/status", timeout=30) as resp:
+            print(json.dumps(json.loads(resp.read().decode("utf-8")), ensure_ascii=False, indent=1))
+    elif len(sys.argv) > 1 and sys.argv[1] == "simulate":
+        report = simulate(int(args[0]) if len(args) > 0 else 4,
+                          int(args[1]) if len(args) > 1 else 400,
+                          float(args[2]) if len(args) > 2 else 0.08,
+                          float(args[3]) if len(args) > 3 else 0.05)
+        sys.exit(0 if report["ok"] else 1)
+    else:
+        print(USAGE)
+        sys.exit(1)
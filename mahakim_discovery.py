@@ -0,0 +1,112 @@
+# mahakim_discovery.py
+# Dead-range detection: gallop/binary-probe for the highest populated number, stop after K
+# consecutive no_results (with a verification pass), and report how many queries were saved.
+# Probes walk positions in the sorted list of numbers still to do, so finished numbers are never re-queried
+import mahakim_metrics
+
+WINDOW = 5
+EMPTY = ("no_results",)
+
+def populated(status):
+    # loading/unknown answers are not proof of an empty number, so they keep the range open.
+    return status not in EMPTY
+
+class Prober:
+    def __init__(self, query, numbers, window=WINDOW):
+        self.query = query
+        self.numbers = numbers
+        self.window = window
+        self.known = {}
+        self.queries = 0
+
+    def status(self, i):
+        n = self.numbers[i]
+        if n not in self.known:
+            self.known[n] = self.query(n)
+            self.queries += 1
+        return self.known[n][0]
+
+    def window_hit(self, i, hi):
+        # One missing number is common; a whole window of them marks the end of the range.
+        for j in range(i, min(i + self.window, hi + 1)):
+            if populated(self.status(j)):
+                return j
+        return None
+
+def find_highest(prober, lo, hi):
+    highest = lo - 1
+    x = lo
+    step = 1
+    while x <= hi:
+        hit = prober.window_hit(x, hi)
+        if hit is None:
+            break
+        highest = max(highest, hit)
+        x = hit + step
+        step *= 2
+    miss = min(x, hi + 1)
+    while miss - highest > 1:
+        mid = (highest + miss) // 2
+        hit = prober.window_hit(mid, hi)
+        if hit is None:
+            miss = mid
+        else:
+            highest = max(highest, hit)
+    numbers = prober.numbers
+    print(f"🧭 Highest populated number in {numbers[lo]}..{numbers[hi]}: {numbers[highest] if highest >= lo else 'none'} ({prober.queries} probes)")
+    return highest
+
+def verify_dead(prober, i, hi, stop_after):
+    # Look a few strides past the empty run before giving up on the rest of the range.
+    for offset in (stop_after, 2 * stop_after, 4 * stop_after):
+        j = i + offset
+        if j > hi:
+            break
+        hit = prober.window_hit(j, hi)
+        if hit is not None:
+            print(f"🔁 Verification found data at {prober.numbers[hit]}, continuing sweep")
+            return False
+    return True
+
+def run_sweep(query, numbers, on_result, discover=False, stop_after=0, on_skip=None, window=WINDOW):
+    numbers = sorted(numbers)
+    if not numbers:
+        return 0
+    start_n = numbers[0]
+    prober = Prober(query, numbers, window)
+    # find_highest and verify_dead work on positions in numbers, not on the numbers themselves.
+    sweep_end = find_highest(prober, 0, len(numbers) - 1) if discover else len(numbers) - 1
+    empty_run = 0
+    swept = 0
+    last = start_n - 1
+    for i, n in enumerate(numbers):
+        if i > sweep_end:
+            break
+        if n in prober.known:
+            status, rows = prober.known.pop(n)
+        else:
+            status, rows = query(n)
+            prober.queries += 1
+        on_result(n, status, rows)
+        swept += 1
+        last = n
+        empty_run = 0 if populated(status) else empty_run + 1
+        if stop_after and empty_run >= stop_after and verify_dead(prober, i, sweep_end, stop_after):
+            print(f"🛑 {empty_run} consecutive no_results up to {n}, stopping early")
+            break
+    if discover or stop_after:
+        ruled_out = []
+        for n in numbers[swept:]:
+            # Probed numbers past the cut were queried for real; the rest are ruled out.
+            if n in prober.known:
+                status, rows = prober.known.pop(n)
+                on_result(n, status, rows)
+            else:
+                ruled_out.append(n)
+        mahakim_metrics.count("skipped", len(ruled_out))
+        if on_skip:
+            on_skip(ruled_out)
+        total = len(numbers)
+        saved = total - prober.queries
+        print(f"📉 Swept {start_n}..{last} with {prober.queries} queries instead of {total} ({saved} saved, {saved / total * 100 if total else 0:.0f}%)")
+    return prober.queries
@@ -0,0 +1,401 @@
+# mahakim_enrich.py
+# "More info" enrichment: found rows queue up in SQLite, several browser sessions open their detail
+# views (hearings, rulings, parties) in parallel, and details are cached by case/file number across runs
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+import mahakim_queue
+import mahakim_campaign
+import mahakim_extract
+import mahakim_health
+import mahakim_metrics
+import mahakim_waits
+import mahakim_writer
+
+STATES = ("pending", "in_progress", "done", "failed", "skipped")
+MAX_ATTEMPTS = 3
+LEASE_SECONDS = 600
+IDLE_POLL = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS details (
+    case_number TEXT NOT NULL,
+    file_number TEXT NOT NULL,
+    target TEXT NOT NULL,
+    year TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    leased_by TEXT,
+    lease_until REAL,
+    details TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (case_number, file_number)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS details_state ON details (state, target, year, number);
+"""
+
+# Clicks the control in the sixth cell of the row matching both numbers on the current page.
+OPEN_DETAIL_JS = """
+var caseNumber = arguments[0], fileNumber = arguments[1], tableId = arguments[2];
+var known = document.getElementById(tableId);
+var tables = known ? [known] : document.getElementsByTagName('table');
+for (var t = 0; t < tables.length; t++) {
+    var trs = tables[t].querySelectorAll('tr');
+    for (var i = 0; i < trs.length; i++) {
+        var tds = trs[i].querySelectorAll('td');
+        if (tds.length !== 6) continue;
+        if ((tds[0].innerText || '').trim() !== caseNumber || (tds[4].innerText || '').trim() !== fileNumber) continue;
+        var control = tds[5].querySelector('button, a, [role=button], .p-button, i') || tds[5];
+        control.click();
+        return 'opened';
+    }
+}
+return 'missing';
+"""
+
+DETAIL_READY = """(function () {
+    var d = document.querySelector('.p-dialog .p-dialog-content');
+    var t = d ? (d.innerText || '').trim() : '';
+    return t.length > 0 && t.indexOf('جاري') === -1;
+})()"""
+DETAIL_CLOSED = "document.querySelector('.p-dialog') === null"
+
+# Label/value pairs, every table under its nearest heading, and the raw text so nothing is lost
+# when the layout does not match either pattern.
+READ_DETAIL_JS = """
+var box = document.querySelector('.p-dialog');
+if (!box) return null;
+function text(el) { return el ? (el.innerText || '').trim() : ''; }
+var content = box.querySelector('.p-dialog-content') || box;
+var fields = {};
+var dts = content.querySelectorAll('dt');
+for (var i = 0; i < dts.length; i++) {
+    var dd = dts[i].nextElementSibling;
+    if (dd && dd.tagName === 'DD') fields[text(dts[i])] = text(dd);
+}
+var labels = content.querySelectorAll('label, .label, strong, b');
+for (var i = 0; i < labels.length; i++) {
+    if (labels[i].closest('table')) continue;
+    var key = text(labels[i]).replace(/\\s*:\\s*$/, '');
+    var value = labels[i].nextElementSibling ? text(labels[i].nextElementSibling) : text(labels[i].parentElement).slice(text(labels[i]).length).trim();
+    if (key && value && !(key in fields)) fields[key] = value;
+}
+function heading(el) {
+    for (var node = el; node && node !== content; node = node.parentElement) {
+        for (var prev = node.previousElementSibling; prev; prev = prev.previousElementSibling) {
+            if (/^H[1-6]$/.test(prev.tagName) || prev.matches('legend, .p-panel-title, .p-fieldset-legend')) return text(prev);
+        }
+    }
+    return '';
+}
+var tables = [];
+var ts = content.querySelectorAll('table');
+for (var i = 0; i < ts.length; i++) {
+    var headers = [], rows = [];
+    var ths = ts[i].querySelectorAll('thead th');
+    for (var j = 0; j < ths.length; j++) headers.push(text(ths[j]));
+    var trs = ts[i].querySelectorAll('tbody tr');
+    for (var j = 0; j < trs.length; j++) {
+        var cells = [];
+        var tds = trs[j].querySelectorAll('td');
+        for (var k = 0; k < tds.length; k++) cells.push(text(tds[k]));
+        if (cells.length) rows.push(cells);
+    }
+    tables.push({title: heading(ts[i]), headers: headers, rows: rows});
+}
+return {title: text(box.querySelector('.p-dialog-title')), fields: fields, tables: tables, text: text(content)};
+"""
+
+CLOSE_DETAIL_JS = """
+var close = document.querySelector('.p-dialog .p-dialog-header-close');
+if (close) { close.click(); return true; }
+document.dispatchEvent(new KeyboardEvent('keydown', {key: 'Escape', bubbles: true}));
+return false;
+"""
+
+def open_details(path):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def details_path(output_xlsx):
+    return os.path.splitext(output_xlsx)[0] + ".details.jsonl"
+
+def enqueue(conn, rows, form=""):
+    # A row already in the cache, done or not, is ignored, so later runs only add new cases.
+    now = time.time()
+    items = [(row["case_number"], row.get("file_number", ""), mahakim_writer.target_of(row, form), str(row.get("queried_annee", "")), int(row["queried_numero"]), now, now)
+             for row in rows if row.get("case_number") and str(row.get("queried_numero", "")).isdigit()]
+    if not items:
+        return 0
+    cur = conn.executemany(
+        "INSERT OR IGNORE INTO details (case_number, file_number, target, year, number, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        items)
+    if len(items) > cur.rowcount:
+        mahakim_metrics.count("details_cached", len(items) - cur.rowcount)
+    return cur.rowcount
+
+def enqueue_shards(conn, output_xlsx, form=""):
+    added = 0
+    for path in mahakim_writer.list_shards(mahakim_writer.shard_dir(output_xlsx)):
+        rows = [dict(zip(mahakim_writer.FIELDS, (str(v) for v in record))) for record in mahakim_writer.read_shard(path)]
+        added += enqueue(conn, rows, form)
+    return added
+
+def recover(conn, worker_prefix="enrich"):
+    cur = conn.execute(
+        "UPDATE details SET state = 'pending', leased_by = NULL, lease_until = NULL WHERE state = 'in_progress' AND leased_by LIKE ?",
+        (worker_prefix + "%",))
+    return cur.rowcount
+
+def requeue_failed(conn):
+    cur = conn.execute("UPDATE details SET state = 'pending', attempts = 0, updated_at = ? WHERE state IN ('failed', 'skipped')", (time.time(),))
+    return cur.rowcount
+
+def lease(conn, worker, current=None, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+    # Every row of one queried number comes out together, so a single search serves all of them,
+    # and numbers under the form the session already shows are preferred.
+    target, year = current or ("", "")
+    ready = "(state = 'pending' OR (state = 'in_progress' AND lease_until < ?)) AND attempts < ?"
+    def take():
+        now = time.time()
+        group = conn.execute(
+            f"SELECT target, year, number FROM details WHERE {ready} "
+            "ORDER BY CASE WHEN target = ? AND year = ? THEN 0 ELSE 1 END, target, year, number LIMIT 1",
+            (now, max_attempts, target, year)).fetchone()
+        if group is None:
+            return None, []
+        items = conn.execute(
+            f"SELECT case_number, file_number FROM details WHERE target = ? AND year = ? AND number = ? AND {ready}",
+            group + (now, max_attempts)).fetchall()
+        conn.executemany(
+            "UPDATE details SET state = 'in_progress', leased_by = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? WHERE case_number = ? AND file_number = ?",
+            ((worker, now + lease_seconds, now, c, f) for c, f in items))
+        return group, items
+    return mahakim_queue.transaction(conn, take)
+
+def commit(conn, case_number, file_number, details, max_attempts=MAX_ATTEMPTS):
+    # A miss goes back to pending until its attempts run out.
+    if details is not None:
+        conn.execute(
+            "UPDATE details SET state = 'done', details = ?, leased_by = NULL, lease_until = NULL, updated_at = ? WHERE case_number = ? AND file_number = ?",
+            (json.dumps(details, ensure_ascii=False), time.time(), case_number, file_number))
+        return "done"
+    conn.execute(
+        "UPDATE details SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, leased_by = NULL, lease_until = NULL, updated_at = ? "
+        "WHERE case_number = ? AND file_number = ?",
+        (max_attempts, time.time(), case_number, file_number))
+    return "failed"
+
+def skip_target(conn, target, year):
+    # Rows whose form cannot be set up are put aside instead of burning their attempts on it.
+    cur = conn.execute(
+        "UPDATE details SET state = 'skipped', leased_by = NULL, lease_until = NULL, updated_at = ? "
+        "WHERE target = ? AND year = ? AND state IN ('pending', 'in_progress')",
+        (time.time(), target, year))
+    return cur.rowcount
+
+def pending(conn, max_attempts=MAX_ATTEMPTS):
+    return conn.execute(
+        "SELECT COUNT(*) FROM details WHERE state IN ('pending', 'in_progress') AND attempts < ?", (max_attempts,)).fetchone()[0]
+
+def get_details(conn, case_number, file_number):
+    row = conn.execute("SELECT details FROM details WHERE case_number = ? AND file_number = ? AND state = 'done'", (case_number, file_number)).fetchone()
+    return json.loads(row[0]) if row else None
+
+def export_details(conn, path):
+    tmp = path + ".tmp"
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        for case_number, file_number, target, year, number, details in conn.execute(
+                "SELECT case_number, file_number, target, year, number, details FROM details WHERE state = 'done' ORDER BY target, year, number"):
+            f.write(json.dumps({"case_number": case_number, "file_number": file_number, "target": target, "year": year,
+                                "queried_numero": number, "details": json.loads(details)}, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(tmp, path)
+    print(f"📑 Exported {count} case details to {path}")
+    return count
+
+def print_status(conn):
+    states = dict(conn.execute("SELECT state, COUNT(*) FROM details GROUP BY state").fetchall())
+    total = sum(states.values())
+    others = ", ".join(f"{s} {states[s]}" for s in STATES if s in states and s != "done")
+    print(f"📑 Details: {states.get('done', 0)}/{total} cached{', ' + others if others else ''}")
+
+def show_largest_page(driver):
+    info = driver.execute_script(mahakim_extract.PAGINATOR_JS, True) or {}
+    if info.get("next") and info.get("size_dropdown"):
+        mahakim_extract.largest_page_size(driver, info["size_dropdown"], info.get("size", 0))
+
+def open_detail(driver, case_number, file_number, max_pages=mahakim_extract.MAX_PAGES):
+    for _ in range(max_pages):
+        if driver.execute_script(OPEN_DETAIL_JS, case_number, file_number, mahakim_extract.TABLE_ID) == "opened":
+            return True
+        info = driver.execute_script(mahakim_extract.PAGINATOR_JS, True) or {}
+        if not info.get("next"):
+            return False
+        before = mahakim_extract.table_signature(driver)
+        driver.execute_script(mahakim_extract.NEXT_PAGE_JS)
+        if not mahakim_extract.wait_table_change(driver, "detail next page", before):
+            return False
+    return False
+
+def read_detail(driver):
+    if not mahakim_waits.wait_for(driver, "detail open", DETAIL_READY, 15):
+        return None
+    details = driver.execute_script(READ_DETAIL_JS)
+    driver.execute_script(CLOSE_DETAIL_JS)
+    mahakim_waits.wait_for(driver, "detail close", DETAIL_CLOSED, 10)
+    return details
+
+class Enricher:
+    # Each worker thread owns one browser; the sweep keeps running while they drain the queue.
+    def __init__(self, db_path, workers, start, setup_for, search, make_throttle, form="", max_queries=mahakim_health.MAX_QUERIES):
+        self.db_path = db_path
+        self.start = start
+        self.setup_for = setup_for
+        self.search = search
+        self.make_throttle = make_throttle
+        self.form = form
+        self.max_queries = max_queries
+        self.conn = open_details(db_path)
+        self.stopping = threading.Event()
+        self.stats = {"done": 0, "failed": 0, "skipped": 0, "searches": 0}
+        self.lock = threading.Lock()
+        recovered = recover(self.conn)
+        print(f"📑 Enrichment with {workers} sessions, cache {db_path} ({recovered} interrupted leases recovered)")
+        print_status(self.conn)
+        self.threads = [threading.Thread(target=self.work, args=(i,), daemon=True) for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def enqueue(self, rows):
+        enqueue(self.conn, rows, self.form)
+
+    def tally(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def work(self, worker_id):
+        name = f"enrich-{worker_id}"
+        conn = open_details(self.db_path)
+        throttle = self.make_throttle(name)
+        session = None
+        current = None
+        try:
+            while True:
+                group, items = lease(conn, name, current)
+                if not items:
+                    # Stop only once the sweep is over and nothing is left to lease.
+                    if self.stopping.is_set() and not pending(conn):
+                        break
+                    time.sleep(IDLE_POLL)
+                    continue
+                try:
+                    retarget = group[:2] != current
+                    if retarget:
+                        setup = self.setup_for(*group[:2])
+                        if setup is None:
+                            skipped = skip_target(conn, *group[:2])
+                            with self.lock:
+                                self.stats["skipped"] += skipped
+                            print(f"⏭️ [{name}] {group[0]} is not in the catalogue, {skipped} rows skipped")
+                            continue
+                    # The browser starts with the first leased row, so an idle enricher costs nothing.
+                    if session is None:
+                        session = mahakim_health.Supervisor(name, self.start, lambda driver: None, self.max_queries)
+                    if retarget:
+                        current = None
+                        setup(session.driver)
+                        session.retarget(setup)
+                        current = group[:2]
+                except Exception as e:
+                    print(f"❌ [{name}] Could not open the form for {group[0]} / {group[1]}: {e}")
+                    for case_number, file_number in items:
+                        commit(conn, case_number, file_number, None)
+                    continue
+                self.enrich_number(session, conn, throttle, group, items)
+        finally:
+            if session:
+                session.close()
+            conn.close()
+
+    def enrich_number(self, session, conn, throttle, group, items):
+        target, year, number = group
+        started = time.time()
+        found = 0
+        try:
+            throttle.wait()
+            driver = session.driver
+            self.search(driver, number, year)
+            self.tally("searches")
+            show_largest_page(driver)
+        except Exception as e:
+            print(f"❌ [DETAIL] {number}/{year}: search failed ({e})")
+            for case_number, file_number in items:
+                commit(conn, case_number, file_number, None)
+            throttle.record("error", error=True)
+            session.record("error", error=True)
+            return
+        for case_number, file_number in items:
+            item_started = time.time()
+            details = None
+            try:
+                opened = open_detail(driver, case_number, file_number)
+                if not opened:
+                    # The row may sit on a page already walked past; a fresh search starts from page one.
+                    self.search(driver, number, year)
+                    show_largest_page(driver)
+                    opened = open_detail(driver, case_number, file_number)
+                if opened:
+                    details = read_detail(driver)
+            except Exception as e:
+                print(f"  ⚠️  Detail {case_number} ({file_number}) failed: {e}")
+            state = commit(conn, case_number, file_number, details)
+            mahakim_metrics.record("detail", time.time() - item_started, ok=details is not None)
+            mahakim_metrics.count(f"details_{state}")
+            self.tally(state)
+            if details is not None:
+                found += 1
+        status = "has_data" if found else "error"
+        throttle.record(status, time.time() - started, error=not found)
+        session.record(status, time.time() - started, error=not found)
+        print(f"📑 [DETAIL] {number}/{year}: {found}/{len(items)} detail views read")
+
+    def finish(self, export_path=None):
+        # Called once the sweep is done: workers drain what is left, then stop.
+        left = pending(self.conn)
+        if left:
+            print(f"📑 Waiting for {left} pending case details")
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join()
+        s = self.stats
+        print(f"📑 Enrichment: {s['done']} details read, {s['failed']} misses, {s['skipped']} skipped, {s['searches']} searches")
+        print_status(self.conn)
+        if export_path:
+            export_details(self.conn, export_path)
+        self.conn.close()
+
+def run_afterwards(script, workers=None, retry_failed=False):
+    # Afterwards mode: rows already in the result shards are queued, then the workers drain them.
+    enricher = script.start_enricher(workers or max(1, script.ENRICH_WORKERS))
+    if retry_failed:
+        print(f"📑 {requeue_failed(enricher.conn)} failed or skipped details requeued")
+    print(f"📑 {enqueue_shards(enricher.conn, script.OUTPUT_XLSX, mahakim_campaign.store_form())} new rows queued from {mahakim_writer.shard_dir(script.OUTPUT_XLSX)}")
+    enricher.finish(details_path(script.OUTPUT_XLSX))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print('Usage: python mahakim_enrich.py "Mahakim Beta.py" [sessions] [--retry-failed]')
+        sys.exit(1)
+    script = mahakim_extract.load_script(sys.argv[1])
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2].isdigit() else None
+    run_afterwards(script, workers, "--retry-failed" in sys.argv)
@@ -0,0 +1,243 @@
+# mahakim_extract.py
+# Single round-trip result detection: one execute_script classifies the page and returns the rows,
+# plus paginated results: largest page size, every page walked, rows deduplicated
+import sys
+import json
+import time
+import statistics
+import importlib.util
+import mahakim_metrics
+import mahakim_waits
+import mahakim_catalogue
+import mahakim_config
+
+NO_RESULTS_TEXT = "لا توجد أية نتيجة للبحث"
+TABLE_ID = "pr_id_16-table"
+ROW_FIELDS = ["case_number", "action", "type", "subject", "file_number", "more_info"]
+MAX_PAGES = 50
+
+# Same probe order as robust_table_detection: no-results message, the known table id,
+# any visible table, a "n/code/year" text, then a loading text.
+EXTRACT_JS = """
+var year = String(arguments[0]), noResults = arguments[1], tableId = arguments[2];
+function visible(el) {
+    if (!el || !el.getClientRects().length) return false;
+    var s = window.getComputedStyle(el);
+    return s.visibility !== 'hidden' && s.display !== 'none';
+}
+function parse(table) {
+    var out = [];
+    var trs = table.querySelectorAll('tr');
+    for (var i = 0; i < trs.length; i++) {
+        if (!visible(trs[i])) continue;
+        var tds = trs[i].querySelectorAll('td');
+        if (tds.length !== 6) continue;
+        var cells = [], spanned = false;
+        for (var j = 0; j < tds.length; j++) {
+            if (tds[j].getAttribute('colspan')) { spanned = true; break; }
+            cells.push((tds[j].innerText || '').trim());
+        }
+        if (!spanned && cells[0] && cells[0].indexOf('/') !== -1) out.push(cells);
+    }
+    return out;
+}
+function ownText(el) {
+    for (var c = el.firstChild; c; c = c.nextSibling) {
+        if (c.nodeType === 3) return c.nodeValue;
+    }
+    return '';
+}
+var ps = document.getElementsByTagName('p');
+for (var i = 0; i < ps.length; i++) {
+    if (ownText(ps[i]).indexOf(noResults) !== -1 && visible(ps[i])) return {status: 'no_results', rows: []};
+}
+var known = document.getElementById(tableId);
+if (known && visible(known)) {
+    var rows = parse(known);
+    if (rows.length) return {status: 'has_data', rows: rows};
+}
+var tables = document.getElementsByTagName('table');
+for (var i = 0; i < tables.length; i++) {
+    if (!visible(tables[i])) continue;
+    var rows = parse(tables[i]);
+    if (rows.length) return {status: 'has_data', rows: rows};
+}
+var all = document.body ? document.body.getElementsByTagName('*') : [];
+var loading = false;
+for (var i = 0; i < all.length; i++) {
+    var t = ownText(all[i]);
+    if (!t) continue;
+    if (t.indexOf('/') !== -1 && t.indexOf(year) !== -1) return {status: 'possible_data', rows: []};
+    if (t.indexOf('جاري') !== -1 || t.indexOf('تحميل') !== -1 || t.indexOf('loading') !== -1) loading = true;
+}
+return {status: loading ? 'loading' : 'unknown', rows: []};
+"""
+
+def extract_results(driver, case_number, year):
+    print(f"\n Checking for data in case {case_number}...")
+    try:
+        result = driver.execute_script(EXTRACT_JS, str(year), NO_RESULTS_TEXT, TABLE_ID) or {}
+    except Exception as e:
+        print(f"  ⚠️  Extractor failed: {e}")
+        return "unknown", []
+    return read_result(result, case_number, year)
+
+def read_result(result, case_number, year):
+    data_rows = []
+    with mahakim_metrics.timed("parse"):
+        for cells in result.get("rows") or []:
+            row_data = dict(zip(ROW_FIELDS, cells))
+            row_data["queried_numero"] = case_number
+            row_data["queried_annee"] = year
+            data_rows.append(row_data)
+    return result.get("status", "unknown"), data_rows
+
+# arguments[0] true returns the page size dropdown itself (Selenium clicks it), otherwise only whether
+# there is one: Playwright cannot hand an element back from evaluate and finds the dropdown by locator.
+PAGINATOR_JS = """
+var withElement = arguments[0] === true;
+var pag = document.querySelector('.p-paginator');
+if (!pag) return {present: false};
+var next = pag.querySelector('.p-paginator-next');
+var size = pag.querySelector('.p-dropdown');
+var label = size ? size.querySelector('.p-dropdown-label') : null;
+return {
+    present: true,
+    next: !!next && !next.disabled && !next.classList.contains('p-disabled'),
+    size: label ? parseInt((label.innerText || '').trim(), 10) || 0 : 0,
+    size_dropdown: withElement ? size : !!size
+};
+"""
+
+NEXT_PAGE_JS = "var next = document.querySelector('.p-paginator .p-paginator-next'); if (next) next.click();"
+
+# Rows on the page, highlighted page and page size: a change in any of them means the table re-rendered.
+SIGNATURE_JS = """(function () {
+    var t = document.getElementById('%s');
+    if (!t) return '';
+    var trs = t.querySelectorAll('tbody tr');
+    var page = document.querySelector('.p-paginator .p-paginator-page.p-highlight');
+    var size = document.querySelector('.p-paginator .p-dropdown-label');
+    return [trs.length, trs.length ? trs[0].innerText : '', page ? page.innerText : '', size ? size.innerText : ''].join('|');
+})()""" % TABLE_ID
+
+def table_signature(driver):
+    return driver.execute_script("return " + SIGNATURE_JS)
+
+def wait_table_change(driver, step, before, timeout=10):
+    return mahakim_waits.wait_for(driver, step, f"{SIGNATURE_JS} !== {json.dumps(before)}", timeout)
+
+def largest_page_size(driver, box, current):
+    before = table_signature(driver)
+    driver.execute_script("arguments[0].click();", box)
+    mahakim_waits.wait_for(driver, "page size open", mahakim_waits.PANEL_OPEN, 10)
+    options = driver.execute_script(mahakim_catalogue.READ_OPTIONS_JS) or []
+    sizes = [int(t) for t in options if t.isdigit()]
+    if not sizes or max(sizes) <= current:
+        driver.execute_script("arguments[0].click();", box)
+        mahakim_waits.wait_for(driver, "page size close", mahakim_waits.PANEL_CLOSED, 10)
+        return False
+    largest = str(max(sizes))
+    driver.execute_script(mahakim_catalogue.PICK_OPTION_JS, largest, options.index(largest))
+    return wait_table_change(driver, "page size", before)
+
+def row_key(row):
+    return tuple(row.get(field, "") for field in ROW_FIELDS)
+
+def collect_pages(driver, first_rows, read_rows, max_pages=MAX_PAGES):
+    # read_rows re-reads the rows on the current page; pages counts every page load, the first included.
+    started = time.time()
+    info = driver.execute_script(PAGINATOR_JS, True) or {}
+    if not info.get("next"):
+        return dedupe_pages(first_rows, 1, started)
+    rows = list(first_rows)
+    pages = 1
+    if info.get("size_dropdown") and largest_page_size(driver, info["size_dropdown"], info.get("size", 0)):
+        rows = read_rows()
+        pages += 1
+        info = driver.execute_script(PAGINATOR_JS, True) or {}
+    while info.get("next") and pages < max_pages:
+        before = table_signature(driver)
+        driver.execute_script(NEXT_PAGE_JS)
+        if not wait_table_change(driver, "next page", before):
+            break
+        rows += read_rows()
+        pages += 1
+        info = driver.execute_script(PAGINATOR_JS, True) or {}
+    return dedupe_pages(rows, pages, started)
+
+def dedupe_pages(rows, pages, started):
+    unique = []
+    seen = set()
+    for row in rows:
+        key = row_key(row)
+        if key not in seen:
+            seen.add(key)
+            unique.append(row)
+    mahakim_metrics.count("pages", pages)
+    # Recorded for single-page results too, so the pages per query distribution covers every hit.
+    mahakim_metrics.record("paginate", time.time() - started, pages=pages, rows=len(unique), duplicates=len(rows) - len(unique))
+    if pages > 1:
+        print(f"📄 {pages} pages fetched, {len(unique)} rows ({len(rows) - len(unique)} duplicates dropped)")
+    return unique, pages
+
+def load_script(path):
+    # The launcher scripts only name a profile, so they resolve to mahakim_scraper configured with it;
+    # a bare profile name ("alfa", "beta") works as well.
+    profile = path
+    if path not in mahakim_config.PROFILES:
+        spec = importlib.util.spec_from_file_location("mahakim_script", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        if not hasattr(module, "PROFILE"):
+            return module
+        profile = module.PROFILE
+    import mahakim_scraper
+    mahakim_scraper.configure(profile)
+    return mahakim_scraper
+
+def timed(fn, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return samples, result
+
+def bench_detection(script_path, numbers, runs=5):
+    # Both detectors run against the same rendered page, so only detection cost differs.
+    script = load_script(script_path)
+    driver = script.init_driver()
+    legacy_all, js_all = [], []
+    mismatches = 0
+    try:
+        script.setup_filters(driver)
+        for n in numbers:
+            script.fill_case_details(driver, n, script.YEAR)
+            legacy, legacy_result = timed(lambda: script.robust_table_detection(driver, n), runs)
+            js, js_result = timed(lambda: extract_results(driver, n, script.YEAR), runs)
+            legacy_all += legacy
+            js_all += js
+            same = legacy_result[0] == js_result[0] and len(legacy_result[1]) == len(js_result[1])
+            if not same:
+                mismatches += 1
+            print(f"⏱️  {n}: legacy {statistics.median(legacy) * 1000:.1f} ms ({legacy_result[0]}), js {statistics.median(js) * 1000:.1f} ms ({js_result[0]}){'' if same else ' ⚠️  MISMATCH'}")
+    finally:
+        driver.quit()
+    if not js_all:
+        return
+    legacy_p50 = statistics.median(legacy_all) * 1000
+    js_p50 = statistics.median(js_all) * 1000
+    print("\n=== Detection benchmark ===")
+    print(f"legacy robust_table_detection: p50 {legacy_p50:.1f} ms, mean {statistics.mean(legacy_all) * 1000:.1f} ms")
+    print(f"js extract_results:            p50 {js_p50:.1f} ms, mean {statistics.mean(js_all) * 1000:.1f} ms")
+    print(f"speedup: {legacy_p50 / js_p50 if js_p50 else 0:.1f}x, status mismatches: {mismatches}/{len(numbers)}")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print('Usage: python mahakim_extract.py "Mahakim Beta.py" <first number> [last number] [runs]')
+        sys.exit(1)
+    first = int(sys.argv[2])
+    last = int(sys.argv[3]) if len(sys.argv) > 3 else first + 9
+    bench_detection(sys.argv[1], range(first, last + 1), int(sys.argv[4]) if len(sys.argv) > 4 else 5)
@@ -0,0 +1,380 @@
+# mahakim_fixture.py
+# Offline fixture site mimicking the mahakim.ma PrimeNG search form (dropdowns, checkbox,
+# three-inputs, pr_id_16-table with paginator, "more info" detail dialog, no-results message,
+# loading state) with configurable latency, error rate and hit density, for tests and benchmarks
+# without the live site
+import sys
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+TREE = {
+    "محكمة الاستئناف بمراكش": {
+        "المحكمة الابتدائية بمراكش": {
+            "الدرك الملكي": ["قائد مركز الدرك الملكي بايت اورير", "قائد مركز الدرك الملكي بتحناوت", "قائد مركز الدرك الملكي بسيدي الزوين"],
+            "الشرطة القضائية": ["الشرطة القضائية بمراكش"],
+            "الامن الوطني": ["الدائرة الأمنية الأولى بمراكش", "الدائرة الأمنية الثانية بمراكش"],
+        },
+        "المحكمة الابتدائية بقلعة السراغنة": {
+            "الدرك الملكي": ["قائد مركز الدرك الملكي بقلعة السراغنة"],
+        },
+    },
+    "محكمة الاستئناف بالرباط": {
+        "المحكمة الابتدائية بالرباط": {
+            "الامن الوطني": ["الدائرة الأمنية الأولى بالرباط"],
+        },
+    },
+}
+ACTIONS = ["إحالة على النيابة العامة", "حفظ", "متابعة"]
+TYPES = ["محضر جنحي", "محضر مخالفة"]
+SUBJECTS = ["السرقة", "الضرب والجرح", "حادثة سير", "النصب"]
+PAGE_SIZES = [10, 25, 50]
+RULINGS = ["البراءة", "الإدانة", "عدم الاختصاص", "في طور المداولة"]
+ROLES = ["مشتكي", "مشتكى به", "مطالب بالحق المدني"]
+
+def case_rows(station, year, n, density=0.3, last=None):
+    # Deterministic per (station, year, number), so a benchmark can check what was found.
+    if last is not None and n > last:
+        return []
+    r = random.Random(f"{station}|{year}|{n}")
+    if r.random() >= density:
+        return []
+    rows = []
+    # A few numbers return more rows than fit on one page, so pagination gets exercised.
+    extra = r.random()
+    count = r.randint(11, 60) if extra < 0.05 else 2 if extra < 0.2 else 1
+    for i in range(count):
+        rows.append({
+            "case_number": f"{n}/2101/{year}",
+            "action": r.choice(ACTIONS),
+            "type": r.choice(TYPES),
+            "subject": r.choice(SUBJECTS),
+            "file_number": f"{r.randint(1, 9000)}/2103/{year}",
+            "more_info": "تفاصيل",
+        })
+    return rows
+
+def case_details(case_number, file_number):
+    r = random.Random(f"{case_number}|{file_number}")
+    hearings = [[f"2025-{r.randint(1, 12):02d}-{r.randint(1, 28):02d}", r.choice(["تأخير", "مداولة", "حكم"])] for _ in range(r.randint(1, 4))]
+    parties = [[f"طرف {i + 1}", r.choice(ROLES)] for i in range(r.randint(1, 3))]
+    return {"case_number": case_number, "file_number": file_number, "judge": f"القاضي {r.randint(1, 40)}",
+            "ruling": r.choice(RULINGS), "hearings": hearings, "parties": parties}
+
+PAGE = """<!DOCTYPE html>
+<html lang="ar" dir="rtl"><head><meta charset="utf-8"><title>mahakim fixture</title>
+<style>
+body { font-family: sans-serif; }
+.p-dropdown { display: inline-block; min-width: 260px; border: 1px solid #999; padding: 4px; margin: 4px; cursor: pointer; }
+.p-placeholder { color: #888; }
+.p-dropdown-panel { position: absolute; background: #fff; border: 1px solid #333; z-index: 10; }
+.p-dropdown-item { padding: 3px 8px; cursor: pointer; }
+.p-checkbox-box { display: inline-block; width: 16px; height: 16px; border: 1px solid #333; cursor: pointer; }
+.p-checkbox-box.p-highlight { background: #2196f3; }
+.three-inputs input { width: 120px; margin: 4px; }
+.p-dialog { position: fixed; top: 60px; left: 20%; right: 20%; background: #fff; border: 1px solid #333; padding: 8px; z-index: 20; }
+</style></head>
+<body><div id="app">
+<div id="filters"></div>
+<div class="three-inputs">
+<input type="text" class="p-inputtext right" formcontrolname="numero">
+<input type="text" class="p-inputtext center" formcontrolname="code" value="2101">
+<input type="text" class="p-inputtext left" formcontrolname="annee">
+</div>
+<div id="results"></div>
+</div>
+<script>
+var TREE = __TREE__;
+var PANEL_DELAY = __PANEL_DELAY__;
+var PAGE_SIZES = __PAGE_SIZES__;
+var table = {rows: [], page: 0, size: PAGE_SIZES[0]};
+var state = {appeal: null, court: null, unit: null, station: null, checked: false};
+var openPanel = null;
+function el(tag, cls, text) {
+    var e = document.createElement(tag);
+    if (cls) e.className = cls;
+    if (text !== undefined) e.textContent = text;
+    return e;
+}
+function closePanel() {
+    if (openPanel) { openPanel.remove(); openPanel = null; }
+}
+function dropdown(placeholder, options, onSelect) {
+    var d = el('div', 'p-dropdown p-component');
+    var label = el('span', 'p-dropdown-label p-inputtext p-placeholder', placeholder);
+    d.appendChild(label);
+    d.appendChild(el('div', 'p-dropdown-trigger', '▾'));
+    d.reset = function () {
+        label.className = 'p-dropdown-label p-inputtext p-placeholder';
+        label.textContent = placeholder;
+    };
+    d.addEventListener('click', function () {
+        if (openPanel && openPanel.owner === d) { closePanel(); return; }
+        closePanel();
+        setTimeout(function () {
+            var panel = el('div', 'p-dropdown-panel p-component');
+            var ul = el('ul', 'p-dropdown-items');
+            options().forEach(function (text) {
+                var li = el('li', 'p-dropdown-item');
+                li.appendChild(el('span', '', text));
+                li.addEventListener('click', function (e) {
+                    e.stopPropagation();
+                    label.className = 'p-dropdown-label p-inputtext';
+                    label.textContent = text;
+                    closePanel();
+                    onSelect(text);
+                });
+                ul.appendChild(li);
+            });
+            panel.appendChild(ul);
+            panel.owner = d;
+            document.body.appendChild(panel);
+            openPanel = panel;
+        }, PANEL_DELAY);
+    });
+    return d;
+}
+function keys(o) { return o ? Object.keys(o) : []; }
+var filters = document.getElementById('filters');
+var court, unit, station;
+var appeal = dropdown('اختيار محكمة الاستئناف', function () { return keys(TREE); }, function (v) {
+    state.appeal = v; state.court = state.unit = state.station = null;
+    if (court) { court.reset(); unit.reset(); station.reset(); }
+});
+filters.appendChild(appeal);
+var checkbox = el('div', 'p-checkbox p-component');
+var box = el('div', 'p-checkbox-box');
+checkbox.appendChild(box);
+checkbox.appendChild(el('label', '', 'محاضر الشرطة القضائية'));
+filters.appendChild(checkbox);
+box.addEventListener('click', function () {
+    state.checked = !state.checked;
+    box.className = 'p-checkbox-box' + (state.checked ? ' p-highlight' : '');
+    if (state.checked && !court) {
+        court = dropdown('اختيار المحكمة الإبتدائية', function () { return keys(TREE[state.appeal]); }, function (v) {
+            state.court = v; state.unit = state.station = null; unit.reset(); station.reset();
+        });
+        unit = dropdown('---', function () {
+            return state.court ? keys(TREE[state.appeal][state.court]) : [];
+        }, function (v) { state.unit = v; state.station = null; station.reset(); });
+        station = dropdown('---', function () {
+            return state.unit ? TREE[state.appeal][state.court][state.unit] : [];
+        }, function (v) { state.station = v; });
+        filters.appendChild(court);
+        filters.appendChild(unit);
+        filters.appendChild(station);
+    }
+});
+function cell(tr, text) { tr.appendChild(el('td', '', text)); }
+function pageButton(cls, text, disabled, page) {
+    var b = el('button', cls + (disabled ? ' p-disabled' : ''), text);
+    b.disabled = disabled;
+    b.addEventListener('click', function () {
+        if (disabled) return;
+        table.page = page;
+        setTimeout(renderTable, PANEL_DELAY);
+    });
+    return b;
+}
+function renderTable() {
+    var results = document.getElementById('results');
+    results.innerHTML = '';
+    var wrap = el('div', 'p-datatable p-component');
+    var t = el('table', 'p-datatable-table');
+    t.id = 'pr_id_16-table';
+    var head = el('tr');
+    ['رقم المحضر بالمحكمة', 'الإجراء', 'نوع المحضر', 'موضوع المحضر', 'رقم الملف الجنحي', 'مزيد من المعلومات'].forEach(function (h) {
+        head.appendChild(el('th', '', h));
+    });
+    var thead = el('thead');
+    thead.appendChild(head);
+    t.appendChild(thead);
+    var tbody = el('tbody');
+    table.rows.slice(table.page * table.size, (table.page + 1) * table.size).forEach(function (r) {
+        var tr = el('tr');
+        cell(tr, r.case_number); cell(tr, r.action); cell(tr, r.type);
+        cell(tr, r.subject); cell(tr, r.file_number);
+        var more = el('td');
+        var button = el('button', 'p-button p-button-sm', r.more_info);
+        button.addEventListener('click', function () { openDetail(r); });
+        more.appendChild(button);
+        tr.appendChild(more);
+        tbody.appendChild(tr);
+    });
+    t.appendChild(tbody);
+    wrap.appendChild(t);
+    var pages = Math.max(1, Math.ceil(table.rows.length / table.size));
+    var pag = el('div', 'p-paginator p-component');
+    pag.appendChild(pageButton('p-paginator-prev', '‹', table.page === 0, table.page - 1));
+    for (var i = 0; i < pages; i++) {
+        pag.appendChild(pageButton('p-paginator-page' + (i === table.page ? ' p-highlight' : ''), String(i + 1), false, i));
+    }
+    pag.appendChild(pageButton('p-paginator-next', '›', table.page >= pages - 1, table.page + 1));
+    var size = dropdown(String(table.size), function () { return PAGE_SIZES.map(String); }, function (v) {
+        table.size = parseInt(v, 10);
+        table.page = 0;
+        setTimeout(renderTable, PANEL_DELAY);
+    });
+    size.querySelector('.p-dropdown-label').classList.remove('p-placeholder');
+    pag.appendChild(size);
+    wrap.appendChild(pag);
+    results.appendChild(wrap);
+}
+function closeDetail() {
+    var d = document.querySelector('.p-dialog');
+    if (d) d.remove();
+}
+function detailTable(content, title, headers, rows) {
+    content.appendChild(el('h4', '', title));
+    var t = el('table');
+    var thead = el('thead'), head = el('tr');
+    headers.forEach(function (h) { head.appendChild(el('th', '', h)); });
+    thead.appendChild(head);
+    t.appendChild(thead);
+    var tbody = el('tbody');
+    rows.forEach(function (r) {
+        var tr = el('tr');
+        r.forEach(function (c) { cell(tr, c); });
+        tbody.appendChild(tr);
+    });
+    t.appendChild(tbody);
+    content.appendChild(t);
+}
+function openDetail(r) {
+    closeDetail();
+    var dialog = el('div', 'p-dialog p-component');
+    var header = el('div', 'p-dialog-header');
+    header.appendChild(el('span', 'p-dialog-title', 'مزيد من المعلومات'));
+    var close = el('button', 'p-dialog-header-close', '×');
+    close.addEventListener('click', function () { setTimeout(closeDetail, PANEL_DELAY); });
+    header.appendChild(close);
+    dialog.appendChild(header);
+    var content = el('div', 'p-dialog-content');
+    content.appendChild(el('div', 'loading', 'جاري التحميل...'));
+    dialog.appendChild(content);
+    document.body.appendChild(dialog);
+    var xhr = new XMLHttpRequest();
+    xhr.open('GET', '/api/detail?case=' + encodeURIComponent(r.case_number) + '&file=' + encodeURIComponent(r.file_number));
+    xhr.onload = function () {
+        content.innerHTML = '';
+        if (xhr.status !== 200) {
+            content.appendChild(el('div', 'p-message p-message-error', 'حدث خطأ'));
+            return;
+        }
+        var d = JSON.parse(xhr.responseText);
+        var dl = el('dl');
+        [['رقم الملف', d.file_number], ['القاضي المقرر', d.judge], ['الحكم', d.ruling]].forEach(function (f) {
+            dl.appendChild(el('dt', '', f[0]));
+            dl.appendChild(el('dd', '', f[1]));
+        });
+        content.appendChild(dl);
+        detailTable(content, 'الجلسات', ['التاريخ', 'الإجراء'], d.hearings);
+        detailTable(content, 'الأطراف', ['الاسم', 'الصفة'], d.parties);
+    };
+    xhr.send();
+}
+function render(xhr) {
+    var results = document.getElementById('results');
+    results.innerHTML = '';
+    if (xhr.status !== 200) {
+        results.appendChild(el('div', 'p-message p-message-error', 'حدث خطأ أثناء البحث'));
+        return;
+    }
+    var rows = JSON.parse(xhr.responseText).data;
+    if (!rows.length) {
+        results.appendChild(el('p', '', 'لا توجد أية نتيجة للبحث'));
+        return;
+    }
+    table = {rows: rows, page: 0, size: PAGE_SIZES[0]};
+    renderTable();
+}
+document.querySelector('.three-inputs').addEventListener('keydown', function (e) {
+    if (e.key !== 'Enter') return;
+    var numero = document.querySelector("input[formcontrolname='numero']").value;
+    var annee = document.querySelector("input[formcontrolname='annee']").value;
+    var results = document.getElementById('results');
+    results.innerHTML = '';
+    results.appendChild(el('div', 'loading', 'جاري التحميل...'));
+    var xhr = new XMLHttpRequest();
+    xhr.open('GET', '/api/search?numero=' + encodeURIComponent(numero) + '&annee=' + encodeURIComponent(annee) +
+        '&station=' + encodeURIComponent(state.station || ''));
+    xhr.onload = function () { render(xhr); };
+    xhr.onerror = function () { render({status: 0}); };
+    xhr.send();
+});
+</script></body></html>
+"""
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    latency = 0.3
+    error_rate = 0.0
+    density = 0.3
+    last = None
+    panel_delay_ms = 50
+    queries = 0
+    detail_queries = 0
+
+    def send(self, status, content_type, data):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/api/detail":
+            query = parse_qs(url.query)
+            type(self).detail_queries += 1
+            if self.latency:
+                time.sleep(random.uniform(0.5, 1.5) * self.latency)
+            if random.random() < self.error_rate:
+                self.send(500, "application/json; charset=utf-8", b'{"error": "fixture error"}')
+                return
+            details = case_details(query.get("case", [""])[0], query.get("file", [""])[0])
+            self.send(200, "application/json; charset=utf-8", json.dumps(details, ensure_ascii=False).encode("utf-8"))
+            return
+        if url.path == "/api/search":
+            query = parse_qs(url.query)
+            numero = query.get("numero", [""])[0]
+            year = query.get("annee", [""])[0]
+            station = query.get("station", [""])[0]
+            type(self).queries += 1
+            if self.latency:
+                time.sleep(random.uniform(0.5, 1.5) * self.latency)
+            if random.random() < self.error_rate:
+                self.send(500, "application/json; charset=utf-8", b'{"error": "fixture error"}')
+                return
+            rows = case_rows(station, year, int(numero), self.density, self.last) if numero.isdigit() else []
+            self.send(200, "application/json; charset=utf-8", json.dumps({"data": rows}, ensure_ascii=False).encode("utf-8"))
+            return
+        page = PAGE.replace("__TREE__", json.dumps(TREE, ensure_ascii=False)).replace("__PANEL_DELAY__", str(self.panel_delay_ms)).replace("__PAGE_SIZES__", json.dumps(PAGE_SIZES))
+        self.send(200, "text/html; charset=utf-8", page.encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_fixture(port=8766, latency=0.3, error_rate=0.0, density=0.3, last=None, background=False):
+    handler = type("Fixture", (FixtureHandler,), {"latency": latency, "error_rate": error_rate, "density": density, "last": last, "queries": 0, "detail_queries": 0})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.handler = handler
+    print(f"🧪 Fixture site on http://127.0.0.1:{server.server_port}/#/suivi/rapport-police-judiciaire "
+          f"(latency {latency}s, error rate {error_rate:.0%}, hit density {density:.0%}{f', data up to {last}' if last else ''})")
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    serve_fixture(int(args[0]) if len(args) > 0 else 8766,
+                  float(args[1]) if len(args) > 1 else 0.3,
+                  float(args[2]) if len(args) > 2 else 0.0,
+                  float(args[3]) if len(args) > 3 else 0.3,
+                  int(args[4]) if len(args) > 4 else None)
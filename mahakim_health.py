@@ -0,0 +1,184 @@
+# mahakim_health.py
+# Browser session watchdog: tracks per-query latency, renderer memory and consecutive failures,
+# and swaps a degraded or worn-out driver for a replacement pre-warmed in the background;
+# also reports startup time and, given a traffic meter, bytes transferred per query
+import time
+import threading
+import statistics
+from collections import deque
+import mahakim_metrics
+
+MAX_QUERIES = 500
+PREWARM_AT = 0.8
+WINDOW = 20
+SLOWDOWN = 2.5
+MAX_MEMORY_MB = 1024
+MAX_FAILURES = 5
+MEMORY_EVERY = 25
+BAD_STATUSES = ("loading", "unknown", "error")
+
+MEMORY_JS = "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : null;"
+
+def quit_quietly(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+class Supervisor:
+    def __init__(self, name, start, setup, max_queries=MAX_QUERIES, slowdown=SLOWDOWN, max_memory_mb=MAX_MEMORY_MB, max_failures=MAX_FAILURES, meter=None):
+        self.name = name
+        self.start = start
+        self.setup = setup
+        self.max_queries = max_queries
+        self.slowdown = slowdown
+        self.max_memory_mb = max_memory_mb
+        self.max_failures = max_failures
+        self.spare = None
+        self.spare_thread = None
+        self.spare_error = None
+        self.recycles = []
+        self.meter = meter
+        self.startups = []
+        self.traffic = {"bytes": 0, "requests": 0, "blocked": 0, "queries": 0}
+        self.driver = self.launch()
+        self.reset()
+
+    def reset(self):
+        self.queries = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=WINDOW)
+        self.baseline = None
+        self.memory_mb = None
+
+    def launch(self):
+        started = time.time()
+        driver = self.start()
+        ready = time.time()
+        try:
+            self.setup(driver)
+        except BaseException:
+            quit_quietly(driver)
+            raise
+        startup = {"driver": ready - started, "form": time.time() - ready, "bytes": 0}
+        if self.meter:
+            startup["bytes"] = self.meter(driver)[0]
+        self.startups.append(startup)
+        mahakim_metrics.record("startup", startup["driver"] + startup["form"])
+        print(f"🚀 [HEALTH] {self.name}: browser ready in {startup['driver'] + startup['form']:.1f}s "
+              f"(driver {startup['driver']:.1f}s, form {startup['form']:.1f}s{self.size(startup['bytes'])})")
+        return driver
+
+    def build_spare(self):
+        try:
+            self.spare = self.launch()
+        except Exception as e:
+            self.spare_error = e
+
+    def prewarm(self):
+        if self.spare is None and self.spare_thread is None:
+            print(f"🩺 [HEALTH] {self.name}: pre-warming a replacement browser")
+            self.spare_error = None
+            self.spare_thread = threading.Thread(target=self.build_spare, daemon=True)
+            self.spare_thread.start()
+
+    def take_spare(self):
+        if self.spare_thread is not None:
+            self.spare_thread.join()
+            self.spare_thread = None
+        spare, self.spare = self.spare, None
+        if spare is None:
+            if self.spare_error:
+                print(f"⚠️ [HEALTH] {self.name}: pre-warm failed ({self.spare_error}), starting a browser now")
+            spare = self.launch()
+        return spare
+
+    def discard_spare(self):
+        if self.spare_thread is not None:
+            self.spare_thread.join()
+            self.spare_thread = None
+        if self.spare is not None:
+            quit_quietly(self.spare)
+            self.spare = None
+
+    def retarget(self, setup):
+        # A spare prepared for the old form state is useless once the setup changes.
+        self.setup = setup
+        self.discard_spare()
+
+    def read_memory(self):
+        try:
+            used = self.driver.execute_script(MEMORY_JS)
+        except Exception:
+            return None
+        return used / 1048576 if used else None
+
+    def degraded(self, scale=1.0):
+        # Scaled down, the same limits tell when to start warming the replacement.
+        if self.queries >= self.max_queries * scale:
+            return f"{self.queries} queries"
+        if self.failures >= self.max_failures * scale:
+            return f"{self.failures} consecutive failures"
+        if self.baseline and len(self.latencies) == WINDOW:
+            recent = statistics.median(self.latencies)
+            if recent > self.slowdown * scale * self.baseline:
+                return f"median latency {recent:.1f}s vs {self.baseline:.1f}s at start"
+        if self.memory_mb and self.memory_mb > self.max_memory_mb * scale:
+            return f"renderer heap {self.memory_mb:.0f} MB"
+        return None
+
+    def record(self, status, latency=None, error=False):
+        self.queries += 1
+        if self.meter:
+            total, requests, blocked = self.meter(self.driver)
+            self.traffic["bytes"] += total
+            self.traffic["requests"] += requests
+            self.traffic["blocked"] += blocked
+            self.traffic["queries"] += 1
+        if error or status in BAD_STATUSES:
+            self.failures += 1
+        else:
+            self.failures = 0
+        if latency is not None:
+            self.latencies.append(latency)
+            if self.baseline is None and len(self.latencies) == WINDOW:
+                self.baseline = statistics.median(self.latencies)
+        if self.queries % MEMORY_EVERY == 0:
+            self.memory_mb = self.read_memory()
+        if self.degraded(PREWARM_AT):
+            self.prewarm()
+        reason = self.degraded()
+        if reason:
+            self.recycle(reason)
+
+    def recycle(self, reason):
+        started = time.time()
+        old = self.driver
+        self.driver = self.take_spare()
+        threading.Thread(target=quit_quietly, args=(old,), daemon=True).start()
+        self.recycles.append(reason)
+        print(f"♻️ [HEALTH] {self.name}: recycled browser after {reason} (handover {time.time() - started:.1f}s)")
+        self.reset()
+
+    def close(self):
+        self.discard_spare()
+        quit_quietly(self.driver)
+        if self.recycles:
+            print(f"🩺 [HEALTH] {self.name}: {len(self.recycles)} browser recycles ({', '.join(self.recycles)})")
+        self.print_report()
+
+    def size(self, total):
+        # Without a meter nothing was measured, which is not the same as 0 KB.
+        return f", {total / 1024:.0f} KB" if self.meter else ""
+
+    def print_report(self):
+        if self.startups:
+            count = len(self.startups)
+            driver = sum(s["driver"] for s in self.startups) / count
+            form = sum(s["form"] for s in self.startups) / count
+            size = sum(s["bytes"] for s in self.startups) / count
+            print(f"🚀 [STARTUP] {self.name}: {count} starts, {driver + form:.1f}s average (driver {driver:.1f}s, form {form:.1f}s{self.size(size)})")
+        t = self.traffic
+        if t["queries"]:
+            print(f"📶 [TRAFFIC] {self.name}: {t['bytes'] / t['queries'] / 1024:.1f} KB and {t['requests'] / t['queries']:.1f} requests per query, "
+                  f"{t['blocked']} requests blocked, {t['bytes'] / 1048576:.1f} MB over {t['queries']} queries")
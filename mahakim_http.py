@@ -0,0 +1,235 @@
+# mahakim_http.py
+# Direct HTTP/JSON engine: replays the search request behind #/suivi/rapport-police-judiciaire
+# without driving the Angular page, plus a local stub server that replays recorded responses.
+#
+# The request is described by a template recorded once from the browser's network tab
+# (DevTools > Network > the XHR fired when pressing ENTER in the numero/annee inputs):
+# {
+#   "method": "POST",
+#   "url": "https://www.mahakim.ma/...",
+#   "headers": {"Content-Type": "application/json"},
+#   "body": {"...": "...", "numero": "{numero}", "annee": "{annee}"},
+#   "rows_path": ["data"],
+#   "fields": {"case_number": "...", "action": "...", "type": "...", "subject": "...", "file_number": "...", "more_info": "..."}
+# }
+# "{numero}" and "{annee}" are substituted for every query. "rows_path" and "fields" are
+# optional: without them the first list of records in the response is used and the first
+# six values of each record are mapped in table order.
+import sys
+import json
+import time
+import asyncio
+import threading
+import aiohttp
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import mahakim_config
+import mahakim_metrics
+import mahakim_throttle
+
+ROW_FIELDS = ["case_number", "action", "type", "subject", "file_number", "more_info"]
+
+def load_template(path=None):
+    path = path or mahakim_config.API_TEMPLATE
+    with open(path, "r", encoding="utf-8") as f:
+        template = json.load(f)
+    if not template.get("url"):
+        raise ValueError(f"{path} has no 'url'; record the search request from the browser's network tab first")
+    return template
+
+def fill_placeholders(value, numero, annee):
+    if isinstance(value, str):
+        return value.replace("{numero}", str(numero)).replace("{annee}", str(annee))
+    if isinstance(value, dict):
+        return {k: fill_placeholders(v, numero, annee) for k, v in value.items()}
+    if isinstance(value, list):
+        return [fill_placeholders(v, numero, annee) for v in value]
+    return value
+
+def find_records(payload, rows_path=None):
+    if rows_path:
+        for key in rows_path:
+            if isinstance(payload, dict):
+                payload = payload.get(key)
+            elif isinstance(payload, list) and isinstance(key, int) and key < len(payload):
+                payload = payload[key]
+            else:
+                return []
+        return payload if isinstance(payload, list) else []
+    if isinstance(payload, list):
+        if payload and all(isinstance(item, dict) for item in payload):
+            return payload
+        for item in payload:
+            found = find_records(item)
+            if found:
+                return found
+    elif isinstance(payload, dict):
+        for value in payload.values():
+            found = find_records(value)
+            if found:
+                return found
+    return []
+
+def cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value).strip()
+
+def parse_response(payload, case_number, year, template):
+    fields = template.get("fields") or {}
+    data_rows = []
+    for record in find_records(payload, template.get("rows_path")):
+        if fields:
+            values = [cell_text(record.get(fields.get(name, ""))) for name in ROW_FIELDS]
+        else:
+            values = [cell_text(v) for v in list(record.values())[:6]]
+            values += [""] * (6 - len(values))
+        row_data = dict(zip(ROW_FIELDS, values))
+        row_data["queried_numero"] = case_number
+        row_data["queried_annee"] = year
+        if row_data["case_number"] and '/' in row_data["case_number"]:
+            data_rows.append(row_data)
+    return data_rows
+
+async def fetch_number(session, throttles, template, case_number, year):
+    method = template.get("method", "POST").upper()
+    url = fill_placeholders(template["url"], case_number, year)
+    headers = template.get("headers") or {}
+    body = fill_placeholders(template.get("body"), case_number, year)
+    params = fill_placeholders(template.get("params"), case_number, year)
+    retries = mahakim_config.HTTP_RETRIES
+    for attempt in range(1, retries + 1):
+        # A request slot is its throttle: taking one both bounds concurrency and paces that slot.
+        throttle = await throttles.get()
+        try:
+            with mahakim_metrics.timed("delay"):
+                await asyncio.sleep(throttle.delay())
+            started = time.time()
+            try:
+                kwargs = {"headers": headers, "params": params}
+                if body is not None and method != "GET":
+                    kwargs["json"] = body
+                async with session.request(method, url, **kwargs) as resp:
+                    if resp.status >= 500 or resp.status == 429:
+                        raise aiohttp.ClientResponseError(resp.request_info, resp.history, status=resp.status)
+                    resp.raise_for_status()
+                    payload = await resp.json(content_type=None)
+                rows = parse_response(payload, case_number, year, template)
+                status = "has_data" if rows else "no_results"
+                throttle.record(status, time.time() - started)
+                return case_number, status, rows
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                throttle.record("error", error=True)
+                print(f"⚠️  [HTTP] {case_number}/{year} attempt {attempt}: {e}")
+        finally:
+            throttles.put_nowait(throttle)
+        if attempt < retries:
+            await asyncio.sleep(attempt)
+    return case_number, "unknown", []
+
+async def query_numbers(numbers, year, on_rows, on_done=None, template=None, concurrency=None, throttle="aimd", verbose=False):
+    template = template or load_template()
+    concurrency = concurrency or mahakim_config.HTTP_CONCURRENCY
+    throttles = asyncio.Queue()
+    for i in range(concurrency):
+        throttles.put_nowait(mahakim_throttle.make_throttle(throttle, f"http {i}", mahakim_config.HTTP_MIN_DELAY, mahakim_config.HTTP_MAX_DELAY,
+                                                             verbose=verbose))
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=mahakim_config.HTTP_TIMEOUT)
+    numbers = list(numbers)
+    statuses = {}
+    started = time.time()
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = [fetch_number(session, throttles, template, n, year) for n in numbers]
+        for future in asyncio.as_completed(tasks):
+            n, status, rows = await future
+            statuses[n] = status
+            if status == "has_data":
+                on_rows(rows)
+                print(f"✅ [FOUND] {n} -> {len(rows)} rows")
+            elif status == "no_results":
+                print(f"🚫 [NO RESULTS] {n}")
+            else:
+                print(f"❓ [UNKNOWN: {status}] {n}")
+            if on_done:
+                on_done(n, status, rows)
+    elapsed = time.time() - started
+    rate = len(numbers) / elapsed if elapsed > 0 else 0.0
+    print(f"📊 HTTP engine: {len(numbers)} numbers in {elapsed:.1f}s ({rate:.2f} cases/sec, concurrency {concurrency})")
+    return statuses
+
+def run_http_engine(numbers, year, on_rows, on_done=None, concurrency=None, throttle="aimd", verbose=False):
+    return asyncio.run(query_numbers(numbers, year, on_rows, on_done, concurrency=concurrency, throttle=throttle, verbose=verbose))
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    recordings = {}
+    numero_key = "numero"
+    latency = 0.0
+
+    def find_numero(self, payload):
+        if isinstance(payload, dict):
+            for key, value in payload.items():
+                if key == self.numero_key:
+                    return str(value)
+                found = self.find_numero(value)
+                if found:
+                    return found
+        elif isinstance(payload, list):
+            for item in payload:
+                found = self.find_numero(item)
+                if found:
+                    return found
+        return None
+
+    def reply(self, body):
+        numero = None
+        query = parse_qs(urlparse(self.path).query)
+        if self.numero_key in query:
+            numero = query[self.numero_key][0]
+        elif body:
+            try:
+                numero = self.find_numero(json.loads(body))
+            except ValueError:
+                numero = None
+        if self.latency:
+            time.sleep(self.latency)
+        payload = self.recordings.get(numero, self.recordings.get("default", []))
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.reply(b"")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        self.reply(self.rfile.read(length) if length else b"")
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_replay(recordings_path, port=8765, numero_key="numero", latency=0.0, background=False):
+    # recordings file: {"<numero>": <recorded JSON response>, ..., "default": <no-result response>}
+    with open(recordings_path, "r", encoding="utf-8") as f:
+        recordings = json.load(f)
+    handler = type("Replay", (ReplayHandler,), {"recordings": recordings, "numero_key": numero_key, "latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    print(f"🧪 Replaying {len(recordings)} recorded responses on http://127.0.0.1:{server.server_port}/")
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python mahakim_http.py <recordings.json> [port]")
+        sys.exit(1)
+    serve_replay(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 8765)
@@ -0,0 +1,108 @@
+# mahakim_lean.py
+# Lean browser profile: DevTools resource blocking, a cached/pinned chromedriver path so startup
+# works offline, and per-query traffic accounting from Chrome's performance log
+import os
+import json
+import time
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.common.exceptions import SessionNotCreatedException
+from webdriver_manager.chrome import ChromeDriverManager
+
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*.mp4", "*.webm",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*clarity.ms*",
+]
+# PrimeNG positions its dropdown panels with CSS, so stylesheets stay unless asked for.
+BLOCKED_CSS = ["*.css"]
+
+def lean_options(options):
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-component-update")
+    options.add_argument("--disable-sync")
+    options.add_argument("--mute-audio")
+
+def block_resources(driver, block_css=False):
+    patterns = BLOCKED_URLS + (BLOCKED_CSS if block_css else [])
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
+
+def driver_path(cache_file, refresh=False):
+    # MAHAKIM_CHROMEDRIVER pins a binary outright; otherwise the last resolved path is reused
+    # and the network lookup only happens when it is missing or no longer matches Chrome.
+    pinned = os.environ.get("MAHAKIM_CHROMEDRIVER")
+    if pinned:
+        return pinned
+    if not refresh and os.path.exists(cache_file):
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                path = json.load(f)["path"]
+            if os.path.exists(path):
+                return path
+        except (ValueError, KeyError):
+            pass
+    path = ChromeDriverManager().install()
+    tmp = cache_file + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"path": path, "resolved_at": time.time()}, f)
+    os.replace(tmp, cache_file)
+    print(f"📌 Cached chromedriver path {path}")
+    return path
+
+def start_chrome(options, cache_file):
+    try:
+        return webdriver.Chrome(service=ChromeService(driver_path(cache_file)), options=options)
+    except SessionNotCreatedException:
+        if os.environ.get("MAHAKIM_CHROMEDRIVER"):
+            raise
+        print("📌 Cached chromedriver does not match this Chrome, resolving it again")
+        return webdriver.Chrome(service=ChromeService(driver_path(cache_file, refresh=True)), options=options)
+
+def enable_traffic_log(options):
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+CAPTURED_EVENTS = ("Network.requestWillBeSent", "Network.responseReceived", "Network.loadingFinished", "Network.loadingFailed")
+
+def log_state(driver):
+    state = getattr(driver, "mahakim_log", None)
+    if state is None:
+        state = {"bytes": 0, "requests": 0, "blocked": 0, "capture": False, "events": []}
+        driver.mahakim_log = state
+    return state
+
+def read_log(driver):
+    # Chrome empties the performance log on every read, so it is only read here: traffic is totalled
+    # for read_traffic and, while response capture is on, network events are kept for mahakim_capture.
+    state = log_state(driver)
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return state
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.loadingFinished":
+            state["bytes"] += params.get("encodedDataLength", 0)
+            state["requests"] += 1
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            state["blocked"] += 1
+        if state["capture"] and method in CAPTURED_EVENTS:
+            state["events"].append(message)
+    return state
+
+def read_traffic(driver):
+    # Bytes on the wire, finished requests and requests blocked since the last call.
+    state = read_log(driver)
+    totals = state["bytes"], state["requests"], state["blocked"]
+    state.update(bytes=0, requests=0, blocked=0)
+    return totals
@@ -0,0 +1,64 @@
+# mahakim_memory.py
+# Resident memory of this process plus every driver/browser/worker process it started, sampled in
+# the background, so the engines can be compared by memory per concurrent query
+import threading
+import psutil
+import mahakim_metrics
+
+SAMPLE_EVERY = 1.0
+STATE = {"engine": "", "concurrency": 1, "samples": [], "stop": None, "thread": None}
+
+def tree_mb(pid=None):
+    # RSS per process, summed; pages shared between Chrome processes are counted in each of them.
+    root = psutil.Process(pid)
+    total = 0
+    for proc in [root] + root.children(recursive=True):
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+def sample():
+    mb = tree_mb()
+    STATE["samples"].append(mb)
+    return mb
+
+def start_sampler(engine, concurrency, every=SAMPLE_EVERY):
+    stop = threading.Event()
+    STATE.update(engine=engine, concurrency=max(1, concurrency), samples=[], stop=stop)
+    def loop():
+        while not stop.wait(every):
+            sample()
+    STATE["thread"] = threading.Thread(target=loop, daemon=True)
+    STATE["thread"].start()
+
+def stop_sampler():
+    if STATE["stop"]:
+        STATE["stop"].set()
+        STATE["thread"].join()
+        STATE["stop"] = None
+    report = summary()
+    if report:
+        mahakim_metrics.event("memory", **report)
+    return report
+
+def summary():
+    samples = STATE["samples"]
+    if not samples:
+        return {}
+    peak = max(samples)
+    return {
+        "engine": STATE["engine"],
+        "concurrency": STATE["concurrency"],
+        "samples": len(samples),
+        "peak_mb": round(peak, 1),
+        "mean_mb": round(sum(samples) / len(samples), 1),
+        "per_query_mb": round(peak / STATE["concurrency"], 1),
+    }
+
+def print_memory(report=None):
+    report = report or summary()
+    if report:
+        print(f"🧠 Memory ({report['engine']}, {report['concurrency']} concurrent queries): peak {report['peak_mb']:.0f} MB, "
+              f"mean {report['mean_mb']:.0f} MB, {report['per_query_mb']:.0f} MB per concurrent query")
@@ -0,0 +1,191 @@
+# mahakim_metrics.py
+# Per-stage timings (fill, wait, detect, parse, write, delay...) with p50/p95 summaries, a JSONL
+# event log, status/retry/exception counters, a live cases/sec + ETA readout and a metrics endpoint
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STAGES = {}
+COUNTERS = {}
+CONTEXT = {}
+PROGRESS = {"total": 0, "done": 0, "started": None, "recent": deque(), "last_print": 0.0}
+RATE_WINDOW = 60
+# p50/p95 come from each stage's most recent samples; count and total cover the whole run.
+SAMPLE_WINDOW = 2000
+PRINT_EVERY = 10
+LOG = {"file": None, "forward": None}
+LOCK = threading.Lock()
+
+def open_log(path, **context):
+    # One JSON object per line, appended, so several processes can share the file.
+    LOG["file"] = open(path, "a", encoding="utf-8", buffering=1)
+    CONTEXT.update(context, pid=os.getpid())
+
+def close_log():
+    if LOG["file"]:
+        LOG["file"].close()
+        LOG["file"] = None
+
+def set_context(**context):
+    CONTEXT.update(context)
+
+def event(kind, **fields):
+    if LOG["file"]:
+        item = {"ts": round(time.time(), 3), "event": kind}
+        item.update(CONTEXT)
+        item.update(fields)
+        LOG["file"].write(json.dumps(item, ensure_ascii=False) + "\n")
+
+def record(stage, seconds, **fields):
+    with LOCK:
+        stats = STAGES.get(stage)
+        if stats is None:
+            stats = STAGES[stage] = {"count": 0, "total": 0.0, "samples": deque(maxlen=SAMPLE_WINDOW)}
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["samples"].append(seconds)
+    event("stage", stage=stage, seconds=round(seconds, 4), **fields)
+
+@contextmanager
+def timed(stage, **fields):
+    started = time.time()
+    try:
+        yield
+    finally:
+        record(stage, time.time() - started, **fields)
+
+def forward_to(fn):
+    # Worker processes hand their counters to the parent, which owns the endpoint.
+    LOG["forward"] = fn
+
+def count(name, n=1):
+    with LOCK:
+        COUNTERS[name] = COUNTERS.get(name, 0) + n
+    if LOG["forward"]:
+        LOG["forward"](name, n)
+
+def expect(total):
+    PROGRESS["total"] += total
+    if PROGRESS["started"] is None:
+        PROGRESS["started"] = time.time()
+
+def rate():
+    recent = PROGRESS["recent"]
+    now = time.time()
+    while recent and now - recent[0] > RATE_WINDOW:
+        recent.popleft()
+    if not recent:
+        return 0.0
+    window_start = max(PROGRESS["started"], now - RATE_WINDOW)
+    return len(recent) / max(now - window_start, 1.0)
+
+def remaining():
+    return max(0, PROGRESS["total"] - PROGRESS["done"] - COUNTERS.get("skipped", 0))
+
+def done(status, number=None):
+    now = time.time()
+    if PROGRESS["started"] is None:
+        PROGRESS["started"] = now
+    PROGRESS["done"] += 1
+    PROGRESS["recent"].append(now)
+    count(f"status_{status}")
+    event("done", status=status, number=number)
+    if now - PROGRESS["last_print"] >= PRINT_EVERY:
+        PROGRESS["last_print"] = now
+        print_progress()
+
+def print_progress():
+    r = rate()
+    left = remaining()
+    eta = "?"
+    if r:
+        hours, rest = divmod(int(left / r), 3600)
+        eta = f"{hours}:{rest // 60:02d}:{rest % 60:02d}"
+    print(f"📈 [PROGRESS] {PROGRESS['done']}/{PROGRESS['total']} done, {r:.2f} cases/sec, {left} left, ETA {eta}")
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+def summarize(stages=None):
+    summary = {}
+    with LOCK:
+        items = [(stage, dict(stats, samples=list(stats["samples"]))) for stage, stats in (STAGES if stages is None else stages).items()]
+    for stage, stats in items:
+        samples = stats["samples"]
+        if samples:
+            summary[stage] = {"count": stats["count"], "p50": percentile(samples, 0.5), "p95": percentile(samples, 0.95), "total": stats["total"]}
+    return summary
+
+def snapshot():
+    r = rate()
+    return {
+        "counters": dict(COUNTERS),
+        "done": PROGRESS["done"],
+        "total": PROGRESS["total"],
+        "remaining": remaining(),
+        "cases_per_sec": r,
+        "eta_seconds": remaining() / r if r else None,
+        "stages": summarize(),
+    }
+
+def prometheus(snap):
+    lines = []
+    for name, value in sorted(snap["counters"].items()):
+        if name.startswith("status_"):
+            lines.append(f'mahakim_cases_total{{status="{name[7:]}"}} {value}')
+        else:
+            lines.append(f"mahakim_{name}_total {value}")
+    lines.append(f"mahakim_done {snap['done']}")
+    lines.append(f"mahakim_remaining {snap['remaining']}")
+    lines.append(f"mahakim_cases_per_second {snap['cases_per_sec']:.4f}")
+    if snap["eta_seconds"] is not None:
+        lines.append(f"mahakim_eta_seconds {snap['eta_seconds']:.0f}")
+    for stage, s in snap["stages"].items():
+        for q, quantile in (("p50", "0.5"), ("p95", "0.95")):
+            lines.append(f'mahakim_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {s[q]:.4f}')
+        lines.append(f'mahakim_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+        lines.append(f'mahakim_stage_seconds_sum{{stage="{stage}"}} {s["total"]:.4f}')
+    return "\n".join(lines) + "\n"
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        snap = snapshot()
+        if self.path.startswith("/metrics.json"):
+            body, content_type = json.dumps(snap, ensure_ascii=False), "application/json; charset=utf-8"
+        else:
+            body, content_type = prometheus(snap), "text/plain; version=0.0.4; charset=utf-8"
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_metrics(port):
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📡 Metrics on http://127.0.0.1:{server.server_port}/metrics (JSON at /metrics.json)")
+    return server
+
+def reset():
+    STAGES.clear()
+    COUNTERS.clear()
+    PROGRESS.update({"total": 0, "done": 0, "started": None, "recent": deque(), "last_print": 0.0})
+
+def print_stage_summary():
+    summary = summarize()
+    if not summary:
+        return
+    print("\n=== Stage summary ===")
+    for stage, s in summary.items():
+        print(f"⏱️  {stage}: {s['count']} samples, p50 {s['p50']:.3f}s, p95 {s['p95']:.3f}s, total {s['total']:.1f}s")
+    if COUNTERS:
+        print("🔢 " + ", ".join(f"{name} {value}" for name, value in sorted(COUNTERS.items())))
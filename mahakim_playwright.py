@@ -0,0 +1,229 @@
+# mahakim_playwright.py
+# Async Playwright engine: the same form workflow as the Selenium scraper (courts, checkbox, unit and
+# station, numero/annee, detection, pagination) run as asyncio tasks, each in its own isolated browser
+# context of one Chromium process instead of one Chrome + chromedriver per worker
+import json
+import time
+import asyncio
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+import mahakim_config
+import mahakim_catalogue
+import mahakim_extract
+import mahakim_waits
+import mahakim_metrics
+import mahakim_lean
+import mahakim_throttle
+
+HIDE_WEBDRIVER = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+# The Selenium snippets read arguments[] and use return; wrapped like this they run unchanged through page.evaluate.
+def sync_js(body):
+    return "(args) => (function () {\n" + body + "\n}).apply(null, args)"
+
+def async_js(body):
+    # execute_async_script hands the script a callback as its last argument; here that callback resolves a Promise.
+    return "(args) => new Promise(function (done) {\n(function () {\n" + body + "\n}).apply(null, args.concat([done]));\n})"
+
+async def wait_for(page, step, condition, timeout=10, require_change=False, year=""):
+    started = time.time()
+    try:
+        result = await page.evaluate(async_js(mahakim_waits.WAIT_JS % condition), [int(timeout * 1000), require_change, str(year)]) or {}
+        ok = bool(result.get("ok"))
+    except Exception as e:
+        print(f"  ⚠️  Wait '{step}' failed: {e}")
+        ok = False
+    waited = time.time() - started
+    mahakim_waits.record_wait(step, waited, ok)
+    if not ok:
+        print(f"  ⚠️  Wait '{step}' timed out after {waited:.1f}s")
+    return ok
+
+async def select_level(page, index, text, option_index=None):
+    # The Selenium select_level on a locator: the option is picked at its catalogue position, else by text.
+    level = mahakim_catalogue.LEVELS[index]
+    box = page.locator("div.p-dropdown").nth(index)
+    if not await box.count():
+        raise ValueError(f"Dropdown {index + 1} ({level}) is not on the page")
+    await box.click(timeout=15000)
+    await wait_for(page, f"{level} open", mahakim_waits.PANEL_OPEN, 15)
+    result = await page.evaluate(sync_js(mahakim_catalogue.PICK_OPTION_JS), [text, option_index]) or {}
+    if result.get("stale"):
+        print(f"⚠️ Catalogue position of '{text}' is out of date, fell back to a text search")
+    if not result.get("ok"):
+        await box.click()
+        raise ValueError(f"Option '{text}' not found for {level}. Available: {[t for t in result.get('options', []) if t]}")
+    await wait_for(page, f"{level} select", mahakim_waits.PANEL_CLOSED, 15)
+    print(f"✓ {level}: {result.get('text')}")
+
+async def ensure_checkbox(page):
+    if not await page.evaluate(sync_js(f"return {mahakim_waits.CHECKBOX_CHECKED};"), []):
+        await page.locator("div.p-checkbox-box").first.click(timeout=10000)
+        await wait_for(page, "checkbox", mahakim_waits.CHECKBOX_CHECKED, 10)
+
+async def setup_filters(page, target, catalogue):
+    # Same target as the Selenium engine (mahakim_campaign.configured_target); a level that cannot be
+    # selected raises, so the context is rebuilt instead of searching an unfiltered form.
+    picks = mahakim_catalogue.resolve_target(catalogue, target)
+    for attempt in range(mahakim_config.SETUP_RETRIES):
+        try:
+            await page.goto(mahakim_config.TARGET_URL, wait_until="domcontentloaded", timeout=90000)
+            await wait_for(page, "page load", mahakim_waits.PAGE_READY, 20)
+            break
+        except PlaywrightTimeout:
+            if attempt == mahakim_config.SETUP_RETRIES - 1:
+                raise
+    for index, (text, position) in enumerate(picks):
+        await select_level(page, index, text, position)
+        if index == 0:
+            await ensure_checkbox(page)
+
+async def fill_case_details(page, case_number, year):
+    with mahakim_metrics.timed("fill"):
+        container = page.locator("div.three-inputs").first
+        await container.locator("input[formcontrolname='numero'].right").fill(str(case_number))
+        annee_input = container.locator("input[formcontrolname='annee'].left")
+        await annee_input.fill(str(year))
+        await page.evaluate(sync_js(mahakim_waits.ARM_JS), [])
+        await annee_input.press("Enter")
+    return await wait_for(page, "results", mahakim_waits.RESULTS_READY, 10, require_change=True, year=year)
+
+async def table_signature(page):
+    return await page.evaluate("() => " + mahakim_extract.SIGNATURE_JS)
+
+async def wait_table_change(page, step, before, timeout=10):
+    return await wait_for(page, step, f"{mahakim_extract.SIGNATURE_JS} !== {json.dumps(before)}", timeout)
+
+async def largest_page_size(page, current):
+    before = await table_signature(page)
+    box = page.locator(".p-paginator .p-dropdown").first
+    await box.click()
+    await wait_for(page, "page size open", mahakim_waits.PANEL_OPEN, 10)
+    items = page.locator(".p-dropdown-panel li.p-dropdown-item")
+    options = [t.strip() for t in await items.all_inner_texts()]
+    sizes = [int(t) for t in options if t.isdigit()]
+    if not sizes or max(sizes) <= current:
+        await box.click()
+        await wait_for(page, "page size close", mahakim_waits.PANEL_CLOSED, 10)
+        return False
+    await items.nth(options.index(str(max(sizes)))).click()
+    return await wait_table_change(page, "page size", before)
+
+async def read_page(page, case_number, year):
+    result = await page.evaluate(sync_js(mahakim_extract.EXTRACT_JS), [str(year), mahakim_extract.NO_RESULTS_TEXT, mahakim_extract.TABLE_ID]) or {}
+    return mahakim_extract.read_result(result, case_number, year)
+
+async def collect_pages(page, first_rows, case_number, year, max_pages=mahakim_extract.MAX_PAGES):
+    paginator = sync_js(mahakim_extract.PAGINATOR_JS)
+    started = time.time()
+    info = await page.evaluate(paginator, []) or {}
+    if not info.get("next"):
+        return mahakim_extract.dedupe_pages(first_rows, 1, started)[0]
+    rows = list(first_rows)
+    pages = 1
+    if info.get("size_dropdown") and await largest_page_size(page, info.get("size", 0)):
+        rows = (await read_page(page, case_number, year))[1]
+        pages += 1
+        info = await page.evaluate(paginator, []) or {}
+    while info.get("next") and pages < max_pages:
+        before = await table_signature(page)
+        await page.evaluate(sync_js(mahakim_extract.NEXT_PAGE_JS), [])
+        if not await wait_table_change(page, "next page", before):
+            break
+        rows += (await read_page(page, case_number, year))[1]
+        pages += 1
+        info = await page.evaluate(paginator, []) or {}
+    return mahakim_extract.dedupe_pages(rows, pages, started)[0]
+
+async def detect_results(page, case_number, year):
+    status, rows = await read_page(page, case_number, year)
+    if status == "has_data":
+        rows = await collect_pages(page, rows, case_number, year)
+    return status, rows
+
+async def open_context(browser, name, target, catalogue):
+    # A context is a fresh profile (cookies, storage, cache) inside the shared browser process.
+    started = time.time()
+    context = await browser.new_context(locale="ar-MA")
+    await context.add_init_script(HIDE_WEBDRIVER)
+    await context.add_init_script(mahakim_waits.PROBE_JS)
+    page = await context.new_page()
+    if mahakim_config.LEAN:
+        cdp = await context.new_cdp_session(page)
+        await cdp.send("Network.enable")
+        await cdp.send("Network.setBlockedURLs", {"urls": mahakim_lean.BLOCKED_URLS + (mahakim_lean.BLOCKED_CSS if mahakim_config.LEAN_BLOCK_CSS else [])})
+    await setup_filters(page, target, catalogue)
+    mahakim_metrics.record("startup", time.time() - started, session=name)
+    return context, page
+
+async def run_context(browser, name, queue, year, on_rows, on_done, target, catalogue):
+    context = page = None
+    queries = 0
+    # Each context paces itself like a Selenium session; the sleep goes through asyncio so the others keep running.
+    throttle = mahakim_throttle.make_throttle(mahakim_config.THROTTLE, name, mahakim_config.MIN_DELAY, mahakim_config.MAX_DELAY,
+                                              verbose=mahakim_config.VERBOSE)
+    try:
+        while not queue.empty():
+            n = queue.get_nowait()
+            status, rows = "unknown", []
+            for attempt in range(1, mahakim_config.RETRIES + 1):
+                if attempt > 1:
+                    mahakim_metrics.count("retries")
+                try:
+                    if page is None:
+                        context, page = await open_context(browser, name, target, catalogue)
+                    with mahakim_metrics.timed("delay"):
+                        await asyncio.sleep(throttle.delay())
+                    started = time.time()
+                    await fill_case_details(page, n, year)
+                    with mahakim_metrics.timed("detect"):
+                        status, rows = await detect_results(page, n, year)
+                    throttle.record(status, time.time() - started)
+                    if status == "no_results" or (status == "has_data" and rows):
+                        break
+                    if status == "loading":
+                        await asyncio.sleep(mahakim_config.LOADING_SLEEP)
+                except Exception as e:
+                    mahakim_metrics.count("exceptions")
+                    throttle.record("error", error=True)
+                    status, rows = "unknown", []
+                    print(f"⚠️  [{name}] {n}/{year} attempt {attempt}: {e}")
+                    # A broken context is thrown away whole; the next attempt builds a fresh one.
+                    if context:
+                        await context.close()
+                    context = page = None
+            if status == "has_data" and rows:
+                on_rows(rows)
+                print(f"✅ [FOUND] {n} -> {len(rows)} rows")
+            elif status == "no_results":
+                print(f"🚫 [NO RESULTS] {n}")
+            else:
+                print(f"❓ [UNKNOWN: {status}] {n}")
+            if on_done:
+                on_done(n, status, rows)
+            queries += 1
+            if context and queries % mahakim_config.RECYCLE_AFTER == 0:
+                await context.close()
+                context = page = None
+    finally:
+        if context:
+            await context.close()
+
+async def query_numbers(numbers, year, on_rows, target, catalogue, on_done=None, contexts=None):
+    contexts = contexts or mahakim_config.CONTEXTS
+    numbers = list(numbers)
+    queue = asyncio.Queue()
+    for n in numbers:
+        queue.put_nowait(n)
+    started = time.time()
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=mahakim_config.HEADLESS, args=["--disable-blink-features=AutomationControlled", "--disable-dev-shm-usage"])
+        try:
+            await asyncio.gather(*(run_context(browser, f"context {i}", queue, year, on_rows, on_done, target, catalogue) for i in range(min(contexts, len(numbers)))))
+        finally:
+            await browser.close()
+    elapsed = time.time() - started
+    rate = len(numbers) / elapsed if elapsed > 0 else 0.0
+    print(f"📊 Playwright engine: {len(numbers)} numbers in {elapsed:.1f}s ({rate:.2f} cases/sec, {contexts} contexts)")
+
+def run_playwright_engine(numbers, year, on_rows, target, catalogue, on_done=None, contexts=None):
+    return asyncio.run(query_numbers(numbers, year, on_rows, target, catalogue, on_done, contexts))
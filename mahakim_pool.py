@@ -0,0 +1,74 @@
+# mahakim_pool.py
+# Worker pool that runs several Chrome sessions against the shared work queue
+import time
+import queue
+import multiprocessing as mp
+import mahakim_metrics
+
+def print_summary(stats, started):
+    total_elapsed = time.time() - started
+    print("\n=== Worker pool summary ===")
+    total_done = 0
+    total_rows = 0
+    for worker_id in sorted(stats):
+        s = stats[worker_id]
+        elapsed = (s["finished"] or time.time()) - (s["ready"] or started)
+        rate = s["done"] / elapsed if elapsed > 0 else 0.0
+        total_done += s["done"]
+        total_rows += s["rows"]
+        print(f"👷 Worker {worker_id}: {s['done']} numbers, {s['hits']} hits, {s['rows']} rows, {rate:.2f} cases/sec, setup {s['setup']:.1f}s{' ❌ ' + s['error'] if s['error'] else ''}")
+    rate = total_done / total_elapsed if total_elapsed > 0 else 0.0
+    print(f"📊 Total: {total_done} numbers, {total_rows} rows in {total_elapsed:.1f}s ({rate:.2f} cases/sec)")
+
+def run_pool(worker, workers, on_rows, on_done=None, shared_factory=None):
+    # Workers lease their numbers from the queue themselves; the parent is the only
+    # process writing results, and reports each finished number through on_done.
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    extra_args = (shared_factory(ctx, workers),) if shared_factory else ()
+    started = time.time()
+    stats = {}
+    procs = {}
+    for worker_id in range(workers):
+        stats[worker_id] = {"done": 0, "hits": 0, "rows": 0, "ready": None, "setup": 0.0, "finished": None, "error": ""}
+        p = ctx.Process(target=worker, args=(worker_id, results) + extra_args, daemon=True)
+        p.start()
+        procs[worker_id] = p
+    print(f"🚀 Started {len(procs)} workers")
+    try:
+        while True:
+            try:
+                kind, worker_id, payload = results.get(timeout=1)
+            except queue.Empty:
+                for worker_id, p in procs.items():
+                    s = stats[worker_id]
+                    if not p.is_alive() and s["finished"] is None:
+                        s["finished"] = time.time()
+                        if p.exitcode:
+                            s["error"] = f"exited with code {p.exitcode}"
+                            print(f"❌ Worker {worker_id} stopped early ({s['error']})")
+                if all(not p.is_alive() for p in procs.values()):
+                    break
+                continue
+            s = stats[worker_id]
+            if kind == "ready":
+                s["ready"] = time.time()
+                s["setup"] = s["ready"] - started
+                print(f"👷 Worker {worker_id} ready after {s['setup']:.1f}s")
+            elif kind == "rows":
+                s["hits"] += 1
+                s["rows"] += len(payload)
+                on_rows(payload)
+            elif kind == "count":
+                mahakim_metrics.count(*payload)
+            elif kind == "done":
+                s["done"] += 1
+                if on_done:
+                    on_done(*payload)
+    finally:
+        for p in procs.values():
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        print_summary(stats, started)
+    return stats
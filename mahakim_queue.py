@@ -0,0 +1,172 @@
+# mahakim_queue.py
+# SQLite work queue: one row per (station, year, number) with its state, attempts and lease,
+# so workers can lease and commit numbers atomically and a run resumes instantly
+import sys
+import time
+import sqlite3
+
+STATES = ("pending", "in_progress", "no_results", "has_data", "failed", "skipped")
+DONE_STATES = ("no_results", "has_data")
+LEASE_SECONDS = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work (
+    station TEXT NOT NULL,
+    year TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    rows INTEGER NOT NULL DEFAULT 0,
+    leased_by TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (station, year, number)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS work_state ON work (station, year, state, number);
+"""
+
+def open_queue(path, check_same_thread=True):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def transaction(conn, fn):
+    # BEGIN IMMEDIATE takes the write lock up front, so two workers never lease the same number.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        result = fn()
+        conn.execute("COMMIT")
+        return result
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+def seed(conn, station, year, start_n, end_n):
+    # The whole range is offered every time: numbers already tracked are ignored, so re-seeding never
+    # resets state, and a lower start than an earlier run's still gets its numbers added.
+    def insert():
+        now = time.time()
+        cur = conn.executemany(
+            "INSERT OR IGNORE INTO work (station, year, number, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            ((station, year, n, now, now) for n in range(start_n, end_n + 1)))
+        return max(0, cur.rowcount)
+    return transaction(conn, insert)
+
+def tracked(conn, station, year):
+    return conn.execute("SELECT COUNT(*) FROM work WHERE station = ? AND year = ?", (station, year)).fetchone()[0]
+
+def owned(worker_prefix):
+    # substr rather than LIKE: node names may contain "_" or "%", which LIKE would treat as wildcards.
+    return "substr(leased_by, 1, length(?)) = ?", (worker_prefix, worker_prefix)
+
+def recover(conn, station, year, worker_prefix=None):
+    # Expired leases go back to pending, and so do the ones under this run's own prefix (left behind by
+    # a crash on this machine). A live lease held by anyone else - another process, a coordinator node -
+    # is left alone; it goes back to pending by itself once it expires.
+    now = time.time()
+    where, args = owned(worker_prefix) if worker_prefix else ("0", ())
+    cur = conn.execute(
+        "UPDATE work SET state = 'pending', leased_by = NULL, lease_until = NULL, updated_at = ? "
+        f"WHERE station = ? AND year = ? AND state = 'in_progress' AND (lease_until < ? OR {where})",
+        (now, station, year, now) + args)
+    return cur.rowcount
+
+def requeue_failed(conn, station, year):
+    cur = conn.execute(
+        "UPDATE work SET state = 'pending', updated_at = ? WHERE station = ? AND year = ? AND state = 'failed'",
+        (time.time(), station, year))
+    return cur.rowcount
+
+def lease(conn, station, year, worker, count=1, retry_failed=False, lease_seconds=LEASE_SECONDS):
+    # In retry mode only numbers that were already tried (requeued failures, crashed leases)
+    # are handed out, so a number that fails again is not retried forever within one run.
+    min_attempts = 1 if retry_failed else 0
+    def take():
+        now = time.time()
+        numbers = [r[0] for r in conn.execute(
+            "SELECT number FROM work WHERE station = ? AND year = ? AND state = 'pending' AND attempts >= ? "
+            "UNION SELECT number FROM work WHERE station = ? AND year = ? AND state = 'in_progress' AND lease_until < ? "
+            "ORDER BY number LIMIT ?",
+            (station, year, min_attempts, station, year, now, -1 if count is None else count))]
+        conn.executemany(
+            "UPDATE work SET state = 'in_progress', leased_by = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? WHERE station = ? AND year = ? AND number = ?",
+            ((worker, now + lease_seconds, now, station, year, n) for n in numbers))
+        return numbers
+    return transaction(conn, take)
+
+def commit(conn, station, year, number, status, rows, worker_prefix):
+    # Fenced like commit_leased, but on the run's prefix: the parent commits for all of its workers.
+    # A number that has since been handed to someone else keeps that holder's lease.
+    state = status if status in DONE_STATES else "failed"
+    where, args = owned(worker_prefix)
+    cur = conn.execute(
+        "UPDATE work SET state = ?, rows = ?, leased_by = NULL, lease_until = NULL, updated_at = ? "
+        f"WHERE station = ? AND year = ? AND number = ? AND state = 'in_progress' AND {where}",
+        (state, rows, time.time(), station, year, number) + args)
+    return state if cur.rowcount else None
+
+def holds(conn, station, year, number, worker):
+    return conn.execute(
+        "SELECT 1 FROM work WHERE station = ? AND year = ? AND number = ? AND state = 'in_progress' AND leased_by = ? AND lease_until >= ?",
+        (station, year, number, worker, time.time())).fetchone() is not None
+
+def commit_leased(conn, station, year, number, status, rows, worker):
+    # Fenced commit: only the holder of a live lease can finish a number, so a worker whose lease
+    # expired never overwrites the result of the worker the number was handed to next.
+    state = status if status in DONE_STATES else "failed"
+    now = time.time()
+    cur = conn.execute(
+        "UPDATE work SET state = ?, rows = ?, leased_by = NULL, lease_until = NULL, updated_at = ? "
+        "WHERE station = ? AND year = ? AND number = ? AND state = 'in_progress' AND leased_by = ? AND lease_until >= ?",
+        (state, rows, now, station, year, number, worker, now))
+    return state if cur.rowcount else None
+
+def skip(conn, station, year, numbers):
+    # Numbers ruled out by dead-range detection were never queried: they are parked as skipped, not
+    # recorded as empty, and the next run puts them back (unskip) in case the tail has filled up since.
+    now = time.time()
+    transaction(conn, lambda: conn.executemany(
+        "UPDATE work SET state = 'skipped', leased_by = NULL, lease_until = NULL, updated_at = ? "
+        "WHERE station = ? AND year = ? AND number = ? AND state IN ('pending', 'in_progress')",
+        ((now, station, year, n) for n in numbers)))
+
+def unskip(conn, station, year):
+    cur = conn.execute(
+        "UPDATE work SET state = 'pending', updated_at = ? WHERE station = ? AND year = ? AND state = 'skipped'",
+        (time.time(), station, year))
+    return cur.rowcount
+
+def outstanding(conn, station, year):
+    return conn.execute(
+        "SELECT COUNT(*) FROM work WHERE station = ? AND year = ? AND state IN ('pending', 'in_progress')",
+        (station, year)).fetchone()[0]
+
+def counts(conn, station=None, year=None):
+    query = "SELECT station, year, state, COUNT(*), SUM(attempts), MAX(updated_at) FROM work"
+    args = ()
+    if station is not None:
+        query += " WHERE station = ? AND year = ?"
+        args = (station, year)
+    return conn.execute(query + " GROUP BY station, year, state ORDER BY station, year, state", args).fetchall()
+
+def print_status(conn, station=None, year=None):
+    totals = {}
+    for st, yr, state, count, attempts, updated in counts(conn, station, year):
+        totals.setdefault((st, yr), {})[state] = (count, attempts or 0, updated)
+    for (st, yr), states in totals.items():
+        total = sum(c for c, _, _ in states.values())
+        done = sum(states.get(s, (0, 0, 0))[0] for s in DONE_STATES)
+        last = max(u for _, _, u in states.values())
+        print(f"📋 {st} / {yr}: {done}/{total} done, last update {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last))}")
+        for state in STATES:
+            if state in states:
+                print(f"   {state}: {states[state][0]} ({states[state][1]} attempts)")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python mahakim_queue.py <queue.sqlite>")
+        sys.exit(1)
+    print_status(open_queue(sys.argv[1]))
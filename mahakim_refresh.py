@@ -0,0 +1,214 @@
+# mahakim_refresh.py
+# Incremental refresh: a content hash and last-seen time per queried number, a priority schedule
+# (recent numbers, uncertain outcomes, cases with pending actions, stale checks) under a query
+# budget, and an exact report of the rows that changed since the previous visit
+import sys
+import json
+import math
+import time
+import hashlib
+import mahakim_queue
+import mahakim_writer
+
+DECISIVE = ("no_results", "has_data")
+UNCERTAIN = ("possible_data", "unknown", "loading", "error")
+# Actions after which a case is not expected to move any more; anything else counts as pending.
+SETTLED_ACTIONS = ("حفظ", "حكم")
+WEIGHTS = {"uncertain": 3.0, "pending": 2.0, "recent": 2.0, "stale": 1.0}
+RECENT_SPAN = 200
+STALE_DAYS = 30
+MIN_REVISIT = 12 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    station TEXT NOT NULL,
+    year TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    hash TEXT,
+    rows TEXT,
+    pending INTEGER NOT NULL DEFAULT 0,
+    checks INTEGER NOT NULL DEFAULT 0,
+    changes INTEGER NOT NULL DEFAULT 0,
+    checked_at REAL NOT NULL,
+    changed_at REAL,
+    PRIMARY KEY (station, year, number)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS changes (
+    station TEXT NOT NULL,
+    year TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    case_number TEXT NOT NULL,
+    file_number TEXT NOT NULL,
+    before TEXT,
+    after TEXT,
+    detected_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS changes_time ON changes (detected_at);
+"""
+
+def install(conn):
+    conn.executescript(SCHEMA)
+
+def clean_rows(rows):
+    return [{field: str(row.get(field, "")) for field in mahakim_writer.ROW_FIELDS} for row in rows]
+
+def content_hash(rows):
+    # Order-independent, so a re-sorted results table is not a change.
+    keys = sorted(json.dumps([row[f] for f in mahakim_writer.ROW_FIELDS], ensure_ascii=False) for row in rows)
+    return hashlib.sha1("\n".join(keys).encode("utf-8")).hexdigest()
+
+def pending_actions(rows):
+    return sum(1 for row in rows if not any(word in row["action"] for word in SETTLED_ACTIONS))
+
+def identity(row):
+    return row["case_number"], row["file_number"]
+
+def diff_rows(old, new):
+    old_by = {identity(row): row for row in old}
+    new_by = {identity(row): row for row in new}
+    changes = []
+    for key, row in new_by.items():
+        if key not in old_by:
+            changes.append(("added", key, None, row))
+        elif old_by[key] != row:
+            changes.append(("changed", key, old_by[key], row))
+    for key, row in old_by.items():
+        if key not in new_by:
+            changes.append(("removed", key, row, None))
+    return changes
+
+def describe_change(kind, before, after):
+    if kind == "changed":
+        fields = [f"{f} '{before[f]}' → '{after[f]}'" for f in mahakim_writer.ROW_FIELDS if before[f] != after[f]]
+        return ", ".join(fields)
+    row = after or before
+    return f"{row['action']} / {row['subject']}"
+
+def observe(conn, station, year, number, status, rows):
+    # Only a decisive answer replaces the stored content; a transient failure just marks the number uncertain.
+    now = time.time()
+    previous = conn.execute("SELECT hash, rows FROM seen WHERE station = ? AND year = ? AND number = ?", (station, year, number)).fetchone()
+    if status not in DECISIVE:
+        conn.execute(
+            "INSERT INTO seen (station, year, number, status, checks, checked_at) VALUES (?, ?, ?, ?, 1, ?) "
+            "ON CONFLICT (station, year, number) DO UPDATE SET status = excluded.status, checks = checks + 1, checked_at = excluded.checked_at",
+            (station, year, number, status, now))
+        return []
+    rows = clean_rows(rows)
+    digest = content_hash(rows)
+    changes = []
+    if previous and previous[0] is not None and previous[0] != digest:
+        changes = diff_rows(json.loads(previous[1]), rows)
+    def save():
+        conn.execute(
+            "INSERT INTO seen (station, year, number, status, hash, rows, pending, checks, checked_at, changed_at) VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?) "
+            "ON CONFLICT (station, year, number) DO UPDATE SET status = excluded.status, hash = excluded.hash, rows = excluded.rows, "
+            "pending = excluded.pending, checks = checks + 1, changes = changes + ?, checked_at = excluded.checked_at, "
+            "changed_at = COALESCE(excluded.changed_at, changed_at)",
+            (station, year, number, status, digest, json.dumps(rows, ensure_ascii=False), pending_actions(rows), now, now if changes else None, 1 if changes else 0))
+        conn.executemany(
+            "INSERT INTO changes (station, year, number, kind, case_number, file_number, before, after, detected_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((station, year, number, kind, key[0], key[1], json.dumps(before, ensure_ascii=False) if before else None,
+              json.dumps(after, ensure_ascii=False) if after else None, now) for kind, key, before, after in changes))
+    mahakim_queue.transaction(conn, save)
+    for kind, key, before, after in changes:
+        print(f"🔁 [{kind.upper()}] {number}/{year} {key[0]} ({key[1]}): {describe_change(kind, before, after)}")
+    return changes
+
+def station_of(target, default):
+    # Campaign rows carry "court > ... > station / year"; single-station rows carry nothing.
+    return target.split(" / ")[0].split(" > ")[-1] if target else default
+
+def import_baseline(conn, station, year, output_xlsx):
+    # Numbers finished before hashes were kept get their baseline from the queue state and the result shards,
+    # so their first revisit can already report changes.
+    missing = {n: state for n, state in conn.execute(
+        "SELECT w.number, w.state FROM work w LEFT JOIN seen s ON s.station = w.station AND s.year = w.year AND s.number = w.number "
+        "WHERE w.station = ? AND w.year = ? AND w.state IN ('no_results', 'has_data') AND s.number IS NULL", (station, year))}
+    if not missing:
+        return 0
+    found = {}
+    if any(state == "has_data" for state in missing.values()):
+        for path in mahakim_writer.list_shards(mahakim_writer.shard_dir(output_xlsx)):
+            for record in mahakim_writer.read_shard(path):
+                row = dict(zip(mahakim_writer.FIELDS, (str(v) for v in record)))
+                if row["queried_annee"] == year and row["queried_numero"].isdigit() and station_of(row["target"], station) == station:
+                    found.setdefault(int(row["queried_numero"]), []).append(row)
+    now = time.time()
+    items = []
+    for n, state in missing.items():
+        if state == "has_data" and n not in found:
+            continue
+        rows = clean_rows(found.get(n, []))
+        items.append((station, year, n, state, content_hash(rows), json.dumps(rows, ensure_ascii=False), pending_actions(rows), now))
+    mahakim_queue.transaction(conn, lambda: conn.executemany(
+        "INSERT OR IGNORE INTO seen (station, year, number, status, hash, rows, pending, checked_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", items))
+    return len(items)
+
+def score(number, status, pending, checked_at, frontier, now):
+    parts = {
+        "uncertain": 1.0 if status in UNCERTAIN or status == "failed" else 0.0,
+        "pending": 1.0 if pending else 0.0,
+        # New cases land at and above the highest number with data, so closeness to it decays with distance.
+        "recent": math.exp(-max(0, frontier - number) / RECENT_SPAN),
+        "stale": min(1.0, (now - checked_at) / (STALE_DAYS * 86400)),
+    }
+    return sum(WEIGHTS[k] * v for k, v in parts.items()), max(parts, key=lambda k: WEIGHTS[k] * parts[k])
+
+def plan(conn, keys, budget, output_xlsx=None, min_revisit=MIN_REVISIT):
+    # Puts the highest-priority finished numbers back to pending; every engine then leases them as usual.
+    now = time.time()
+    candidates = []
+    for station, year in keys:
+        if output_xlsx:
+            imported = import_baseline(conn, station, year, output_xlsx)
+            if imported:
+                print(f"🔁 {station} / {year}: baseline imported for {imported} numbers")
+        frontier = conn.execute(
+            "SELECT MAX(number) FROM work WHERE station = ? AND year = ? AND state = 'has_data'", (station, year)).fetchone()[0] or 0
+        for n, state, updated, status, pending, checked in conn.execute(
+                "SELECT w.number, w.state, w.updated_at, s.status, s.pending, s.checked_at FROM work w "
+                "LEFT JOIN seen s ON s.station = w.station AND s.year = w.year AND s.number = w.number "
+                "WHERE w.station = ? AND w.year = ? AND w.state IN ('no_results', 'has_data', 'failed')", (station, year)):
+            status = status or state
+            checked = checked or updated
+            if now - checked < min_revisit and status in DECISIVE:
+                continue
+            value, reason = score(n, status, pending, checked, frontier, now)
+            candidates.append((value, station, year, n, reason))
+    candidates.sort(reverse=True)
+    picked = candidates[:budget]
+    mahakim_queue.transaction(conn, lambda: conn.executemany(
+        "UPDATE work SET state = 'pending', leased_by = NULL, lease_until = NULL, updated_at = ? WHERE station = ? AND year = ? AND number = ?",
+        ((now, station, year, n) for _, station, year, n, _ in picked)))
+    reasons = {}
+    for item in picked:
+        reasons[item[4]] = reasons.get(item[4], 0) + 1
+    print(f"🔁 Refresh: {len(picked)} of {len(candidates)} candidate numbers scheduled (budget {budget})"
+          + (" - " + ", ".join(f"{k} {v}" for k, v in sorted(reasons.items(), key=lambda kv: -kv[1])) if reasons else ""))
+    return len(picked)
+
+def print_changes(conn, since=0):
+    items = conn.execute(
+        "SELECT station, year, number, kind, case_number, file_number, before, after FROM changes WHERE detected_at >= ? "
+        "ORDER BY station, year, number, kind", (since,)).fetchall()
+    if not items:
+        return 0
+    print(f"\n=== Changed rows ({len(items)}) ===")
+    for station, year, number, kind, case_number, file_number, before, after in items:
+        before = json.loads(before) if before else None
+        after = json.loads(after) if after else None
+        print(f"🔁 {station} / {year} #{number} {kind} {case_number} ({file_number}): {describe_change(kind, before, after)}")
+    return len(items)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python mahakim_refresh.py <queue.sqlite> [hours back, default 24]")
+        sys.exit(1)
+    conn = mahakim_queue.open_queue(sys.argv[1])
+    install(conn)
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 24
+    if not print_changes(conn, time.time() - hours * 3600):
+        print(f"No changed rows in the last {hours:g} hours")
@@ -0,0 +1,564 @@
+# mahakim_scraper.py
+# The Selenium scraper shared by both launchers: form setup, search, detection, the single,
+# pool, HTTP and campaign runs. What used to differ between Alfa and Beta is a profile option
+import os
+import time
+import functools
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+import mahakim_config
+from mahakim_config import *
+import mahakim_writer
+import mahakim_extract
+import mahakim_capture
+import mahakim_waits
+import mahakim_throttle
+import mahakim_discovery
+import mahakim_queue
+import mahakim_campaign
+import mahakim_catalogue
+import mahakim_health
+import mahakim_lean
+import mahakim_metrics
+import mahakim_refresh
+
+def configure(profile=None, **overrides):
+    # Settings are read as module globals below, so they are copied in again after every change.
+    globals().update(mahakim_config.configure(profile, **overrides))
+
+def say(message):
+    if VERBOSE:
+        print(message)
+
+def traffic_meter():
+    # Each traffic reading is an extra get_log round trip per query, paid only when lean mode or live metrics want it.
+    return mahakim_lean.read_traffic if LEAN or METRICS_PORT else None
+
+def init_driver():
+    options = webdriver.ChromeOptions()
+    if HEADLESS:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.page_load_strategy = 'eager'
+    # Network capture reads its events from the same log.
+    if traffic_meter() or DETECTION == "network":
+        mahakim_lean.enable_traffic_log(options)
+    if LEAN:
+        mahakim_lean.lean_options(options)
+    driver = mahakim_lean.start_chrome(options, DRIVER_CACHE)
+    driver.set_page_load_timeout(90)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    if LEAN:
+        mahakim_lean.block_resources(driver, LEAN_BLOCK_CSS)
+    if DETECTION == "network":
+        mahakim_capture.enable(driver)
+    return driver
+
+def read_progress():
+    # Alfa kept a bare number in the file, Beta appends step notes and "PROGRESS: n" lines.
+    if os.path.exists(PROGRESS_FILE):
+        try:
+            with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
+                lines = [line.strip() for line in f if line.strip()]
+            for line in reversed(lines):
+                if line.startswith("PROGRESS:"):
+                    return int(line.replace("PROGRESS:", "").strip())
+            return int(lines[-1]) if lines and lines[-1].isdigit() else None
+        except (OSError, ValueError):
+            return None
+    return None
+
+def write_progress(n, info=""):
+    with open(PROGRESS_FILE, "a", encoding="utf-8") as f:
+        if info:
+            f.write(info + "\n")
+        f.write(f"PROGRESS: {n}\n")
+
+def log_step(info):
+    if STEP_LOG:
+        write_progress(0, info)
+
+def js_click(driver, element):
+    driver.execute_script("arguments[0].click();", element)
+
+def safe_find(driver, by, value, timeout=10):
+    wait = WebDriverWait(driver, timeout)
+    return wait.until(EC.element_to_be_clickable((by, value)))
+
+def wait_for_results(driver, timeout=10, year=None):
+    return mahakim_waits.wait_for(driver, "results", mahakim_waits.RESULTS_READY, timeout, require_change=True, year=year or YEAR)
+
+def fill_case_details(driver, case_number, year):
+    say(f"🔎 Searching case {case_number}/{year}...")
+    with mahakim_metrics.timed("fill"):
+        wait = WebDriverWait(driver, 10)
+        container_xpath = "//div[contains(@class, 'three-inputs')]"
+        container = wait.until(EC.presence_of_element_located((By.XPATH, container_xpath)))
+        numero_input = container.find_element(By.XPATH, ".//input[@formcontrolname='numero' and contains(@class, 'right')]")
+        annee_input = container.find_element(By.XPATH, ".//input[@formcontrolname='annee' and contains(@class, 'left')]")
+        numero_input.clear()
+        numero_input.send_keys(str(case_number))
+        annee_input.clear()
+        annee_input.send_keys(str(year))
+        mahakim_waits.arm_changes(driver)
+        if DETECTION == "network" and mahakim_capture.active(driver):
+            mahakim_capture.arm(driver)
+        annee_input.send_keys(Keys.ENTER)
+    if DETECTION == "network" and mahakim_capture.active(driver):
+        # The answer is taken from the search response, so nothing waits for the table to render here.
+        return True
+    if wait_for_results(driver, 10, year):
+        say("  ✅ Results loaded")
+    else:
+        say("  ⚠️  Results timeout")
+    return True
+
+def robust_table_detection(driver, case_number, year=None):
+    year = year or YEAR
+    print(f"\n Checking for data in case {case_number}...")
+    try:
+        no_results = driver.find_elements(By.XPATH, "//p[contains(text(), 'لا توجد أية نتيجة للبحث')]")
+        if no_results:
+            for element in no_results:
+                if element.is_displayed():
+                    return "no_results", []
+    except Exception: pass
+    try:
+        table = driver.find_element(By.ID, "pr_id_16-table")
+        if table.is_displayed():
+            with mahakim_metrics.timed("parse"):
+                data = parse_table_by_element(table, case_number, year)
+            if data:
+                return "has_data", data
+    except Exception: pass
+    try:
+        all_tables = driver.find_elements(By.TAG_NAME, "table")
+        for table in all_tables:
+            if table.is_displayed():
+                with mahakim_metrics.timed("parse"):
+                    data = parse_table_by_element(table, case_number, year)
+                if data:
+                    return "has_data", data
+    except Exception: pass
+    try:
+        case_elements = driver.find_elements(By.XPATH, f"//*[contains(text(), '/') and contains(text(), '{year}')]")
+        if case_elements:
+            return "possible_data", []
+    except Exception: pass
+    try:
+        loading = driver.find_elements(By.XPATH, "//*[contains(text(), 'جاري') or contains(text(), 'تحميل') or contains(text(), 'loading')]")
+        if loading:
+            return "loading", []
+    except Exception: pass
+    return "unknown", []
+
+def parse_table_by_element(table_element, case_number, year=None):
+    # A row that goes stale mid-read is skipped rather than failing the whole table.
+    data_rows = []
+    for row in table_element.find_elements(By.TAG_NAME, "tr"):
+        try:
+            if not row.is_displayed():
+                continue
+            cells = row.find_elements(By.TAG_NAME, "td")
+            if len(cells) == 6 and not any(cell.get_attribute("colspan") for cell in cells):
+                row_data = {
+                    "case_number": cells[0].text.strip(),
+                    "action": cells[1].text.strip(),
+                    "type": cells[2].text.strip(),
+                    "subject": cells[3].text.strip(),
+                    "file_number": cells[4].text.strip(),
+                    "more_info": cells[5].text.strip(),
+                    "queried_numero": case_number,
+                    "queried_annee": year or YEAR
+                }
+                if row_data["case_number"] and '/' in row_data["case_number"]:
+                    data_rows.append(row_data)
+        except Exception:
+            continue
+    return data_rows
+
+def detect_page(driver, case_number, year=None):
+    year = year or YEAR
+    if DETECTION in ("js", "network"):
+        return mahakim_extract.extract_results(driver, case_number, year)
+    if DETECTION == "dom":
+        return robust_table_detection(driver, case_number, year)
+    check_detection()
+
+def check_detection():
+    # Checked before a run: inside scrape_number an unknown mode would only show up as every number failing.
+    if DETECTION not in DETECTIONS:
+        raise ValueError(f"Unknown detection '{DETECTION}', expected one of {list(DETECTIONS)}")
+
+def check_sweep():
+    # Dead-range detection lives in the single-browser sweep (and campaigns); the http, playwright and
+    # pool paths would quietly query the whole range, so the combination is refused up front.
+    if CAMPAIGN_FILE or REFRESH or not (DISCOVER_END or STOP_AFTER_EMPTY):
+        return
+    if ENGINE in ("http", "playwright") or WORKERS > 1:
+        path = f"the {ENGINE} engine" if ENGINE in ("http", "playwright") else f"{WORKERS} workers"
+        raise ValueError(f"--discover-end and --stop-after-empty only work with a single Selenium browser, not with {path}")
+
+def detect_results(driver, case_number, year=None):
+    year = year or YEAR
+    if DETECTION == "network" and mahakim_capture.active(driver):
+        captured = mahakim_capture.capture_results(driver, case_number, year)
+        if captured:
+            return captured
+        # No matching response (or one that cannot be decoded): the rendered table is read instead.
+        mahakim_metrics.count("capture_fallbacks")
+        wait_for_results(driver, 10, year)
+    status, rows = detect_page(driver, case_number, year)
+    if status == "has_data":
+        rows = mahakim_extract.collect_pages(driver, rows, lambda: detect_page(driver, case_number, year)[1])[0]
+    return status, rows
+
+def apply_target(driver, previous, target, catalogue=None):
+    return mahakim_campaign.apply_target(driver, TARGET_URL, previous, target, catalogue, SNAPSHOT_FILE if WARM_START else "", SNAPSHOT_TTL)
+
+CATALOGUE = {}
+
+def form_catalogue(driver=None):
+    # Loaded once per process; a missing or expired one is crawled, in a throwaway browser when no session is given.
+    if not CATALOGUE:
+        catalogue = None if CATALOGUE_REFRESH else mahakim_catalogue.load_catalogue(CATALOGUE_FILE, CATALOGUE_TTL)
+        if catalogue is None:
+            browser = driver or init_driver()
+            try:
+                catalogue = mahakim_catalogue.get_catalogue(browser, TARGET_URL, CATALOGUE_FILE, CATALOGUE_TTL, True)
+            finally:
+                if driver is None:
+                    mahakim_health.quit_quietly(browser)
+            # Workers started after this read the fresh file instead of crawling again.
+            configure(CATALOGUE_REFRESH=False)
+        CATALOGUE.update(catalogue)
+    return CATALOGUE
+
+def check_target():
+    catalogue = form_catalogue()
+    mahakim_catalogue.validate_targets(catalogue, [mahakim_campaign.configured_target(catalogue)])
+
+def setup_filters(driver):
+    # The profile's choice lists are resolved against the catalogue first, so the warm-start snapshot is
+    # keyed on the form actually selected - form_key(target), the same key campaign targets use.
+    catalogue = form_catalogue(driver)
+    target = mahakim_campaign.configured_target(catalogue)
+    for attempt in range(SETUP_RETRIES):
+        try:
+            apply_target(driver, None, target, catalogue)
+            break
+        except TimeoutException:
+            if attempt == SETUP_RETRIES - 1:
+                raise
+    log_step("=== Form setup ===\n" + "\n".join(f"✓ {level}: {target[level]}" for level in mahakim_catalogue.LEVELS))
+
+def scrape_number(session, n, on_rows, throttle, year=None, reselect=None):
+    year = year or YEAR
+    attempt = 0
+    success = False
+    status = "unknown"
+    mahakim_metrics.set_context(number=n, year=year)
+    while not success and attempt < RETRIES:
+        attempt += 1
+        if attempt > 1:
+            mahakim_metrics.count("retries")
+        try:
+            with mahakim_metrics.timed("delay"):
+                throttle.wait()
+            driver = session.driver
+            started = time.time()
+            fill_case_details(driver, n, year)
+            with mahakim_metrics.timed("detect"):
+                status, rows_data = detect_results(driver, n, year)
+            throttle.record(status, time.time() - started)
+            session.record(status, time.time() - started)
+            if status == "no_results":
+                say(f"🚫 [NO RESULTS] {n}")
+                success = True
+            elif status == "has_data" and rows_data:
+                on_rows(rows_data)
+                say(f"✅ [FOUND] {n} -> {len(rows_data)} rows")
+                success = True
+            elif status == "possible_data":
+                say(f"🔍 [POSSIBLE DATA] {n}")
+                if attempt == RETRIES:
+                    success = True
+            elif status == "loading":
+                say(f"⏳ [STILL LOADING] {n} - Retrying...")
+                time.sleep(LOADING_SLEEP)
+            else:
+                say(f"❓ [UNKNOWN: {status}] {n}")
+                if attempt == RETRIES:
+                    success = True
+        except Exception as e:
+            mahakim_metrics.count("exceptions")
+            throttle.record("error", error=True)
+            session.record("error", error=True)
+            say(f"Error {n}: {e}")
+            if RELOAD_ON_ERROR:
+                time.sleep(2)
+                # Before the last attempt the form is rebuilt, in case the page itself went bad.
+                if attempt == RETRIES - 1:
+                    try:
+                        if reselect:
+                            reselect()
+                        else:
+                            setup_filters(session.driver)
+                    except Exception as e:
+                        say(f"Reload failed {n}: {e}")
+    return status
+
+def lease_owner(role=""):
+    # Every lease this machine takes starts with "<NODE_NAME>/", so a restart can take back what a crashed
+    # run left behind without touching leases held elsewhere (coordinator leases are "<node>#<id>").
+    return f"{NODE_NAME}/{role}"
+
+def pool_worker(config, worker_id, results, shared=None):
+    # Spawned workers import this module afresh, so the parent's settings travel with them.
+    configure(**config)
+    throttle = mahakim_throttle.make_throttle(THROTTLE, f"worker {worker_id}", MIN_DELAY, MAX_DELAY, shared, verbose=VERBOSE)
+    mahakim_metrics.open_log(METRICS_LOG, worker=f"worker-{worker_id}")
+    mahakim_metrics.forward_to(lambda name, n: results.put(("count", worker_id, (name, n))))
+    conn = mahakim_queue.open_queue(QUEUE_DB)
+    session = mahakim_health.Supervisor(f"worker {worker_id}", init_driver, setup_filters, RECYCLE_AFTER, meter=traffic_meter())
+    try:
+        results.put(("ready", worker_id, None))
+        while True:
+            numbers = mahakim_queue.lease(conn, STATION, YEAR, lease_owner(f"worker-{worker_id}"), LEASE_BATCH, RETRY_FAILED)
+            if not numbers:
+                break
+            for n in numbers:
+                found = []
+                status = scrape_number(session, n, found.extend, throttle)
+                if found:
+                    results.put(("rows", worker_id, found))
+                results.put(("done", worker_id, (STATION, YEAR, n, status, found)))
+    finally:
+        session.close()
+        conn.close()
+        mahakim_waits.print_wait_summary()
+        mahakim_metrics.print_stage_summary()
+        mahakim_metrics.close_log()
+
+def node_worker(config, url, worker_id, results, shared=None):
+    # A coordinator node: leases come over HTTP instead of from the local queue, results go back the same way.
+    configure(**config)
+    name = f"{NODE_NAME}-{worker_id}"
+    throttle = mahakim_throttle.make_throttle(THROTTLE, name, MIN_DELAY, MAX_DELAY, shared, verbose=VERBOSE)
+    mahakim_metrics.open_log(METRICS_LOG, worker=name)
+    mahakim_metrics.forward_to(lambda metric, n: results.put(("count", worker_id, (metric, n))))
+    session = mahakim_health.Supervisor(name, init_driver, lambda driver: None, RECYCLE_AFTER, meter=traffic_meter())
+    current = {"key": None, "target": None}
+    def on_target(lease):
+        key = (lease["station"], lease["year"])
+        if key == current["key"]:
+            return
+        current["key"] = None
+        target = lease["target"]
+        if target:
+            apply_target(session.driver, current["target"], target)
+            session.retarget(lambda driver: apply_target(driver, None, target))
+        else:
+            configure(STATION=lease["station"], YEAR=lease["year"])
+            setup_filters(session.driver)
+            session.retarget(setup_filters)
+        current.update(key=key, target=target)
+    def query(n, lease):
+        found = []
+        status = scrape_number(session, n, found.extend, throttle, lease["year"], lambda: session.setup(session.driver))
+        if lease["target"]:
+            for row in found:
+                row["target"] = mahakim_campaign.target_label(lease["target"])
+        if found:
+            results.put(("rows", worker_id, found))
+        results.put(("done", worker_id, (n, status)))
+        return status, found
+    try:
+        results.put(("ready", worker_id, None))
+        import mahakim_coordinator
+        mahakim_coordinator.run_node(url, name, query, on_target)
+    finally:
+        session.close()
+        mahakim_waits.print_wait_summary()
+        mahakim_metrics.print_stage_summary()
+        mahakim_metrics.close_log()
+
+def run_node(url):
+    import mahakim_pool
+    import mahakim_memory
+    check_detection()
+    # Leased targets are resolved against the catalogue when they arrive; it is made ready once here, not per worker.
+    form_catalogue()
+    mahakim_metrics.open_log(METRICS_LOG, worker=NODE_NAME)
+    mahakim_memory.start_sampler("selenium", WORKERS)
+    try:
+        mahakim_pool.run_pool(functools.partial(node_worker, mahakim_config.settings(), url), WORKERS, lambda rows: None,
+                              lambda n, status: mahakim_metrics.done(status, n),
+                              lambda ctx, workers: mahakim_throttle.shared_state(ctx, MIN_DELAY, MAX_DELAY, workers))
+    finally:
+        mahakim_memory.print_memory(mahakim_memory.stop_sampler())
+        mahakim_metrics.close_log()
+
+def open_work_queue():
+    conn = mahakim_queue.open_queue(QUEUE_DB)
+    mahakim_refresh.install(conn)
+    start_n = START_NUM
+    # A legacy progress.txt only sets where a brand-new queue starts; once numbers are tracked, --start rules.
+    if not mahakim_queue.tracked(conn, STATION, YEAR):
+        start_resume = read_progress()
+        start_n = start_resume + 1 if start_resume else START_NUM
+    added = mahakim_queue.seed(conn, STATION, YEAR, start_n, END_NUM)
+    recovered = mahakim_queue.recover(conn, STATION, YEAR, lease_owner())
+    recovered += mahakim_queue.unskip(conn, STATION, YEAR)
+    requeued = mahakim_queue.requeue_failed(conn, STATION, YEAR) if RETRY_FAILED else 0
+    print(f"📋 Queue {QUEUE_DB}: {added} numbers added, {recovered} interrupted or skipped numbers reopened, {requeued} failed numbers requeued")
+    if REFRESH:
+        mahakim_refresh.plan(conn, [(STATION, YEAR)], REFRESH_BUDGET, OUTPUT_XLSX)
+    mahakim_queue.print_status(conn, STATION, YEAR)
+    mahakim_metrics.expect(mahakim_queue.outstanding(conn, STATION, YEAR))
+    return conn
+
+def run_campaign(conn, writer):
+    targets = mahakim_campaign.load_campaign(CAMPAIGN_FILE)
+    print(f"🎯 Campaign {CAMPAIGN_FILE}: {len(targets)} targets")
+    mahakim_refresh.install(conn)
+    if REFRESH:
+        mahakim_refresh.plan(conn, [(t["station"], t["year"]) for t in targets], REFRESH_BUDGET, OUTPUT_XLSX)
+    catalogue = None if CATALOGUE_REFRESH else mahakim_catalogue.load_catalogue(CATALOGUE_FILE, CATALOGUE_TTL)
+    if catalogue:
+        mahakim_catalogue.validate_targets(catalogue, targets)
+    throttle = mahakim_throttle.make_throttle(THROTTLE, "main", MIN_DELAY, MAX_DELAY, verbose=VERBOSE)
+    session = mahakim_health.Supervisor("main", init_driver, lambda driver: None, RECYCLE_AFTER, meter=traffic_meter())
+    try:
+        if catalogue is None:
+            catalogue = mahakim_catalogue.get_catalogue(session.driver, TARGET_URL, CATALOGUE_FILE, CATALOGUE_TTL, True)
+            mahakim_catalogue.validate_targets(catalogue, targets)
+        def query(n, target):
+            found = []
+            reselect = lambda: apply_target(session.driver, None, target, catalogue)
+            return scrape_number(session, n, found.extend, throttle, target["year"], reselect), found
+        mahakim_campaign.run_campaign(session, TARGET_URL, targets, query, conn, writer, RETRY_FAILED, DISCOVER_END and not REFRESH, 0 if REFRESH else STOP_AFTER_EMPTY, MAIN_LEASE_SECONDS, catalogue,
+                                      SNAPSHOT_FILE if WARM_START else "", SNAPSHOT_TTL, lease_owner("main"))
+    finally:
+        session.close()
+        mahakim_waits.print_wait_summary()
+
+def enrich_setup(target, year):
+    # A detail view is only reachable from the search results, so the session first selects the form
+    # the row was found under, read back from its "court > ... > station / year" label. Rows queued under
+    # the bare STATION by older runs get the configured form; None means the row cannot be placed.
+    catalogue = form_catalogue()
+    if target == STATION:
+        form = mahakim_campaign.configured_target(catalogue)
+    else:
+        levels = target.rsplit(" / ", 1)[0].split(" > ")
+        if len(levels) != len(mahakim_catalogue.LEVELS):
+            return None
+        form = dict(zip(mahakim_catalogue.LEVELS, levels))
+    form["year"] = year
+    try:
+        mahakim_catalogue.resolve_target(catalogue, form)
+    except ValueError:
+        return None
+    return lambda driver: apply_target(driver, None, form, catalogue)
+
+def render_search(driver, case_number, year):
+    # The enricher clicks into the rendered table, so it waits for it whatever the detection mode.
+    fill_case_details(driver, case_number, year)
+    if DETECTION == "network":
+        wait_for_results(driver, 10, year)
+
+def start_enricher(workers=None):
+    import mahakim_enrich
+    return mahakim_enrich.Enricher(DETAILS_DB, workers or ENRICH_WORKERS, init_driver, enrich_setup, render_search,
+                                   lambda name: mahakim_throttle.make_throttle(THROTTLE, name, MIN_DELAY, MAX_DELAY, verbose=VERBOSE), mahakim_campaign.store_form(CATALOGUE), RECYCLE_AFTER)
+
+def run_scraper():
+    # Pool, memory sampler, enricher and store are imported here, so importing this module stays cheap.
+    import mahakim_pool
+    import mahakim_memory
+    import mahakim_store
+    check_detection()
+    check_sweep()
+    mahakim_metrics.open_log(METRICS_LOG, worker="main")
+    if METRICS_PORT:
+        mahakim_metrics.serve_metrics(METRICS_PORT)
+    if not CAMPAIGN_FILE:
+        # Whatever the engine, a court or station the site does not offer fails here, before the first query.
+        check_target()
+    conn = mahakim_queue.open_queue(QUEUE_DB) if CAMPAIGN_FILE else open_work_queue()
+    started = time.time()
+    def commit(station, year, n, status, rows=()):
+        mahakim_refresh.observe(conn, station, year, n, status, rows)
+        if mahakim_queue.commit(conn, station, year, n, status, len(rows), lease_owner()) is None:
+            print(f"⚠️ {station} / {year} / {n}: lease lost to another holder, result not committed")
+        mahakim_metrics.done(status, n)
+    enricher = start_enricher() if ENRICH_WORKERS else None
+    if CAMPAIGN_FILE or ENGINE not in ("http", "playwright"):
+        mahakim_memory.start_sampler("selenium", 1 if CAMPAIGN_FILE else WORKERS)
+    elif ENGINE == "playwright":
+        mahakim_memory.start_sampler(ENGINE, CONTEXTS)
+    else:
+        mahakim_memory.start_sampler(ENGINE, HTTP_CONCURRENCY)
+    writer = mahakim_writer.ShardWriter(OUTPUT_XLSX, OUTPUT_FORMAT, FLUSH_ROWS, FLUSH_SECONDS, commit, enricher.enqueue if enricher else None, VERBOSE)
+    try:
+        if CAMPAIGN_FILE:
+            run_campaign(conn, writer)
+        elif ENGINE == "http":
+            # Only the engine actually run is imported, so Selenium runs need neither aiohttp nor playwright.
+            import mahakim_http
+            numbers = mahakim_queue.lease(conn, STATION, YEAR, lease_owner("http"), None, RETRY_FAILED, MAIN_LEASE_SECONDS)
+            mahakim_http.run_http_engine(numbers, YEAR, writer.write, lambda n, status, rows: writer.checkpoint(STATION, YEAR, n, status, rows),
+                                         HTTP_CONCURRENCY, THROTTLE, VERBOSE)
+        elif ENGINE == "playwright":
+            import mahakim_playwright
+            numbers = mahakim_queue.lease(conn, STATION, YEAR, lease_owner("playwright"), None, RETRY_FAILED, MAIN_LEASE_SECONDS)
+            target = mahakim_campaign.configured_target(CATALOGUE)
+            mahakim_playwright.run_playwright_engine(numbers, YEAR, writer.write, target, CATALOGUE,
+                                                     lambda n, status, rows: writer.checkpoint(STATION, YEAR, n, status, rows), CONTEXTS)
+        elif WORKERS > 1:
+            mahakim_pool.run_pool(functools.partial(pool_worker, mahakim_config.settings()), WORKERS, writer.write, writer.checkpoint,
+                                  lambda ctx, workers: mahakim_throttle.shared_state(ctx, MIN_DELAY, MAX_DELAY, workers))
+        else:
+            numbers = mahakim_queue.lease(conn, STATION, YEAR, lease_owner("main"), None, RETRY_FAILED, MAIN_LEASE_SECONDS)
+            throttle = mahakim_throttle.make_throttle(THROTTLE, "main", MIN_DELAY, MAX_DELAY, verbose=VERBOSE)
+            session = mahakim_health.Supervisor("main", init_driver, setup_filters, RECYCLE_AFTER, meter=traffic_meter())
+            try:
+                def query(n):
+                    found = []
+                    return scrape_number(session, n, found.extend, throttle), found
+                def on_result(n, status, rows):
+                    writer.write(rows)
+                    writer.checkpoint(STATION, YEAR, n, status, rows)
+                def on_skip(skipped):
+                    mahakim_queue.skip(conn, STATION, YEAR, skipped)
+                mahakim_discovery.run_sweep(query, numbers, on_result, DISCOVER_END and not REFRESH, 0 if REFRESH else STOP_AFTER_EMPTY, on_skip)
+            finally:
+                session.close()
+                mahakim_waits.print_wait_summary()
+    finally:
+        writer.close()
+        mahakim_memory.print_memory(mahakim_memory.stop_sampler())
+        if enricher:
+            import mahakim_enrich
+            enricher.finish(mahakim_enrich.details_path(OUTPUT_XLSX))
+        mahakim_store.compile_results(STORE_DB, OUTPUT_XLSX, mahakim_campaign.store_form(CATALOGUE))
+        mahakim_metrics.print_stage_summary()
+        mahakim_metrics.print_progress()
+        mahakim_metrics.close_log()
+        mahakim_refresh.print_changes(conn, started)
+        if CAMPAIGN_FILE:
+            mahakim_queue.print_status(conn)
+        else:
+            mahakim_queue.print_status(conn, STATION, YEAR)
+        conn.close()
+    say("\n✅ Scraping completed!")
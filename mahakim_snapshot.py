@@ -0,0 +1,149 @@
+# mahakim_snapshot.py
+# Warm starts: after a full form setup the session's cookies, local/session storage and form state are
+# saved; a new or recycled driver gets them back before the page loads, checks the form and only
+# re-selects the dropdowns that did not come back, instead of replaying every setup step
+import os
+import json
+import time
+import mahakim_catalogue
+import mahakim_waits
+import mahakim_metrics
+
+TTL_SECONDS = 12 * 3600
+LEVELS = mahakim_catalogue.LEVELS
+
+STORAGE_JS = """
+var dump = function (store) {
+    var out = {};
+    for (var i = 0; i < store.length; i++) { var key = store.key(i); out[key] = store.getItem(key); }
+    return out;
+};
+return {origin: location.origin, local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+# Placeholders count as nothing selected; only the form's own dropdowns (not a paginator) are read.
+FORM_STATE_JS = """
+var labels = [];
+var boxes = document.querySelectorAll('div.p-dropdown');
+for (var i = 0; i < boxes.length && i < arguments[0]; i++) {
+    var label = boxes[i].querySelector('.p-dropdown-label');
+    labels.push(label && !label.classList.contains('p-placeholder') ? (label.innerText || '').trim() : '');
+}
+return {labels: labels, checked: %s, inputs: document.querySelector("input[formcontrolname='numero']") !== null};
+""" % mahakim_waits.CHECKBOX_CHECKED
+
+# Runs before the app's own scripts on the next navigation, so the app boots with the saved storage.
+SEED_STORAGE_JS = """
+(function (origin, local, session) {
+    if (location.origin !== origin) return;
+    for (var key in local) window.localStorage.setItem(key, local[key]);
+    for (var key in session) window.sessionStorage.setItem(key, session[key]);
+})(%s, %s, %s);
+"""
+
+def form_state(driver):
+    return driver.execute_script(FORM_STATE_JS, len(LEVELS)) or {"labels": [], "checked": False, "inputs": False}
+
+def read_snapshots(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+def save(driver, path, key, url):
+    form = form_state(driver)
+    if not form["inputs"] or not any(form["labels"]):
+        return None
+    entry = {"saved_at": time.time(), "url": url, "cookies": driver.get_cookies(), "form": form}
+    entry.update(driver.execute_script(STORAGE_JS) or {})
+    snapshots = read_snapshots(path)
+    snapshots[key] = entry
+    # Workers in other processes may be saving too; each writes its own temp file and the last replace wins.
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshots, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    return entry
+
+def load(path, key, url, ttl=TTL_SECONDS):
+    # Missing, expired or taken from another site: all mean a cold start.
+    entry = read_snapshots(path).get(key)
+    if not entry or entry.get("url") != url:
+        return None
+    if ttl and time.time() - entry.get("saved_at", 0) > ttl:
+        return None
+    return entry
+
+def cookie_param(cookie):
+    # WebDriver cookie dicts call the expiry "expiry"; the DevTools protocol wants "expires".
+    param = {name: cookie[name] for name in ("name", "value", "domain", "path", "secure", "httpOnly") if name in cookie}
+    if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+        param["sameSite"] = cookie["sameSite"]
+    if "expiry" in cookie:
+        param["expires"] = cookie["expiry"]
+    return param
+
+def seed_session(driver, entry):
+    now = time.time()
+    cookies = [cookie_param(c) for c in entry.get("cookies", []) if c.get("expiry", now + 1) > now]
+    if cookies:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+    if not entry.get("local") and not entry.get("session"):
+        return None
+    source = SEED_STORAGE_JS % (json.dumps(entry["origin"]), json.dumps(entry["local"], ensure_ascii=False), json.dumps(entry["session"], ensure_ascii=False))
+    return driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": source}).get("identifier")
+
+def first_missing(current, expected):
+    for i, label in enumerate(expected):
+        if i >= len(current) or current[i] != label:
+            return i
+    return len(expected)
+
+def matches(state, expected):
+    return state["inputs"] and state["labels"][:len(expected["labels"])] == expected["labels"] and state["checked"] == expected["checked"]
+
+def warm_start(driver, path, key, url, ttl=TTL_SECONDS):
+    # Returns how many dropdowns had to be re-selected (0 when the whole setup was skipped), or None
+    # when there was no usable snapshot and the caller has to set the form up itself.
+    entry = load(path, key, url, ttl)
+    if entry is None:
+        return None
+    started = time.time()
+    expected = entry["form"]
+    try:
+        script = seed_session(driver, entry)
+        try:
+            mahakim_catalogue.open_form(driver, url)
+        finally:
+            # The seed must not run again on later reloads, where it would overwrite the session's own storage.
+            if script:
+                driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": script})
+        state = form_state(driver)
+        start = first_missing(state["labels"], expected["labels"])
+        # The checkbox sits between the first two dropdowns; without it nothing after the first one is trusted.
+        if expected["checked"] and not state["checked"]:
+            start = 0
+        for index in range(start, len(expected["labels"])):
+            if expected["labels"][index]:
+                mahakim_catalogue.select_level(driver, index, expected["labels"][index])
+            if index == 0 and expected["checked"]:
+                mahakim_catalogue.ensure_checkbox(driver)
+        ok = matches(form_state(driver), expected)
+    except Exception as e:
+        print(f"♨️  Warm start failed ({e}), setting the form up from scratch")
+        ok = False
+        start = 0
+    total = len(expected["labels"])
+    replayed = total - start
+    # A session that came back without any of its dropdowns saved nothing over a cold setup.
+    skipped = ok and replayed < total
+    mahakim_metrics.count("warm_starts" if skipped else "warm_start_replays" if ok else "warm_start_misses")
+    mahakim_metrics.record("warm_start", time.time() - started, ok=ok, replayed=replayed)
+    if skipped:
+        print(f"♨️  Warm start in {time.time() - started:.1f}s, {replayed} of {total} dropdowns re-selected")
+    elif ok:
+        print(f"♨️  Session restored in {time.time() - started:.1f}s, but all {total} dropdowns had to be re-selected")
+    return replayed if ok else None
@@ -0,0 +1,198 @@
+# mahakim_store.py
+# Indexed SQLite dataset: result shards are ingested incrementally into one table keyed on
+# (target, case_number, file_number), so reruns and retries never duplicate a row, plus a
+# query/export CLI that streams matches instead of loading the whole dataset
+import os
+import sys
+import csv
+import json
+import time
+import sqlite3
+import itertools
+import mahakim_queue
+import mahakim_writer
+
+FIELDS = mahakim_writer.FIELDS
+COLUMNS = mahakim_writer.COLUMNS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    target TEXT NOT NULL,
+    case_number TEXT NOT NULL,
+    file_number TEXT NOT NULL,
+    action TEXT NOT NULL DEFAULT '',
+    type TEXT NOT NULL DEFAULT '',
+    subject TEXT NOT NULL DEFAULT '',
+    more_info TEXT NOT NULL DEFAULT '',
+    queried_numero INTEGER,
+    queried_annee TEXT NOT NULL DEFAULT '',
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    seen_count INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (target, case_number, file_number)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_file ON results (file_number);
+CREATE INDEX IF NOT EXISTS results_type ON results (type);
+CREATE INDEX IF NOT EXISTS results_subject ON results (subject);
+CREATE INDEX IF NOT EXISTS results_case ON results (case_number);
+CREATE INDEX IF NOT EXISTS results_query ON results (queried_annee, queried_numero);
+CREATE TABLE IF NOT EXISTS ingested (
+    path TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO results (target, case_number, file_number, action, type, subject, more_info, queried_numero, queried_annee, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (target, case_number, file_number) DO UPDATE SET
+    action = excluded.action, type = excluded.type, subject = excluded.subject, more_info = excluded.more_info,
+    queried_numero = excluded.queried_numero, queried_annee = excluded.queried_annee,
+    last_seen = excluded.last_seen, seen_count = seen_count + 1
+"""
+
+def open_store(path, check_same_thread=True):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def to_item(record, form, now):
+    row = dict(zip(FIELDS, ("" if v is None else str(v) for v in record)))
+    numero = int(row["queried_numero"]) if row["queried_numero"].isdigit() else None
+    return (mahakim_writer.target_of(row, form), row["case_number"], row["file_number"], row["action"], row["type"],
+            row["subject"], row["more_info"], numero, row["queried_annee"], now, now)
+
+def ingest(conn, output_xlsx, form=""):
+    # Shards only ever grow, so each one is read from the last record already ingested;
+    # rows without a target (single-station runs) are filed under "form / year".
+    done = dict(conn.execute("SELECT path, rows FROM ingested").fetchall())
+    added = 0
+    shards = mahakim_writer.list_shards(mahakim_writer.shard_dir(output_xlsx))
+    for path in shards:
+        name = os.path.basename(path)
+        skip = done.get(name, 0)
+        now = time.time()
+        records = itertools.islice(mahakim_writer.read_shard(path), skip, None)
+        while True:
+            batch = [to_item(r, form, now) for r in itertools.islice(records, 1000)]
+            if not batch:
+                break
+            skip += len(batch)
+            def save():
+                conn.executemany(UPSERT, batch)
+                conn.execute("INSERT OR REPLACE INTO ingested (path, rows, updated_at) VALUES (?, ?, ?)", (name, skip, now))
+            mahakim_queue.transaction(conn, save)
+            added += len(batch)
+    print(f"🗃️  Ingested {added} new shard rows from {len(shards)} shards, {count(conn)} unique rows in the store")
+    return added
+
+def count(conn):
+    return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+def parse_filters(args):
+    # field=value is an exact (indexed) match, field~text a substring match, limit=N caps the output.
+    where, params, limit = [], [], None
+    for arg in args:
+        if arg.startswith("limit="):
+            limit = int(arg[6:])
+            continue
+        op = "~" if "~" in arg and ("=" not in arg or arg.index("~") < arg.index("=")) else "="
+        field, _, value = arg.partition(op)
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field '{field}', expected one of {FIELDS}")
+        if op == "~":
+            where.append(f"{field} LIKE ?")
+            params.append(f"%{value}%")
+        else:
+            where.append(f"{field} = ?")
+            params.append(int(value) if field == "queried_numero" and value.isdigit() else value)
+    return where, params, limit
+
+def find(conn, filters=()):
+    where, params, limit = parse_filters(filters)
+    query = f"SELECT {', '.join(FIELDS)} FROM results"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY target, queried_annee, queried_numero, case_number, file_number"
+    if limit:
+        query += f" LIMIT {limit}"
+    # The cursor is iterated lazily, so only one row is in memory at a time.
+    return conn.execute(query, params)
+
+def export(conn, path, filters=()):
+    rows = find(conn, filters)
+    tmp = path + ".tmp" + os.path.splitext(path)[1]
+    exported = 0
+    if path.endswith(".xlsx"):
+        # openpyxl is only loaded for XLSX output; CSV/JSONL exports start without it.
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Results")
+        ws.append(COLUMNS)
+        for record in rows:
+            ws.append(["" if v is None else v for v in record])
+            exported += 1
+        wb.save(tmp)
+    elif path.endswith(".jsonl"):
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in rows:
+                f.write(json.dumps(dict(zip(COLUMNS, record)), ensure_ascii=False) + "\n")
+                exported += 1
+    else:
+        with open(tmp, "w", encoding="utf-8-sig", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(COLUMNS)
+            for record in rows:
+                w.writerow(record)
+                exported += 1
+    os.replace(tmp, path)
+    print(f"📗 Exported {exported} unique rows to {path}")
+    return exported
+
+def compile_results(store_path, output_xlsx, form=""):
+    # Replaces the plain shard concatenation: the XLSX now holds each row once.
+    conn = open_store(store_path)
+    try:
+        ingest(conn, output_xlsx, form)
+        return export(conn, output_xlsx)
+    finally:
+        conn.close()
+
+def print_stats(conn):
+    print(f"🗃️  {count(conn)} unique rows")
+    for target, year, rows, numbers, seen in conn.execute(
+            "SELECT target, queried_annee, COUNT(*), COUNT(DISTINCT queried_numero), SUM(seen_count) FROM results GROUP BY target, queried_annee ORDER BY target, queried_annee"):
+        label = target if target.endswith(f" / {year}") else f"{target} / {year}"
+        print(f"   {label}: {rows} rows over {numbers} numbers ({seen - rows} duplicates absorbed)")
+    for field in ("type", "subject"):
+        top = conn.execute(f"SELECT {field}, COUNT(*) FROM results GROUP BY {field} ORDER BY COUNT(*) DESC LIMIT 10").fetchall()
+        print(f"   by {field}: " + ", ".join(f"{value or '-'} {n}" for value, n in top))
+
+USAGE = """Usage: python mahakim_store.py <results.sqlite> <command> ...
+  ingest <results.xlsx> ["court > ... > station" for untargeted rows]   add new shard rows to the store
+  find [field=value | field~text | limit=N ...]   print matching rows as JSON lines
+  export <out.xlsx|out.csv|out.jsonl> [filters ...]
+  stats
+Fields: """ + ", ".join(FIELDS)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(USAGE)
+        sys.exit(1)
+    conn = open_store(sys.argv[1])
+    command, args = sys.argv[2], sys.argv[3:]
+    if command == "ingest" and args:
+        ingest(conn, args[0], args[1] if len(args) > 1 else "")
+    elif command == "find":
+        for record in find(conn, args):
+            print(json.dumps(dict(zip(FIELDS, record)), ensure_ascii=False))
+    elif command == "export" and args:
+        export(conn, args[0], args[1:])
+    elif command == "stats":
+        print_stats(conn)
+    else:
+        print(USAGE)
+        sys.exit(1)
@@ -0,0 +1,98 @@
+# mahakim_throttle.py
+# Pluggable pacing between queries: the old MIN_DELAY/MAX_DELAY jitter, or AIMD pacing driven
+# by observed latency, loading/unknown statuses and exceptions, per worker and across workers
+import time
+import random
+
+TARGET_LATENCY = 6.0
+INCREASE = 0.05
+DECREASE = 0.5
+MIN_RATE = 1 / 30.0
+LOG_EVERY = 10
+BAD_STATUSES = ("loading", "unknown")
+
+def shared_state(ctx, min_delay, max_delay, workers):
+    # Shared by every worker process: the global rate and the next free query slot.
+    rate = ctx.Value("d", workers * 2.0 / (min_delay + max_delay), lock=False)
+    next_slot = ctx.Value("d", 0.0, lock=False)
+    return {"rate": rate, "next_slot": next_slot, "lock": ctx.Lock(), "max_rate": workers / min_delay}
+
+class FixedThrottle:
+    def __init__(self, name, min_delay, max_delay, shared=None, verbose=False):
+        self.name = name
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    def delay(self):
+        return self.min_delay + random.random() * (self.max_delay - self.min_delay)
+
+    def wait(self):
+        time.sleep(self.delay())
+
+    def record(self, status, latency=None, error=False):
+        pass
+
+    def describe(self):
+        return f"{self.name}: fixed {self.min_delay:.1f}-{self.max_delay:.1f}s"
+
+class AimdThrottle:
+    def __init__(self, name, min_delay, max_delay, shared=None, verbose=False):
+        self.name = name
+        self.verbose = verbose
+        self.min_delay = min_delay
+        self.max_rate = 1 / min_delay
+        self.rate = 2.0 / (min_delay + max_delay)
+        self.shared = shared
+        self.next_time = 0.0
+        self.records = 0
+        self.decreases = 0
+
+    def delay(self):
+        # Seconds until this session may query; the async engines sleep it with asyncio instead of wait().
+        now = time.time()
+        delay = max(0.0, self.next_time - now)
+        if self.shared:
+            with self.shared["lock"]:
+                slot = max(now + delay, self.shared["next_slot"].value)
+                self.shared["next_slot"].value = slot + 1 / self.shared["rate"].value
+            delay = slot - now
+        return max(0.0, delay)
+
+    def wait(self):
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+
+    def adjust(self, rate, max_rate, bad):
+        if bad:
+            return max(MIN_RATE, rate * DECREASE)
+        return min(max_rate, rate + INCREASE)
+
+    def record(self, status, latency=None, error=False):
+        bad = error or status in BAD_STATUSES or (latency is not None and latency > TARGET_LATENCY)
+        self.rate = self.adjust(self.rate, self.max_rate, bad)
+        # The gap runs from the end of this query, never below MIN_DELAY, so a slow site still gets a pause
+        # between queries; +/-10% jitter keeps several sessions out of lockstep.
+        self.next_time = time.time() + max(self.min_delay, random.uniform(0.9, 1.1) / self.rate)
+        if self.shared:
+            with self.shared["lock"]:
+                self.shared["rate"].value = self.adjust(self.shared["rate"].value, self.shared["max_rate"], bad)
+        self.records += 1
+        if bad:
+            self.decreases += 1
+        # Every backoff is reported only when verbose; otherwise the rate shows up every LOG_EVERY queries.
+        if (bad and self.verbose) or self.records % LOG_EVERY == 0:
+            print(f"🚦 [RATE] {self.describe()}{' (backing off)' if bad else ''}")
+
+    def describe(self):
+        text = f"{self.name}: {self.rate:.2f} q/s ({1 / self.rate:.1f}s between queries)"
+        if self.shared:
+            text += f", global {self.shared['rate'].value:.2f} q/s"
+        return text
+
+THROTTLES = {"fixed": FixedThrottle, "aimd": AimdThrottle}
+
+def make_throttle(kind, name, min_delay, max_delay, shared=None, verbose=False):
+    if kind not in THROTTLES:
+        raise ValueError(f"Unknown throttle '{kind}', expected one of {sorted(THROTTLES)}")
+    return THROTTLES[kind](name, min_delay, max_delay, shared, verbose)
@@ -0,0 +1,131 @@
+# mahakim_waits.py
+# Event-driven waits: MutationObserver + Angular stability + in-flight XHR/fetch count,
+# resolved inside the page through execute_async_script instead of fixed sleeps
+import time
+import statistics
+from collections import deque
+import mahakim_metrics
+
+SCRIPT_TIMEOUT = 60
+
+PAGE_READY = "document.querySelector('.p-dropdown') !== null"
+PANEL_OPEN = "document.querySelector('.p-dropdown-panel li.p-dropdown-item') !== null"
+PANEL_CLOSED = "document.querySelector('.p-dropdown-panel') === null"
+CHECKBOX_CHECKED = "document.querySelector('.p-checkbox-box.p-highlight') !== null"
+FORM_READY = "document.querySelector(\"div.three-inputs input[formcontrolname='numero']\") !== null"
+RESULTS_READY = """(function () {
+    var ps = document.getElementsByTagName('p');
+    for (var i = 0; i < ps.length; i++) if ((ps[i].textContent || '').indexOf('لا توجد أية نتيجة للبحث') !== -1) return true;
+    if (document.getElementById('pr_id_16-table')) return true;
+    var all = document.body.getElementsByTagName('td');
+    for (var i = 0; i < all.length; i++) { var t = all[i].textContent || ''; if (t.indexOf('/') !== -1 && t.indexOf(year) !== -1) return true; }
+    return false;
+})()"""
+
+PROBE_JS = """
+if (!window.__mahakimProbe) {
+    window.__mahakimProbe = true;
+    window.__mahakimPending = 0;
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        window.__mahakimPending++;
+        this.addEventListener('loadend', function () { window.__mahakimPending--; });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var f = window.fetch;
+        window.fetch = function () {
+            window.__mahakimPending++;
+            return f.apply(this, arguments).finally(function () { window.__mahakimPending--; });
+        };
+    }
+}
+"""
+
+ARM_JS = """
+window.__mahakimChanges = 0;
+if (!window.__mahakimObserver && document.body) {
+    window.__mahakimObserver = new MutationObserver(function (m) { window.__mahakimChanges += m.length; });
+    window.__mahakimObserver.observe(document.body, {childList: true, subtree: true, characterData: true});
+}
+"""
+
+WAIT_JS = """
+var done = arguments[arguments.length - 1];
+var timeoutMs = arguments[0], requireChange = arguments[1], year = String(arguments[2]);
+var started = Date.now(), finished = false, observer = null, timer = null;
+function condition() { try { return !!(%s); } catch (e) { return false; } }
+function stable() {
+    try {
+        var t = window.getAllAngularTestabilities ? window.getAllAngularTestabilities() : [];
+        for (var i = 0; i < t.length; i++) if (!t[i].isStable()) return false;
+    } catch (e) {}
+    return (window.__mahakimPending || 0) <= 0;
+}
+// After a search the page must actually have changed since arming; a quiet page still showing the
+// previous number's table is not an answer, so without a change only the timeout ends the wait.
+function changed() {
+    return !requireChange || (window.__mahakimChanges || 0) > 0;
+}
+function finish(ok) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    if (timer) clearInterval(timer);
+    done({ok: ok, waited_ms: Date.now() - started});
+}
+function check() {
+    if (finished) return;
+    if (condition() && stable() && changed()) finish(true);
+    else if (Date.now() - started >= timeoutMs) finish(false);
+}
+observer = new MutationObserver(check);
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+// Stability can flip without a DOM mutation (an XHR completing), so re-check on a short in-page timer too.
+timer = setInterval(check, 50);
+check();
+"""
+
+STEP_WAITS = {}
+
+def install_probe(driver):
+    driver.set_script_timeout(SCRIPT_TIMEOUT)
+    driver.execute_script(PROBE_JS)
+
+def arm_changes(driver):
+    driver.execute_script(ARM_JS)
+
+def record_wait(step, seconds, ok):
+    # Count, total and max cover the whole run; the median comes from the last SAMPLE_WINDOW waits,
+    # so a sweep of any length keeps a fixed amount of memory per step.
+    waits = STEP_WAITS.get(step)
+    if waits is None:
+        waits = STEP_WAITS[step] = {"count": 0, "total": 0.0, "max": 0.0, "samples": deque(maxlen=mahakim_metrics.SAMPLE_WINDOW), "timeouts": 0}
+    waits["count"] += 1
+    waits["total"] += seconds
+    waits["max"] = max(waits["max"], seconds)
+    waits["samples"].append(seconds)
+    mahakim_metrics.record(f"wait {step}", seconds, ok=ok)
+    if not ok:
+        waits["timeouts"] += 1
+
+def wait_for(driver, step, condition, timeout=10, require_change=False, year=""):
+    started = time.time()
+    try:
+        result = driver.execute_async_script(WAIT_JS % condition, int(timeout * 1000), require_change, str(year)) or {}
+        ok = bool(result.get("ok"))
+    except Exception as e:
+        print(f"  ⚠️  Wait '{step}' failed: {e}")
+        ok = False
+    waited = time.time() - started
+    record_wait(step, waited, ok)
+    if not ok:
+        print(f"  ⚠️  Wait '{step}' timed out after {waited:.1f}s")
+    return ok
+
+def print_wait_summary():
+    if not STEP_WAITS:
+        return
+    print("\n=== Wait summary ===")
+    for step, waits in STEP_WAITS.items():
+        print(f"⏱️  {step}: {waits['count']} waits, p50 {statistics.median(waits['samples']):.2f}s, max {waits['max']:.2f}s, total {waits['total']:.1f}s, timeouts {waits['timeouts']}")
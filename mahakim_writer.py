@@ -0,0 +1,189 @@
+# mahakim_writer.py
+# Buffered, append-only result shards (CSV/JSONL/Parquet); mahakim_store turns them into the final XLSX.
+# pandas and openpyxl are imported where they are used, so reading CSV/JSONL shards stays light
+import os
+import csv
+import glob
+import json
+import time
+import mahakim_metrics
+
+COLUMNS = ["رقم المحضر بالمحكمة","الإجراء","نوع المحضر","موضوع المحضر","رقم الملف الجنحي","مزيد من المعلومات","الرقم المستعلم","السنة المستعلم بها","الهدف"]
+ROW_FIELDS = ["case_number","action","type","subject","file_number","more_info"]
+FIELDS = ROW_FIELDS + ["queried_numero","queried_annee","target"]
+FORMATS = ("csv", "jsonl", "parquet")
+
+def target_of(row, form=""):
+    # The store and the details cache key rows as "court > ... > station / year". Campaign rows carry that
+    # label; rows of single-station runs are given it from the configured form and their queried year.
+    if row.get("target") or not form:
+        return row.get("target", "")
+    return f"{form} / {row.get('queried_annee', '')}"
+
+def to_record(row):
+    return [row.get(field, "") for field in FIELDS]
+
+def shard_dir(output_xlsx):
+    return os.path.splitext(output_xlsx)[0] + ".shards"
+
+def fsync_dir(path):
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+class ShardWriter:
+    def __init__(self, output_xlsx, fmt="csv", flush_rows=50, flush_seconds=30, on_progress=None, on_rows=None, verbose=False):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown shard format '{fmt}', expected one of {FORMATS}")
+        self.output_xlsx = output_xlsx
+        self.fmt = fmt
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.on_progress = on_progress
+        self.on_rows = on_rows
+        self.verbose = verbose
+        self.directory = shard_dir(output_xlsx)
+        os.makedirs(self.directory, exist_ok=True)
+        import_legacy_xlsx(output_xlsx, self.directory)
+        self.stem = os.path.join(self.directory, f"part-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+        self.path = f"{self.stem}.{fmt}"
+        self.buffer = []
+        self.pending_progress = []
+        self.parts = 0
+        self.last_flush = time.time()
+        self.total_rows = 0
+
+    def write(self, rows):
+        if not rows:
+            return
+        self.buffer.extend(to_record(row) for row in rows)
+        self.say(f"💾 Buffered {len(rows)} new rows ({len(self.buffer)} pending, {self.path})")
+        if self.on_rows:
+            self.on_rows(rows)
+        if len(self.buffer) >= self.flush_rows or time.time() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def say(self, message):
+        # One line per query with hits (and per flush) is noise on a long sweep; the totals come from the store.
+        if self.verbose:
+            print(message)
+
+    def checkpoint(self, *item):
+        # Progress only moves once every row found before it is safely on disk.
+        if not self.on_progress:
+            return
+        if self.buffer:
+            self.pending_progress.append(item)
+            if time.time() - self.last_flush >= self.flush_seconds:
+                self.flush()
+        else:
+            self.on_progress(*item)
+
+    def flush(self):
+        if self.buffer:
+            with mahakim_metrics.timed("write", rows=len(self.buffer)):
+                if self.fmt == "csv":
+                    self.append_csv()
+                elif self.fmt == "jsonl":
+                    self.append_jsonl()
+                else:
+                    self.write_parquet_part()
+            self.total_rows += len(self.buffer)
+            self.say(f"💾 Flushed {len(self.buffer)} rows to {self.directory}")
+            self.buffer = []
+        self.last_flush = time.time()
+        if self.on_progress:
+            for item in self.pending_progress:
+                self.on_progress(*item)
+        self.pending_progress = []
+
+    def append_csv(self):
+        is_new = not os.path.exists(self.path)
+        with open(self.path, "a", encoding="utf-8-sig" if is_new else "utf-8", newline="") as f:
+            w = csv.writer(f)
+            if is_new:
+                w.writerow(COLUMNS)
+            w.writerows(self.buffer)
+            f.flush()
+            os.fsync(f.fileno())
+        if is_new:
+            fsync_dir(self.directory)
+
+    def append_jsonl(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in self.buffer:
+                f.write(json.dumps(dict(zip(COLUMNS, record)), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def write_parquet_part(self):
+        # Parquet files cannot be appended to, so every flush becomes its own part.
+        self.parts += 1
+        path = f"{self.stem}-{self.parts:05d}.parquet"
+        tmp = path + ".tmp"
+        import pandas as pd
+        df = pd.DataFrame(self.buffer, columns=COLUMNS).astype(str)
+        df.to_parquet(tmp, index=False)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        fsync_dir(self.directory)
+
+    def close(self):
+        self.flush()
+
+def import_legacy_xlsx(output_xlsx, directory):
+    # A results.xlsx written before shards existed is carried over once as the first shard.
+    if not os.path.exists(output_xlsx) or list_shards(directory):
+        return
+    legacy = os.path.join(directory, "part-00000000-legacy.csv")
+    from openpyxl import load_workbook
+    wb = load_workbook(output_xlsx, read_only=True)
+    try:
+        rows = wb.active.iter_rows(min_row=2, values_only=True)
+        with open(legacy + ".tmp", "w", encoding="utf-8-sig", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(COLUMNS)
+            for r in rows:
+                record = ["" if v is None else v for v in r[:len(COLUMNS)]]
+                w.writerow(record + [""] * (len(COLUMNS) - len(record)))
+            f.flush()
+            os.fsync(f.fileno())
+    finally:
+        wb.close()
+    os.replace(legacy + ".tmp", legacy)
+    print(f"📥 Imported existing {output_xlsx} into {legacy}")
+
+def list_shards(directory):
+    paths = []
+    for fmt in FORMATS:
+        paths += glob.glob(os.path.join(directory, f"part-*.{fmt}"))
+    return sorted(paths)
+
+def read_shard(path):
+    if path.endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, COLUMNS)
+            for record in reader:
+                # A crash can leave a torn last line; it is skipped rather than misaligned.
+                # Shards written before a column was added are padded by header name.
+                if len(record) == len(header):
+                    item = dict(zip(header, record))
+                    yield [item.get(c, "") for c in COLUMNS]
+    elif path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                yield [item.get(c, "") for c in COLUMNS]
+    else:
+        import pandas as pd
+        df = pd.read_parquet(path).reindex(columns=COLUMNS, fill_value="")
+        for record in df.itertuples(index=False, name=None):
+            yield list(record)